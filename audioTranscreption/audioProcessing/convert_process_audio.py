@@ -1,37 +1,63 @@
 import subprocess
 import os
+from .pcm_store import SAMPLE_RATE
 
-def convert_audio_ffmpeg(input_path: str) -> str:
+# Speech cleanup applied to every conversion
+SPEECH_FILTERS = "highpass=f=200, lowpass=f=3000, dynaudnorm"
+
+# Container/codec arguments and file extension per output format
+_OUTPUT_FORMATS = {
+    "flac": (["-c:a", "flac"], ".flac"),
+    "pcm": (["-f", "s16le", "-c:a", "pcm_s16le"], ".pcm"),
+}
+
+def _ffmpeg_command(input_path: str, output_args: list) -> list:
     """
-    Converts the given audio or video file to a mono FLAC file at 16kHz,
+    Builds the ffmpeg command shared by file conversion and streaming: mono 16kHz
+    16-bit audio with the speech-enhancement filters, followed by `output_args`.
+    """
+    return [
+        "ffmpeg", "-y", "-i", input_path,
+        "-ac", "1",                        # mono channel
+        "-ar", str(SAMPLE_RATE),          # 16kHz sample rate
+        "-sample_fmt", "s16",             # 16-bit signed PCM
+        "-vn",                             # remove video
+        "-af", SPEECH_FILTERS,             # speech cleanup
+        "-map", "0:a",                     # select only audio stream
+        *output_args
+    ]
+
+def convert_audio_ffmpeg(input_path: str, output_format: str = "flac", output_path: str = None) -> str:
+    """
+    Converts the given audio or video file to mono 16kHz audio (FLAC or raw PCM),
     with filters applied for speech enhancement.
 
     Args:
         input_path (str): Path to the input audio or video file.
+        output_format (str): `"flac"` for a compressed file, or `"pcm"` for raw 16-bit
+            little-endian samples that can be memory-mapped with `PCMStore`.
+        output_path (str, optional): Where to write the result. Defaults to the input name
+            with the format's extension under tmp/.
 
     Returns:
-        str: Path to the converted FLAC file.
+        str: Path to the converted file.
+
+    Raises:
+        ValueError: If `output_format` is not supported.
     """
+    if output_format not in _OUTPUT_FORMATS:
+        raise ValueError(f"Unsupported output format: {output_format}")
+    codec_args, extension = _OUTPUT_FORMATS[output_format]
 
     if not input_path:
         raise FileNotFoundError(f"Input file not found: {input_path}")
 
-    base_name = os.path.splitext(os.path.basename(input_path))[0] + '.flac'
-    output_dir = "tmp"
-    os.makedirs(output_dir, exist_ok=True)
-    output_path = os.path.join(output_dir, base_name)
+    if output_path is None:
+        base_name = os.path.splitext(os.path.basename(input_path))[0] + extension
+        output_path = os.path.join("tmp", base_name)
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
 
-    cmd = [
-        "ffmpeg", "-y", "-i", input_path,
-        "-ac", "1",                        # mono channel
-        "-ar", "16000",                   # 16kHz sample rate
-        "-sample_fmt", "s16",             # 16-bit signed PCM
-        "-vn",                             # remove video
-        "-af", "highpass=f=200, lowpass=f=3000, dynaudnorm",  # speech cleanup
-        "-map", "0:a",                     # select only audio stream
-        "-c:a", "flac",                    # encode as FLAC
-        output_path
-    ]
+    cmd = _ffmpeg_command(input_path, [*codec_args, output_path])
 
     result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
 
@@ -43,4 +69,41 @@ def convert_audio_ffmpeg(input_path: str) -> str:
     #print(f"[✔] Audio converted and cleaned → {output_path}")
     return output_path
 
+def stream_audio_ffmpeg(input_path: str, block_size: int = 1 << 16):
+    """
+    Converts the given audio or video file like `convert_audio_ffmpeg`, but streams raw
+    16-bit little-endian PCM from ffmpeg's stdout instead of writing a file.
+
+    Args:
+        input_path (str): Path to the input audio or video file.
+        block_size (int): Maximum number of bytes read from the pipe at once.
+
+    Yields:
+        bytes: Consecutive blocks of PCM data, as soon as ffmpeg produces them.
 
+    Raises:
+        FileNotFoundError: If `input_path` is empty.
+        RuntimeError: If ffmpeg exits with an error.
+    """
+    if not input_path:
+        raise FileNotFoundError(f"Input file not found: {input_path}")
+
+    cmd = _ffmpeg_command(input_path, ["-f", "s16le", "-c:a", "pcm_s16le", "pipe:1"])
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    finished = False
+    try:
+        while True:
+            block = process.stdout.read1(block_size)
+            if not block:
+                break
+            yield block
+        finished = True
+    finally:
+        process.stdout.close()
+        # Stop ffmpeg if the consumer gave up before the end of the stream
+        if not finished:
+            process.kill()
+        returncode = process.wait()
+
+    if returncode != 0:
+        raise RuntimeError("Audio conversion failed.")
@@ -1,82 +1,175 @@
 import re
-def find_longest_common_sequence(sequences: list[str], match_by_words: bool = True) -> str:
-    """
-    Find the optimal alignment between sequences with longest common sequence and sliding window matching.
-    
-    Args:
-        sequences: List of text sequences to align and merge
-        match_by_words: Whether to match by words (True) or characters (False)
-        
-    Returns:
-        str: Merged sequence with optimal alignment
-        
-    Raises:
-        RuntimeError: If there's a mismatch in sequence lengths during comparison
-    """
-    if not sequences:
-        return ""
+import sys
+import time
+import numpy as np
 
-    # Convert input based on matching strategy
+# Rows of the token equality matrix compared at once, bounding memory to _BLOCK_ROWS x len(right)
+_BLOCK_ROWS = 1024
+
+def _tokenize(sequences: list[str], match_by_words: bool) -> list[list[str]]:
     if match_by_words:
-        sequences = [
+        return [
             [word for word in re.split(r'(\s+\w+)', seq) if word]
             for seq in sequences
         ]
-    else:
-        sequences = [list(seq) for seq in sequences]
+    return [list(seq) for seq in sequences]
+
+def _alignment_bounds(i: int, left_length: int, right_length: int) -> tuple:
+    """
+    Slices of the left and right sequences that overlap when the right one is shifted so
+    that `i` tokens are compared (1 <= i <= left_length + right_length).
+    """
+    left_start = max(0, left_length - i)
+    left_stop = min(left_length, left_length + right_length - i)
+    right_start = max(0, i - left_length)
+    right_stop = min(right_length, i)
+    return left_start, left_stop, right_start, right_stop
+
+def _match_counts(left_ids: np.ndarray, right_ids: np.ndarray) -> np.ndarray:
+    """
+    Number of equal tokens for every alignment at once.
+
+    Token `a` of the left sequence is compared with token `b` of the right one in alignment
+    `i = len(left) - a + b`, so counting the equal pairs per diagonal gives all match counts.
+
+    Returns:
+        np.ndarray: `counts[i]` for i in 0..len(left) + len(right) (index 0 is unused).
+    """
+    left_length, right_length = len(left_ids), len(right_ids)
+    counts = np.zeros(left_length + right_length + 1, dtype=np.int64)
+    right_pos = np.arange(right_length)
+    for block_start in range(0, left_length, _BLOCK_ROWS):
+        block = left_ids[block_start:block_start + _BLOCK_ROWS]
+        a, b = np.nonzero(block[:, None] == right_ids[None, :])
+        counts += np.bincount(left_length - (a + block_start) + right_pos[b], minlength=len(counts))
+    return counts
+
+def _best_alignment(left_sequence: list, right_sequence: list) -> tuple:
+    """
+    Vectorized search for the alignment maximizing `matches / i + i / 10000` with at least
+    two matches. Ties resolve to the smallest `i`, as in `_best_alignment_reference`.
+    """
+    left_length, right_length = len(left_sequence), len(right_sequence)
+    if not left_length or not right_length:
+        return (left_length, left_length, 0, 0)
+
+    vocabulary = {}
+    left_ids = np.fromiter((vocabulary.setdefault(t, len(vocabulary)) for t in left_sequence), dtype=np.int64, count=left_length)
+    right_ids = np.fromiter((vocabulary.setdefault(t, len(vocabulary)) for t in right_sequence), dtype=np.int64, count=right_length)
+
+    matches = _match_counts(left_ids, right_ids)[1:]
+    offsets = np.arange(1, left_length + right_length + 1, dtype=np.float64)
+    # Same float operations, in the same order, as the scalar loop
+    matching = matches / offsets + offsets / 10000.0
+    matching[matches <= 1] = -np.inf
+
+    best = int(np.argmax(matching))
+    if matching[best] == -np.inf:
+        return (left_length, left_length, 0, 0)
+    return _alignment_bounds(best + 1, left_length, right_length)
+
+def _best_alignment_reference(left_sequence: list, right_sequence: list) -> tuple:
+    """
+    Original scalar scan over every alignment, kept as the reference for `benchmark_lcs`.
+    """
+    left_length, right_length = len(left_sequence), len(right_sequence)
+    max_matching = 0.0
+    max_indices = (left_length, left_length, 0, 0)
+
+    # Try different alignments
+    for i in range(1, left_length + right_length + 1):
+        # Add epsilon to favor longer matches
+        eps = float(i) / 10000.0
+
+        left_start, left_stop, right_start, right_stop = _alignment_bounds(i, left_length, right_length)
+        left = left_sequence[left_start:left_stop]
+        right = right_sequence[right_start:right_stop]
+
+        matches = sum(a == b for a, b in zip(left, right))
 
+        # Normalize matches by position and add epsilon
+        matching = matches / float(i) + eps
+
+        # Require at least 2 matches
+        if matches > 1 and matching > max_matching:
+            max_matching = matching
+            max_indices = (left_start, left_stop, right_start, right_stop)
+    return max_indices
+
+def _merge_sequences(sequences: list[list[str]], best_alignment) -> str:
     left_sequence = sequences[0]
-    left_length = len(left_sequence)
     total_sequence = []
 
     for right_sequence in sequences[1:]:
-        max_matching = 0.0
-        right_length = len(right_sequence)
-        max_indices = (left_length, left_length, 0, 0)
-
-        # Try different alignments
-        for i in range(1, left_length + right_length + 1):
-            # Add epsilon to favor longer matches
-            eps = float(i) / 10000.0
-
-            left_start = max(0, left_length - i)
-            left_stop = min(left_length, left_length + right_length - i)
-            left = left_sequence[left_start:left_stop]
-
-            right_start = max(0, i - left_length)
-            right_stop = min(right_length, i)
-            right = right_sequence[right_start:right_stop]
-
-            if len(left) != len(right):
-                raise RuntimeError(
-                    "Mismatched subsequences detected during transcript merging."
-                )
-
-            matches = sum(a == b for a, b in zip(left, right))
-            
-            # Normalize matches by position and add epsilon 
-            matching = matches / float(i) + eps
-
-            # Require at least 2 matches
-            if matches > 1 and matching > max_matching:
-                max_matching = matching
-                max_indices = (left_start, left_stop, right_start, right_stop)
-
         # Use the best alignment found
-        left_start, left_stop, right_start, right_stop = max_indices
-        
+        left_start, left_stop, right_start, right_stop = best_alignment(left_sequence, right_sequence)
+
         # Take left half from left sequence and right half from right sequence
         left_mid = (left_stop + left_start) // 2
         right_mid = (right_stop + right_start) // 2
-        
+
         total_sequence.extend(left_sequence[:left_mid])
         left_sequence = right_sequence[right_mid:]
-        left_length = len(left_sequence)
 
     # Add remaining sequence
     total_sequence.extend(left_sequence)
-    
+
     # Join back into text
-    if match_by_words:
-        return ''.join(total_sequence)
     return ''.join(total_sequence)
+
+def find_longest_common_sequence(sequences: list[str], match_by_words: bool = True) -> str:
+    """
+    Find the optimal alignment between sequences with longest common sequence and sliding window matching.
+
+    Tokens are mapped to integer IDs and the match counts of all alignment offsets are computed
+    at once with NumPy, so character mode (`match_by_words=False`) stays fast on long texts.
+
+    Args:
+        sequences: List of text sequences to align and merge
+        match_by_words: Whether to match by words (True) or characters (False)
+
+    Returns:
+        str: Merged sequence with optimal alignment
+    """
+    if not sequences:
+        return ""
+    return _merge_sequences(_tokenize(sequences, match_by_words), _best_alignment)
+
+def benchmark_lcs(n_words=2000, overlap_words=300, match_by_words=True, seed=0):
+    """
+    Compares `find_longest_common_sequence` with the original scalar scan on two long segment
+    texts that share `overlap_words` words.
+
+    Args:
+        n_words (int, optional): Number of words in each text. Defaults to 2000.
+        overlap_words (int, optional): Words shared by the end of the first text and the start
+            of the second. Defaults to 300.
+        match_by_words (bool, optional): Matching mode passed to both implementations. Defaults to True.
+        seed (int, optional): Random seed for the synthetic texts. Defaults to 0.
+
+    Returns:
+        dict: "identical", "reference_sec" and "fast_sec".
+    """
+    rng = np.random.default_rng(seed)
+    vocabulary = [f"w{k}" for k in range(500)]
+    words = [vocabulary[k] for k in rng.integers(0, len(vocabulary), 2 * n_words - overlap_words)]
+    texts = [" " + " ".join(words[:n_words]), " " + " ".join(words[n_words - overlap_words:])]
+    sequences = _tokenize(texts, match_by_words)
+
+    start = time.perf_counter()
+    expected = _merge_sequences(sequences, _best_alignment_reference)
+    reference_sec = time.perf_counter() - start
+
+    start = time.perf_counter()
+    got = find_longest_common_sequence(texts, match_by_words)
+    fast_sec = time.perf_counter() - start
+
+    print(f"identical output: {got == expected}")
+    print(f"reference: {reference_sec:.2f}s  fast: {fast_sec:.3f}s  speedup: {reference_sec / fast_sec:.1f}x")
+    return {"identical": got == expected, "reference_sec": reference_sec, "fast_sec": fast_sec}
+
+if __name__ == "__main__":
+    benchmark_lcs(
+        n_words=int(sys.argv[1]) if len(sys.argv) > 1 else 2000,
+        match_by_words=not (len(sys.argv) > 2 and sys.argv[2] == "chars")
+    )
@@ -3,7 +3,29 @@ from .find_LCS import find_longest_common_sequence
 def get_attr(obj, key, default=None):
     return obj.get(key, default) if isinstance(obj, dict) else getattr(obj, key, default)
 
-def merge_transcripts(results: list[tuple[dict, int]]) -> dict:
+def _to_original(offset_map, chunk_start_ms: int, t: float) -> float:
+    """
+    Converts a chunk-relative time in seconds to the original timeline, through the chunk's
+    VAD offset map when silences were cut out of it, or by its start offset otherwise.
+    """
+    if offset_map is not None:
+        return offset_map.to_original(t)
+    return t + chunk_start_ms / 1000
+
+def merge_transcripts(results: list[tuple[dict, int]], offset_maps: list = None) -> dict:
+    """
+    Merges per-chunk transcriptions into a single transcript.
+
+    Args:
+        results (list[tuple[dict, int]]): (transcription, chunk start in ms) per chunk, in order.
+        offset_maps (list, optional): One `OffsetMap` per chunk when the chunks were planned by
+            VAD (`build_vad_chunks`). Word and segment times are then mapped back to the original
+            recording. Such chunks only overlap where one speech region was split; only there
+            are their segments reconciled as with fixed chunks, elsewhere they are concatenated.
+
+    Returns:
+        dict: "text", "segments" and, when the provider returned them, "words".
+    """
     #print("\nMerging results...")
 
     has_segments = any(
@@ -14,15 +36,16 @@ def merge_transcripts(results: list[tuple[dict, int]]) -> dict:
     has_words = False
     words = []
 
-    for chunk, chunk_start_ms in results:
+    for i, (chunk, chunk_start_ms) in enumerate(results):
+        offset_map = offset_maps[i] if offset_maps else None
         data = chunk.model_dump() if hasattr(chunk, 'model_dump') else chunk
         chunk_words = data.get('words', []) if isinstance(data, dict) else getattr(chunk, 'words', [])
 
         if chunk_words:
             has_words = True
             for word in chunk_words:
-                word_start = get_attr(word, 'start', 0) + chunk_start_ms / 1000
-                word_end = get_attr(word, 'end', 0) + chunk_start_ms / 1000
+                word_start = _to_original(offset_map, chunk_start_ms, get_attr(word, 'start', 0))
+                word_end = _to_original(offset_map, chunk_start_ms, get_attr(word, 'end', 0))
                 words.append({
                     'word': get_attr(word, 'word', ''),
                     'start': word_start,
@@ -40,6 +63,38 @@ def merge_transcripts(results: list[tuple[dict, int]]) -> dict:
             result["words"] = words
         return result
 
+    if offset_maps:
+        final_segments = []
+        previous = []
+        for i, ((chunk, chunk_start_ms), offset_map) in enumerate(zip(results, offset_maps)):
+            data = chunk.model_dump() if hasattr(chunk, 'model_dump') else chunk
+            segments = [{
+                'text': get_attr(seg, 'text', ''),
+                'start': _to_original(offset_map, chunk_start_ms, get_attr(seg, 'start', 0)),
+                'end': _to_original(offset_map, chunk_start_ms, get_attr(seg, 'end', 0))
+            } for seg in get_attr(data, 'segments', [])]
+
+            # Chunks only overlap where one speech region was split; reconcile it like fixed chunks
+            overlap_start = offset_map.spans[0][0] if offset_map.spans else None
+            if (i and previous and segments and overlap_start is not None
+                    and offset_maps[i - 1].spans and overlap_start < offset_maps[i - 1].spans[-1][1]):
+                tail = [seg for seg in previous if seg['end'] > overlap_start]
+                if tail:
+                    previous = [seg for seg in previous if seg['end'] <= overlap_start]
+                    segments[0] = {
+                        'text': find_longest_common_sequence([' '.join(seg['text'] for seg in tail), segments[0]['text']]),
+                        'start': tail[0]['start'],
+                        'end': segments[0]['end']
+                    }
+            final_segments.extend(previous)
+            previous = segments
+        final_segments.extend(previous)
+
+        result = {"text": ' '.join(seg['text'] for seg in final_segments), "segments": final_segments}
+        if has_words:
+            result["words"] = words
+        return result
+
     #print("Merging segments across chunks...")
     final_segments = []
     processed_chunks = []
@@ -0,0 +1,156 @@
+import subprocess
+import wave
+from io import BytesIO
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+def encode_chunk(samples: np.ndarray, sample_rate: int = SAMPLE_RATE, audio_format: str = "flac") -> BytesIO:
+    """
+    Encodes mono 16-bit PCM samples into an in-memory audio file ready for upload.
+
+    Args:
+        samples (np.ndarray): int16 mono samples (a memory-mapped view is fine, it is not copied).
+        sample_rate (int): Sample rate of `samples` in Hz.
+        audio_format (str): `"flac"` (encoded by ffmpeg through pipes) or `"wav"` (pure Python).
+
+    Returns:
+        BytesIO: Encoded audio positioned at the start, with a `name` such as `"chunk.flac"`.
+
+    Raises:
+        ValueError: If `audio_format` is not supported.
+        RuntimeError: If ffmpeg fails to encode the chunk.
+    """
+    buffer = BytesIO()
+    pcm = memoryview(np.ascontiguousarray(samples)).cast("B")
+
+    if audio_format == "wav":
+        with wave.open(buffer, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(sample_rate)
+            wav.writeframes(pcm)
+    elif audio_format == "flac":
+        cmd = [
+            "ffmpeg", "-loglevel", "error",
+            "-f", "s16le", "-ar", str(sample_rate), "-ac", "1", "-i", "pipe:0",
+            "-c:a", "flac", "-f", "flac", "pipe:1"
+        ]
+        result = subprocess.run(cmd, input=pcm, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        if result.returncode != 0:
+            raise RuntimeError("Chunk encoding failed.")
+        buffer.write(result.stdout)
+    else:
+        raise ValueError(f"Unsupported audio format: {audio_format}")
+
+    buffer.seek(0)
+    buffer.name = f"chunk.{audio_format}"
+    return buffer
+
+class PCMChunk:
+    """
+    Zero-copy slice of a `PCMStore`.
+
+    `len(chunk)` is the duration in milliseconds, as with a pydub `AudioSegment`.
+
+    Attributes:
+        samples (np.ndarray): int16 view into the memory-mapped PCM file.
+        sample_rate (int): Sample rate in Hz.
+    """
+
+    def __init__(self, samples: np.ndarray, sample_rate: int = SAMPLE_RATE):
+        self.samples = samples
+        self.sample_rate = sample_rate
+
+    def __len__(self) -> int:
+        return int(len(self.samples) * 1000 // self.sample_rate)
+
+    @property
+    def raw_data(self) -> bytes:
+        return self.samples.tobytes()
+
+    def encode(self, audio_format: str = "flac") -> BytesIO:
+        """
+        Encodes the chunk into an in-memory file (see `encode_chunk`).
+        """
+        return encode_chunk(self.samples, self.sample_rate, audio_format)
+
+class PCMStore:
+    """
+    Memory-mapped raw PCM file (16-bit little-endian mono) produced by `convert_audio_ffmpeg`.
+
+    The file is never loaded into RAM: slicing with millisecond bounds, like an `AudioSegment`,
+    returns a `PCMChunk` backed by the same mapping, and only the pages of the chunk being
+    encoded are read.
+
+    Args:
+        path (str): Path to the raw s16le PCM file.
+        sample_rate (int): Sample rate of the file in Hz.
+    """
+
+    def __init__(self, path: str, sample_rate: int = SAMPLE_RATE):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.samples = np.memmap(path, dtype="<i2", mode="r")
+
+    def __len__(self) -> int:
+        return int(len(self.samples) * 1000 // self.sample_rate)
+
+    def __getitem__(self, item: slice) -> PCMChunk:
+        if not isinstance(item, slice) or item.step is not None:
+            raise TypeError("PCMStore only supports [start_ms:end_ms] slicing")
+        start = 0 if item.start is None else item.start * self.sample_rate // 1000
+        stop = len(self.samples) if item.stop is None else item.stop * self.sample_rate // 1000
+        return PCMChunk(self.samples[start:stop], self.sample_rate)
+
+    def close(self) -> None:
+        """
+        Drops the store's reference to the memory mapping. The mapping is released once no
+        `PCMChunk` view of it is alive, so chunks handed out earlier stay readable.
+        """
+        self.samples = np.empty(0, dtype="<i2")
+
+def iter_pcm_chunks(blocks, chunk_length: int = 600, overlap: int = 10, sample_rate: int = SAMPLE_RATE):
+    """
+    Cuts overlapping chunks out of a stream of raw PCM blocks as soon as enough samples arrive.
+
+    Chunk boundaries are the same as slicing the whole recording with `PCMStore`:
+    chunk i covers [i * (chunk_length - overlap), i * (chunk_length - overlap) + chunk_length)
+    seconds, except that a trailing chunk holding only audio already covered by the previous
+    chunk's overlap is skipped. Only the samples of the chunk being filled are buffered.
+
+    Args:
+        blocks (iterable): Raw s16le mono byte blocks, e.g. from `stream_audio_ffmpeg`.
+        chunk_length (int): Length of each chunk in seconds.
+        overlap (int): Overlap between chunks in seconds.
+        sample_rate (int): Sample rate of the stream in Hz.
+
+    Yields:
+        tuple: (PCMChunk, start_ms) for each chunk, in order.
+    """
+    chunk_bytes = chunk_length * sample_rate * 2
+    step_bytes = (chunk_length - overlap) * sample_rate * 2
+    step_ms = (chunk_length - overlap) * 1000
+
+    buffer = bytearray()
+    pending = b""
+    index = 0
+    for block in blocks:
+        buffer += pending + block if pending else block
+        pending = b""
+        while len(buffer) >= chunk_bytes:
+            samples = np.frombuffer(bytes(buffer[:chunk_bytes]), dtype="<i2")
+            yield PCMChunk(samples, sample_rate), index * step_ms
+            del buffer[:step_bytes]
+            index += 1
+        # Keep the buffer sample-aligned
+        if len(buffer) % 2:
+            pending = bytes(buffer[-1:])
+            del buffer[-1:]
+
+    # Flush the tail; chunks after the first only carry new audio past the overlap
+    while buffer and (index == 0 or len(buffer) > chunk_bytes - step_bytes):
+        samples = np.frombuffer(bytes(buffer[:chunk_bytes]), dtype="<i2")
+        yield PCMChunk(samples, sample_rate), index * step_ms
+        del buffer[:step_bytes]
+        index += 1
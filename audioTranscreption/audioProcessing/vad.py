@@ -0,0 +1,256 @@
+import bisect
+import warnings
+import numpy as np
+from .pcm_store import PCMChunk, SAMPLE_RATE
+
+def frame_energies(samples: np.ndarray, sample_rate: int = SAMPLE_RATE, frame_ms: int = 30, block_sec: int = 60) -> np.ndarray:
+    """
+    Computes the RMS level in dBFS of consecutive non-overlapping frames.
+
+    The audio is processed in blocks of `block_sec`, so a memory-mapped recording is never
+    converted to floating point as a whole.
+
+    Args:
+        samples (np.ndarray): int16 mono samples.
+        sample_rate (int): Sample rate in Hz.
+        frame_ms (int): Frame length in milliseconds.
+        block_sec (int): Amount of audio converted at once, in seconds.
+
+    Returns:
+        np.ndarray: One dBFS value per full frame.
+    """
+    frame_len = sample_rate * frame_ms // 1000
+    n_frames = len(samples) // frame_len
+    block_frames = max(1, block_sec * 1000 // frame_ms)
+
+    energies = np.empty(n_frames, dtype=np.float64)
+    for first in range(0, n_frames, block_frames):
+        last = min(first + block_frames, n_frames)
+        block = np.asarray(samples[first * frame_len:last * frame_len], dtype=np.float64) / 32768.0
+        power = np.mean(block.reshape(-1, frame_len) ** 2, axis=1)
+        energies[first:last] = 10 * np.log10(power + 1e-10)
+    return energies
+
+def detect_speech(
+    energies: np.ndarray,
+    frame_ms: int = 30,
+    margin_db: float = 12.0,
+    floor_db: float = -50.0,
+    min_silence_sec: float = 0.3,
+    pad_sec: float = 0.2
+) -> list[tuple[float, float]]:
+    """
+    Energy-based voice activity detection over the output of `frame_energies`.
+
+    A frame counts as speech when it is `margin_db` above the estimated noise floor (the 10th
+    percentile level) and above `floor_db`. Pauses shorter than `min_silence_sec` are bridged
+    and every region is padded by `pad_sec` so word onsets and tails are not clipped.
+
+    Args:
+        energies (np.ndarray): Frame levels in dBFS.
+        frame_ms (int): Frame length used for `energies`, in milliseconds.
+        margin_db (float): Required level above the noise floor.
+        floor_db (float): Absolute level below which a frame is always silence.
+        min_silence_sec (float): Shortest pause that separates two speech regions.
+        pad_sec (float): Padding added on both sides of each region.
+
+    Returns:
+        list[tuple[float, float]]: Sorted, non-overlapping (start, end) speech regions in seconds.
+    """
+    if not len(energies):
+        return []
+
+    frame_sec = frame_ms / 1000
+    threshold = max(floor_db, float(np.percentile(energies, 10)) + margin_db)
+    active = energies > threshold
+
+    # Rising/falling edges of the activity mask give the raw regions
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], active.astype(np.int8), [0]))))
+    total = len(energies) * frame_sec
+
+    regions = []
+    for start, end in zip(edges[::2] * frame_sec, edges[1::2] * frame_sec):
+        start, end = max(0.0, start - pad_sec), min(total, end + pad_sec)
+        if regions and start - regions[-1][1] < min_silence_sec:
+            regions[-1] = (regions[-1][0], end)
+        else:
+            regions.append((start, end))
+    return regions
+
+class OffsetMap:
+    """
+    Maps times in an uploaded chunk, from which silences were cut, back to the original recording.
+
+    Args:
+        spans (list[tuple[float, float]]): Original (start, end) times in seconds of the audio
+            spans that were concatenated into the chunk, in order.
+    """
+
+    def __init__(self, spans: list[tuple[float, float]]):
+        self.spans = spans
+        self.chunk_starts = []
+        position = 0.0
+        for start, end in spans:
+            self.chunk_starts.append(position)
+            position += end - start
+        self.duration = position
+
+    def to_original(self, t: float) -> float:
+        """
+        Converts a chunk-relative time in seconds to the original timeline.
+        """
+        if not self.spans:
+            return t
+        i = max(0, bisect.bisect_right(self.chunk_starts, t) - 1)
+        start, end = self.spans[i]
+        return min(start + (t - self.chunk_starts[i]), end)
+
+def plan_chunks(
+    regions: list[tuple[float, float]],
+    max_chunk_sec: float = 600,
+    drop_silence_sec: float = 2.0,
+    overlap_sec: float = 10
+) -> list[list[tuple[float, float]]]:
+    """
+    Groups speech regions into upload chunks whose boundaries fall in silences.
+
+    Pauses shorter than `drop_silence_sec` are uploaded with the speech around them; longer
+    ones are cut out. A chunk is closed at the last pause before its uploaded duration would
+    exceed `max_chunk_sec`; a pause that is uploaded is split at its middle. Only a single
+    region longer than `max_chunk_sec` has no pause to cut at: it is split into parts of
+    `max_chunk_sec` overlapping by `overlap_sec`, which `merge_transcripts` reconciles.
+
+    Args:
+        regions (list[tuple[float, float]]): Speech regions from `detect_speech`.
+        max_chunk_sec (float): Maximum uploaded duration per chunk, in seconds.
+        drop_silence_sec (float): Shortest pause that is removed from the upload.
+        overlap_sec (float): Overlap between the parts of a region longer than a chunk.
+
+    Returns:
+        list[list[tuple[float, float]]]: For each chunk, the original (start, end) spans to
+        upload. Consecutive chunks only overlap in time where a region was split.
+    """
+    # One piece per region, extended to the middle of the uploaded pauses around it;
+    # `joined` marks a piece that continues the previous one without a cut-out silence
+    pieces = []
+    for k, (start, end) in enumerate(regions):
+        if pieces and start - regions[k - 1][1] < drop_silence_sec:
+            middle = (regions[k - 1][1] + start) / 2
+            pieces[-1][1] = middle
+            pieces.append([middle, end, True])
+        else:
+            pieces.append([start, end, False])
+
+    step = max_chunk_sec - min(overlap_sec, max_chunk_sec / 2)
+    chunks = []
+    current, current_len = [], 0.0
+    for start, end, joined in pieces:
+        if current and current_len + (end - start) > max_chunk_sec:
+            chunks.append(current)
+            current, current_len = [], 0.0
+
+        if end - start > max_chunk_sec:
+            # Uninterrupted speech longer than a chunk: overlapping parts, the last one stays open
+            while end - start > max_chunk_sec:
+                chunks.append([(start, start + max_chunk_sec)])
+                start += step
+            current, current_len = [(start, end)], end - start
+            continue
+
+        if joined and current and current[-1][1] == start:
+            current[-1] = (current[-1][0], end)
+        else:
+            current.append((start, end))
+        current_len += end - start
+    if current:
+        chunks.append(current)
+    return chunks
+
+def cuts_in_speech(
+    chunks: list[list[tuple[float, float]]],
+    regions: list[tuple[float, float]]
+) -> list[float]:
+    """
+    Chunk boundaries that fall inside a speech region although the chunks do not overlap
+    there. Always empty for a plan made by `plan_chunks` from the same regions.
+
+    Returns:
+        list[float]: Offending boundary times in seconds.
+    """
+    starts = [start for start, _ in regions]
+    cuts = []
+    for previous, following in zip(chunks, chunks[1:]):
+        end, start = previous[-1][1], following[0][0]
+        if start < end:
+            continue
+        for t in (end, start):
+            k = bisect.bisect_right(starts, t) - 1
+            if k >= 0 and regions[k][0] < t < regions[k][1]:
+                cuts.append(t)
+                break
+    return cuts
+
+class SpanChunk(PCMChunk):
+    """
+    Upload chunk made of several spans of a recording, with the silences between them cut out.
+
+    Only the sample bounds are kept: the spans are copied out of the memory-mapped recording
+    when `samples` is read, i.e. when the chunk is hashed or encoded for upload.
+
+    Args:
+        source (np.ndarray): int16 mono samples of the whole recording.
+        bounds (list[tuple[int, int]]): (start, end) sample indices of the spans, in order.
+        sample_rate (int): Sample rate in Hz.
+    """
+
+    def __init__(self, source: np.ndarray, bounds: list[tuple[int, int]], sample_rate: int = SAMPLE_RATE):
+        self.source = source
+        self.bounds = bounds
+        self.sample_rate = sample_rate
+
+    @property
+    def samples(self) -> np.ndarray:
+        return np.concatenate([self.source[start:end] for start, end in self.bounds])
+
+    def __len__(self) -> int:
+        return int(sum(end - start for start, end in self.bounds) * 1000 // self.sample_rate)
+
+def build_vad_chunks(
+    samples: np.ndarray,
+    sample_rate: int = SAMPLE_RATE,
+    max_chunk_sec: float = 600,
+    drop_silence_sec: float = 2.0,
+    frame_ms: int = 30,
+    overlap_sec: float = 10
+) -> list[tuple[SpanChunk, int, OffsetMap]]:
+    """
+    Runs VAD over a recording and assembles the speech-only upload chunks.
+
+    Args:
+        samples (np.ndarray): int16 mono samples, typically `PCMStore.samples`.
+        sample_rate (int): Sample rate in Hz.
+        max_chunk_sec (float): Maximum uploaded duration per chunk, in seconds.
+        drop_silence_sec (float): Shortest pause that is removed from the upload.
+        frame_ms (int): VAD frame length in milliseconds.
+        overlap_sec (float): Overlap between the parts of a speech region longer than a chunk.
+
+    Returns:
+        list[tuple[SpanChunk, int, OffsetMap]]: For each chunk, its audio, the original start time
+        in milliseconds of its first span, and the map back to original times. Empty when no
+        speech was detected.
+    """
+    energies = frame_energies(samples, sample_rate, frame_ms)
+    regions = detect_speech(energies, frame_ms)
+
+    plan = plan_chunks(regions, max_chunk_sec, drop_silence_sec, overlap_sec)
+    misplaced = cuts_in_speech(plan, regions)
+    if misplaced:
+        warnings.warn(f"{len(misplaced)} VAD chunk boundaries fall inside speech, first at {misplaced[0]:.1f}s")
+
+    chunks = []
+    for spans in plan:
+        bounds = [(int(start * sample_rate), int(end * sample_rate)) for start, end in spans]
+        # Snap the map to the sample boundaries actually cut
+        spans = [(start / sample_rate, end / sample_rate) for start, end in bounds]
+        chunks.append((SpanChunk(samples, bounds, sample_rate), int(spans[0][0] * 1000), OffsetMap(spans)))
+    return chunks
@@ -1,85 +1,168 @@
-from .audioProcessing.convert_process_audio import convert_audio_ffmpeg 
+from .audioProcessing.convert_process_audio import convert_audio_ffmpeg, stream_audio_ffmpeg
 from .transcribers.transcribe_single_chunk import transcribe_single_chunk
+from .transcribers.providers import get_provider
 from .audioProcessing.merge_transcripts import merge_transcripts
+from .audioProcessing.pcm_store import PCMStore, iter_pcm_chunks
+from .audioProcessing.vad import build_vad_chunks
 from .utils.save_results import save_results
+from .utils.rate_limiter import RateLimiter
+from .utils.transcription_cache import TranscriptionCache
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from pydub import AudioSegment
-from groq import Groq
-from fireworks.client.audio import AudioInference
-import os
+import warnings
 
 
-def transcribe_audio_in_chunks(video_path: Path, chunk_length: int = 600, overlap: int = 10,provider:str='fireworks',model="whisper-v3") -> dict:
+def transcribe_audio_in_chunks(video_path: Path, chunk_length: int = 600, overlap: int = 10,provider:str='fireworks',model="whisper-v3", max_workers: int = 4, rate_limits: dict = None, streaming: bool = False, vad: bool = False, drop_silence: float = 2.0, cache=True, provider_options: dict = None, fallback_provider: str = None, pcm_path: str = None, language: str = "ar") -> dict:
     """
     Transcribe audio in chunks with overlap with Whisper via Groq API.
+
+    Chunks are transcribed concurrently by up to `max_workers` threads and merged in their
+    original order. A shared token-bucket limiter keeps all workers within the provider's
+    requests-per-minute and audio-seconds limits.
     
     Args:
         video_path: Path to audio file
         chunk_length: Length of each chunk in seconds
         overlap: Overlap between chunks in seconds
+        max_workers: Maximum number of chunks in flight at once (1 transcribes serially)
+        rate_limits: Overrides for the provider defaults in `PROVIDER_LIMITS`,
+            e.g. {"requests_per_minute": 20, "audio_seconds_per_hour": 7200}
+        streaming: Read PCM from an ffmpeg pipe and dispatch each chunk as soon as its samples
+            arrive, so the first transcripts come back after one chunk instead of after the
+            full conversion
+        vad: Place chunk boundaries in silences found by voice activity detection instead of
+            every `chunk_length - overlap` seconds, and cut pauses longer than `drop_silence`
+            seconds out of the upload. Chunks only overlap (by `overlap`) where a single
+            uninterrupted speech region is longer than `chunk_length`, and timestamps are
+            mapped back to the original recording when merging. If no speech is
+            detected (silence, a constant tone), a warning is issued and fixed-length chunks are used
+        drop_silence: Shortest pause, in seconds, removed from the upload when `vad` is set
+        cache: Chunk-level response cache. True uses the default `TranscriptionCache` under
+            tmp/cache/transcriptions, a `TranscriptionCache` instance is used as is, and
+            False/None always uploads every chunk
+        provider_options: Constructor arguments of the provider, e.g.
+            {"timeout": (10, 300), "pool_size": 16, "api_key": "..."}
+        fallback_provider: Provider used for a chunk when `provider` is down (open circuit
+            breaker) or keeps failing after retries, with its default model and limits
+        pcm_path: Keep the converted audio at this path: an existing file is used instead of
+            running ffmpeg again, otherwise the conversion is written there and not deleted.
+            Ignored when `streaming`
+        language: Spoken language passed to the provider, e.g. "ar" or "en"
     
     Returns:
         dict: Containing transcription results
     
     Raises:
-        ValueError: If Groq API key is not set
+        ValueError: If `provider` is not registered, or if `streaming` and `vad` are both set
         RuntimeError: If audio file fails to load
     """
     
-    if provider == 'groq':
-          api_key = os.getenv("GROQ_API_KEY")
-          client = Groq(api_key=api_key, max_retries=0)
+    # Shared, long-lived provider: its pooled connections survive across calls
+    client = get_provider(provider, **(provider_options or {}))
+
+    if streaming and vad:
+        raise ValueError("VAD chunking needs the full recording and cannot be combined with streaming")
 
-    elif provider == 'fireworks':
-          api_key = os.getenv("FIREWORKS_API_KEY")
-          client = AudioInference(model=model, api_key=api_key)
-    
     #print(f"\nStarting transcription of: {video_path}")
 
 
     processed_path = None
+    audio = None
     try:
-        processed_path = convert_audio_ffmpeg(video_path)
-        try:
-            audio = AudioSegment.from_file(processed_path, format="flac")
-        except Exception as e:
-            raise RuntimeError(f"Failed to load audio: {str(e)}")
-        
-        duration = len(audio)
-        #print(f"Audio duration: {duration/1000:.2f}s")
-        
-        chunk_ms = chunk_length * 1000
-        overlap_ms = overlap * 1000
-        total_chunks = (duration // (chunk_ms - overlap_ms)) + 1
-        #print(f"Processing {total_chunks} chunks...")
-        
-        results = []
+        rate_limiter = RateLimiter.for_provider(provider, **(rate_limits or {}))
+        if cache is True:
+            cache = TranscriptionCache()
+        cache = cache or None
+        fallback = None
+        if fallback_provider:
+            fallback = {
+                "provider": fallback_provider,
+                "client": get_provider(fallback_provider),
+                "rate_limiter": RateLimiter.for_provider(fallback_provider)
+            }
+        futures = []
+        offset_maps = None
         total_transcription_time = 0
 
-        for i in range(total_chunks):
-            start = i * (chunk_ms - overlap_ms)
-            end = min(start + chunk_ms, duration)
-                
-            #print(f"\nProcessing chunk {i+1}/{total_chunks}")
-            #print(f"Time range: {start/1000:.1f}s - {end/1000:.1f}s")
-                
-            chunk = audio[start:end]
-            
-            result, chunk_time = transcribe_single_chunk(client, chunk, i+1, total_chunks,provider=provider,model=model)
-            total_transcription_time += chunk_time
-            results.append((result, start))
-            
-        final_result = merge_transcripts(results)
+        if streaming:
+            # Chunks are cut from ffmpeg's output pipe and dispatched while conversion is still running
+            chunks = iter_pcm_chunks(stream_audio_ffmpeg(video_path), chunk_length, overlap)
+            total_chunks = None
+        else:
+            # Raw PCM is memory-mapped; each chunk is a zero-copy view encoded in memory for upload
+            if pcm_path and Path(pcm_path).exists():
+                processed_path = pcm_path
+            else:
+                processed_path = convert_audio_ffmpeg(video_path, output_format="pcm", output_path=pcm_path)
+            try:
+                audio = PCMStore(processed_path)
+            except Exception as e:
+                raise RuntimeError(f"Failed to load audio: {str(e)}")
+
+            duration = len(audio)
+            #print(f"Audio duration: {duration/1000:.2f}s")
+
+        vad_chunks = None
+        if vad:
+            # Boundaries fall in silences and long pauses are never uploaded
+            vad_chunks = build_vad_chunks(audio.samples, audio.sample_rate, chunk_length, drop_silence, overlap_sec=overlap)
+            if not vad_chunks:
+                warnings.warn("VAD detected no speech; falling back to fixed-length chunks")
+
+        if vad_chunks:
+            total_chunks = len(vad_chunks)
+            offset_maps = [offset_map for _, _, offset_map in vad_chunks]
+            chunks = ((chunk, start) for chunk, start, _ in vad_chunks)
+            #print(f"Uploading {sum(len(c) for c, _, _ in vad_chunks)/1000:.2f}s of speech in {total_chunks} chunks...")
+        elif not streaming:
+            chunk_ms = chunk_length * 1000
+            overlap_ms = overlap * 1000
+            total_chunks = (duration // (chunk_ms - overlap_ms)) + 1
+            #print(f"Processing {total_chunks} chunks...")
+
+            chunks = (
+                (audio[start:min(start + chunk_ms, duration)], start)
+                for start in (i * (chunk_ms - overlap_ms) for i in range(total_chunks))
+            )
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for i, (chunk, start) in enumerate(chunks):
+                #print(f"\nProcessing chunk {i+1}/{total_chunks}")
+                #print(f"Time range: {start/1000:.1f}s - {(start + len(chunk))/1000:.1f}s")
+
+                future = executor.submit(
+                    transcribe_single_chunk, client, chunk, i+1, total_chunks,
+                    provider=provider, model=model, language=language, rate_limiter=rate_limiter, cache=cache, fallback=fallback
+                )
+                futures.append((future, start))
+
+            # Collect in submission order so merge_transcripts sees chunks in sequence
+            results = []
+            for future, start in futures:
+                result, chunk_time = future.result()
+                total_transcription_time += chunk_time
+                results.append((result, start))
+
+        final_result = merge_transcripts(results, offset_maps)
         json_path = save_results(final_result, video_path)
         text_path = json_path[:-10] + ".txt"
         #print(f"\nTotal Groq API transcription time: {total_transcription_time:.2f}s")
+        #if cache is not None:
+        #    print(f"Transcription cache: {cache.stats()}")
         
         #return final_result
         return json_path, text_path
     
     finally:
-        if processed_path:
-            Path(processed_path).unlink(missing_ok=True)
+        if audio is not None:
+            audio.close()
+        if processed_path and not pcm_path:
+            try:
+                Path(processed_path).unlink(missing_ok=True)
+            except PermissionError:
+                # Windows refuses to delete a file that a live chunk view still maps;
+                # the next conversion of the same input overwrites it
+                pass
 
 
 if __name__ == "__main__":
@@ -0,0 +1,215 @@
+import abc
+import asyncio
+import inspect
+import json
+import os
+import threading
+import time
+import weakref
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from groq import Groq, AsyncGroq
+from fireworks.client.audio import AudioInference
+from .transcribe_with_groq import transcribe_with_groq
+from .transcribe_with_fireworks import transcribe_with_fireworks, _form_data, _default_endpoint
+
+# (connect, read) timeouts in seconds; a 10-minute chunk can take a while to transcribe
+DEFAULT_TIMEOUT = (10.0, 300.0)
+# Keep-alive connections kept per provider, enough for the default chunk workers
+DEFAULT_POOL_SIZE = 16
+
+PROVIDERS = {}
+
+def register_provider(cls):
+    """
+    Class decorator adding a `TranscriptionProvider` subclass to `PROVIDERS` under `cls.name`.
+
+    Raises:
+        TypeError: If the class leaves abstract methods such as `transcribe` unimplemented.
+    """
+    if inspect.isabstract(cls):
+        missing = ", ".join(sorted(cls.__abstractmethods__))
+        raise TypeError(f"Provider {cls.__name__} does not implement: {missing}")
+    PROVIDERS[cls.name] = cls
+    return cls
+
+class TranscriptionProvider(abc.ABC):
+    """
+    Long-lived transcription backend holding pooled connections to one provider.
+
+    A new provider only needs a subclass decorated with `@register_provider` that sets `name`
+    and implements `transcribe` (and, for native async I/O, `atranscribe`).
+
+    Args:
+        api_key (str, optional): API key; read from the provider's environment variable if None.
+        timeout (tuple): (connect, read) timeouts in seconds.
+        pool_size (int): Maximum number of keep-alive connections.
+        client: Already initialized provider client to use instead of creating one.
+    """
+
+    name = None
+    api_key_env = None
+    default_model = None
+
+    def __init__(self, api_key: str = None, timeout: tuple = DEFAULT_TIMEOUT, pool_size: int = DEFAULT_POOL_SIZE, client=None):
+        self.api_key = api_key or (os.getenv(self.api_key_env) if self.api_key_env else None)
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.client = client
+        # Async clients are bound to the event loop they were first used in
+        self._async_clients = weakref.WeakKeyDictionary()
+
+    @abc.abstractmethod
+    def transcribe(self, audio_file, model: str, language: str, timestamp_type: str) -> tuple:
+        """
+        Transcribes one in-memory audio file.
+
+        Returns:
+            tuple: (provider response, elapsed seconds)
+        """
+
+    def _make_async_client(self):
+        return None
+
+    def _async_client(self):
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = self._async_clients[loop] = self._make_async_client()
+        return client
+
+    async def atranscribe(self, audio_file, model: str, language: str, timestamp_type: str) -> tuple:
+        """
+        Async counterpart of `transcribe`. Runs `transcribe` in a worker thread unless the
+        provider overrides it with native async I/O.
+        """
+        return await asyncio.to_thread(self.transcribe, audio_file, model, language, timestamp_type)
+
+    def _httpx_timeout(self) -> httpx.Timeout:
+        connect, read = self.timeout
+        return httpx.Timeout(read, connect=connect)
+
+    def _httpx_limits(self) -> httpx.Limits:
+        return httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size)
+
+@register_provider
+class GroqProvider(TranscriptionProvider):
+    """
+    Groq Whisper through one shared `Groq` client (httpx keeps its connections alive).
+
+    SDK retries are disabled: `transcribe_single_chunk` owns the retry policy (`utils.retry`).
+    """
+
+    name = "groq"
+    api_key_env = "GROQ_API_KEY"
+    default_model = "whisper-large-v3"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.client is None:
+            self.client = Groq(
+                api_key=self.api_key,
+                max_retries=0,
+                timeout=self._httpx_timeout(),
+                http_client=httpx.Client(limits=self._httpx_limits(), timeout=self._httpx_timeout())
+            )
+
+    def transcribe(self, audio_file, model, language, timestamp_type):
+        return transcribe_with_groq(self.client, audio_file, model, language, timestamp_type)
+
+    def _make_async_client(self):
+        return AsyncGroq(
+            api_key=self.api_key,
+            max_retries=0,
+            timeout=self._httpx_timeout(),
+            http_client=httpx.AsyncClient(limits=self._httpx_limits(), timeout=self._httpx_timeout())
+        )
+
+    async def atranscribe(self, audio_file, model, language, timestamp_type):
+        start = time.time()
+        result = await self._async_client().audio.transcriptions.create(
+            file=("chunk.flac", audio_file, "audio/flac"),
+            model=model,
+            language=language,
+            response_format="verbose_json",
+            timestamp_granularities=[timestamp_type]
+        )
+        return result, time.time() - start
+
+@register_provider
+class FireworksProvider(TranscriptionProvider):
+    """
+    Fireworks Whisper over a keep-alive `requests.Session` (and an `httpx.AsyncClient` for async).
+
+    Args:
+        endpoint (str, optional): Transcription endpoint URL; FIREWORKS_AUDIO_ENDPOINT or the
+            production URL if None.
+    """
+
+    name = "fireworks"
+    api_key_env = "FIREWORKS_API_KEY"
+    default_model = "whisper-v3"
+
+    def __init__(self, *args, endpoint: str = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.endpoint = endpoint or _default_endpoint()
+        if self.client is None:
+            self.client = AudioInference(model="whisper-v3", api_key=self.api_key)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def transcribe(self, audio_file, model, language, timestamp_type):
+        return transcribe_with_fireworks(
+            self.client, audio_file, model, language, timestamp_type,
+            endpoint=self.endpoint, session=self.session, timeout=self.timeout
+        )
+
+    def _make_async_client(self):
+        return httpx.AsyncClient(limits=self._httpx_limits(), timeout=self._httpx_timeout())
+
+    async def atranscribe(self, audio_file, model, language, timestamp_type, vad_model="silero", temperature=0.0):
+        start = time.time()
+        resp = await self._async_client().post(
+            self.endpoint,
+            headers={"Authorization": f"Bearer {self.client.api_key}"},
+            files={"file": (os.path.basename(getattr(audio_file, "name", "chunk.flac")), audio_file)},
+            data=_form_data(model, language, timestamp_type, vad_model, temperature)
+        )
+        try:
+            resp.raise_for_status()
+        except httpx.HTTPStatusError as e:
+            print(f"[✘] Error {resp.status_code}: {resp.text}")
+            raise RuntimeError("Transcription failed.") from e
+        return resp.json(), time.time() - start
+
+_instances = {}
+_instances_lock = threading.Lock()
+
+def get_provider(name: str, **options) -> TranscriptionProvider:
+    """
+    Returns the shared provider instance for `name`, creating it on first use.
+
+    Instances are cached per name and options, so every call to `transcribe_audio_in_chunks`
+    reuses the same pooled connections instead of paying new TLS handshakes.
+
+    Args:
+        name (str): Registered provider name, e.g. `"groq"` or `"fireworks"`.
+        **options: Constructor arguments such as `api_key`, `timeout` or `pool_size`.
+
+    Returns:
+        TranscriptionProvider: The long-lived provider.
+
+    Raises:
+        ValueError: If no provider is registered under `name`.
+    """
+    if name not in PROVIDERS:
+        raise ValueError(f"Unsupported provider: {name}")
+    # Serialized so unhashable option values (headers, routes) still make a valid key
+    key = (name, json.dumps(options, sort_keys=True, default=str))
+    with _instances_lock:
+        if key not in _instances:
+            _instances[key] = PROVIDERS[name](**options)
+        return _instances[key]
@@ -1,8 +1,81 @@
-from .transcribe_with_fireworks import transcribe_with_fireworks
-from .transcribe_with_groq import transcribe_with_groq
-import os
-import tempfile, time
-from requests.exceptions import HTTPError
+from .providers import PROVIDERS, TranscriptionProvider, get_provider
+from utils.retry import DEFAULT_POLICY, CircuitOpenError, classify_error, get_breaker
+import asyncio
+import time
+from io import BytesIO
+import numpy as np
+
+def _encode_chunk(chunk) -> BytesIO:
+    """
+    Encodes a chunk to FLAC in memory. Accepts a `PCMChunk` or a pydub `AudioSegment`.
+    """
+    if hasattr(chunk, "encode"):
+        return chunk.encode("flac")
+    buffer = BytesIO()
+    chunk.export(buffer, format="flac")
+    buffer.seek(0)
+    buffer.name = "chunk.flac"
+    return buffer
+
+def _chunk_pcm(chunk) -> tuple:
+    """
+    Returns the raw PCM buffer and sample rate of a `PCMChunk` or a pydub `AudioSegment`.
+    """
+    if hasattr(chunk, "samples"):
+        return np.ascontiguousarray(chunk.samples), chunk.sample_rate
+    return chunk.raw_data, chunk.frame_rate
+
+def _resolve_provider(client, provider: str) -> TranscriptionProvider:
+    """
+    Returns the `TranscriptionProvider` to call: `client` itself, the shared instance for
+    `provider` when `client` is None, or a provider wrapping a raw SDK client.
+    """
+    if isinstance(client, TranscriptionProvider):
+        return client
+    if client is None:
+        return get_provider(provider)
+    if provider not in PROVIDERS:
+        raise ValueError(f"Unsupported provider: {provider}")
+    return PROVIDERS[provider](client=client)
+
+def _cache_key(cache, chunk, provider, model, language, timestamp_type):
+    if cache is None:
+        return None
+    pcm, sample_rate = _chunk_pcm(chunk)
+    return cache.make_key(pcm, sample_rate, provider, model, language, timestamp_type)
+
+def _routes(client, provider, model, rate_limiter, fallback) -> list:
+    """
+    (client, provider, model, rate_limiter) to try in order: the primary provider, then the
+    optional fallback.
+    """
+    routes = [(client, provider, model, rate_limiter)]
+    if fallback:
+        name = fallback["provider"]
+        if name not in PROVIDERS:
+            raise ValueError(f"Unsupported provider: {name}")
+        routes.append((
+            fallback.get("client"), name,
+            fallback.get("model") or PROVIDERS[name].default_model,
+            fallback.get("rate_limiter")
+        ))
+    return routes
+
+def _can_fall_over(error: Exception) -> bool:
+    # The provider is down or kept failing; a bad request would fail on the other one too
+    return isinstance(error, CircuitOpenError) or classify_error(error).retryable
+
+def _limiter_wait(rate_limiter):
+    """
+    Wait hook of the retry policy: a rate-limit wait pauses the shared limiter, so every worker
+    holds back; other waits only sleep the current worker.
+    """
+    def on_wait(seconds, info):
+        if rate_limiter is not None and info.rate_limited:
+            rate_limiter.pause(seconds)
+        else:
+            time.sleep(seconds)
+    return on_wait
 
 def transcribe_single_chunk(
     client,
@@ -12,27 +85,41 @@ def transcribe_single_chunk(
     provider: str = "groq",
     model: str = "whisper-large-v3",
     language: str = "ar",
-    timestamp_type: str = "segment"
+    timestamp_type: str = "segment",
+    rate_limiter=None,
+    cache=None,
+    retry_policy=None,
+    fallback: dict = None
 ):
     """
     Transcribes a single audio chunk using the specified provider API.
 
-    This function exports the provided AudioSegment chunk to a temporary
-    FLAC file, sends it to either Groq or Fireworks Whisper transcription
-    APIs, handles retries on transient errors (e.g., rate limits), and 
-    returns the JSON result along with cumulative API processing time.
+    This function encodes the provided chunk to FLAC in an in-memory buffer,
+    sends it to the provider's Whisper transcription API, retries transient
+    errors under the shared retry policy, and returns the JSON result along
+    with cumulative API processing time.
 
     Args:
-        client: Initialized client object for the chosen provider.
-            - For Groq: an instance of `Groq`.
-            - For Fireworks: an instance of `AudioInference` or similar.
-        chunk (AudioSegment): The audio segment to be transcribed.
+        client: The backend to call.
+            - A `TranscriptionProvider` (e.g. from `get_provider`), reusing its pooled connections.
+            - None, to use the shared provider registered under `provider`.
+            - A raw SDK client (`Groq`, `AudioInference`), wrapped in the provider class.
+        chunk (PCMChunk | AudioSegment): The audio segment to be transcribed.
         chunk_num (int): 1-based index of this chunk in the full sequence.
         total_chunks (int): Total number of chunks being processed.
-        provider (str): Either `"groq"` or `"fireworks"` to select backend.
+        provider (str): Registered provider name, e.g. `"groq"` or `"fireworks"`.
         model (str): Name of the Whisper model variant (e.g. `"whisper-large-v3"`).
         language (str): Language code for transcription, e.g. `"ar"`, `"en"`.
         timestamp_type (str): Timestamp granularity for output; typically `"segment"` or `"word"`.
+        rate_limiter (RateLimiter, optional): Limiter shared by concurrent chunk workers. Each attempt
+            waits for it before calling the API, and a rate-limit error pauses it for everyone.
+        cache (TranscriptionCache, optional): Chunk-level response cache. On a hit the chunk is
+            neither encoded nor uploaded; successful responses are stored in it.
+        retry_policy (RetryPolicy, optional): Retry policy; `utils.retry.DEFAULT_POLICY` if None.
+        fallback (dict, optional): Provider to fall over to when the primary one is down (open
+            circuit breaker) or still failing after all retries, with keys `"provider"` and
+            optionally `"client"`, `"model"` (the provider's `default_model` if omitted) and
+            `"rate_limiter"`.
 
     Returns:
         tuple:
@@ -40,47 +127,126 @@ def transcribe_single_chunk(
             total_time (float): Accumulated API call time (in seconds) for this chunk.
 
     Raises:
-        ValueError: If `provider` is not one of `"groq"` or `"fireworks"`.
-        RuntimeError: If transcription fails after 3 retry attempts.
-        FileNotFoundError: If the exported temporary file cannot be found.
-        Exception: Propagates other exceptions (e.g., network or parsing issues).
+        ValueError: If no provider is registered under `provider` or the fallback provider.
+        CircuitOpenError: If the provider is down and there is no fallback.
+        Exception: The provider error, when it is not retryable or retries are exhausted.
 
     Notes:
-        - The temporary FLAC file is deleted after transcription completes or fails.
-        - Retries are performed up to 3 times with delays (5s or 60s on rate limits).
-        - Designed for use in pipeline loops over multiple audio chunks.
+        - No temporary files are written; the encoded chunk only lives in memory.
+        - Waits follow `Retry-After`/rate-limit headers when present, and jittered exponential
+          backoff otherwise. Bad requests and authentication errors are never retried.
+        - Each provider has a process-wide circuit breaker (`utils.retry.get_breaker`).
+        - A cache hit returns the stored response with a total time of 0.
     """
     total_time = 0.0
-
-    # Export to temporary FLAC
-    with tempfile.NamedTemporaryFile(suffix=".flac", delete=False) as tf:
-        chunk.export(tf.name, format="flac")
-        temp_path = tf.name
+    policy = retry_policy or DEFAULT_POLICY
+    routes = _routes(client, provider, model, rate_limiter, fallback)
+    audio_file = None
 
     try:
-        for attempt in range(3):
+        for route, (client, provider, model, rate_limiter) in enumerate(routes):
+            backend = _resolve_provider(client, provider)
+
+            cache_key = _cache_key(cache, chunk, provider, model, language, timestamp_type)
+            if cache_key is not None:
+                cached = cache.get(cache_key)
+                if cached is not None:
+                    #print(f"[{provider.upper()}] Chunk {chunk_num}/{total_chunks} → cached")
+                    return cached, total_time
+
+            if audio_file is None:
+                audio_file = _encode_chunk(chunk)
+
+            def before_attempt():
+                if rate_limiter is not None:
+                    rate_limiter.acquire(audio_seconds=len(chunk) / 1000)
+                audio_file.seek(0)
+
             try:
-                if provider == "groq":
-                    result, elapsed = transcribe_with_groq(client, temp_path, model, language, timestamp_type)
-                elif provider == "fireworks":
-                    result, elapsed = transcribe_with_fireworks(client, temp_path, model, language, timestamp_type)
-                else:
-                    raise ValueError(f"Unsupported provider: {provider}")
+                result, elapsed = policy.call(
+                    backend.transcribe, audio_file, model, language, timestamp_type,
+                    breaker=get_breaker(provider), before_attempt=before_attempt, on_wait=_limiter_wait(rate_limiter)
+                )
+            except Exception as e:
+                if route == len(routes) - 1 or not _can_fall_over(e):
+                    raise
+                #print(f"[{provider.upper()}] Chunk {chunk_num}/{total_chunks} failed ({e}), falling over")
+                continue
 
-                total_time += elapsed
-                #print(f"[{provider.upper()}] Chunk {chunk_num}/{total_chunks} → {elapsed:.2f}s")
-                return result, total_time
+            total_time += elapsed
+            if cache_key is not None:
+                cache.put(cache_key, result)
+            #print(f"[{provider.upper()}] Chunk {chunk_num}/{total_chunks} → {elapsed:.2f}s")
+            return result, total_time
 
-            except (HTTPError, Exception) as e:
-                # Handle rate limits or transient failures
-                wait = 60 if "429" in str(e) else 5
-                #print(f"Attempt {attempt+1} failed ({e}), retrying in {wait}s…")
-                time.sleep(wait)
+    finally:
+        if audio_file is not None:
+            audio_file.close()
+
+async def atranscribe_single_chunk(
+    client,
+    chunk,
+    chunk_num: int,
+    total_chunks: int,
+    provider: str = "groq",
+    model: str = "whisper-large-v3",
+    language: str = "ar",
+    timestamp_type: str = "segment",
+    rate_limiter=None,
+    cache=None,
+    retry_policy=None,
+    fallback: dict = None
+):
+    """
+    Async variant of `transcribe_single_chunk` with the same arguments, retries and result.
+
+    The request goes through the provider's native async client. Encoding and rate-limiter
+    waits run in worker threads so the event loop keeps serving other chunks.
+    """
+    total_time = 0.0
+    policy = retry_policy or DEFAULT_POLICY
+    routes = _routes(client, provider, model, rate_limiter, fallback)
+    audio_file = None
+
+    try:
+        for route, (client, provider, model, rate_limiter) in enumerate(routes):
+            backend = _resolve_provider(client, provider)
+
+            cache_key = _cache_key(cache, chunk, provider, model, language, timestamp_type)
+            if cache_key is not None:
+                cached = cache.get(cache_key)
+                if cached is not None:
+                    return cached, total_time
+
+            if audio_file is None:
+                audio_file = await asyncio.to_thread(_encode_chunk, chunk)
+
+            async def before_attempt():
+                if rate_limiter is not None:
+                    await asyncio.to_thread(rate_limiter.acquire, len(chunk) / 1000)
+                audio_file.seek(0)
+
+            async def on_wait(seconds, info):
+                if rate_limiter is not None and info.rate_limited:
+                    rate_limiter.pause(seconds)
+                else:
+                    await asyncio.sleep(seconds)
+
+            try:
+                result, elapsed = await policy.acall(
+                    backend.atranscribe, audio_file, model, language, timestamp_type,
+                    breaker=get_breaker(provider), before_attempt=before_attempt, on_wait=on_wait
+                )
+            except Exception as e:
+                if route == len(routes) - 1 or not _can_fall_over(e):
+                    raise
+                continue
 
-        raise RuntimeError(f"{provider} failed after 3 attempts")
+            total_time += elapsed
+            if cache_key is not None:
+                cache.put(cache_key, result)
+            return result, total_time
 
     finally:
-        try:
-            os.remove(temp_path)
-        except OSError:
-            pass
+        if audio_file is not None:
+            audio_file.close()
@@ -1,29 +1,56 @@
 import time, os, requests
 from pathlib import Path
 from fireworks.client.audio import AudioInference
+from .transcribe_with_groq import _open_audio
+
+FIREWORKS_ENDPOINT = "https://audio-prod.us-virginia-1.direct.fireworks.ai/v1/audio/transcriptions"
+
+def _default_endpoint() -> str:
+    """
+    Transcription endpoint, overridable with FIREWORKS_AUDIO_ENDPOINT (e.g. utils/mock_server.py).
+    Read at call time so a `.env` loaded after import still applies.
+    """
+    return os.getenv("FIREWORKS_AUDIO_ENDPOINT", FIREWORKS_ENDPOINT)
+
+def _form_data(model: str, language: str, timestamp_type: str, vad_model: str, temperature: float) -> dict:
+    """
+    Form fields of a Fireworks transcription request, shared by the sync and async clients.
+    """
+    return {
+        "model": model,
+        "language": language,
+        "vad_model": vad_model,
+        "temperature": str(temperature),
+        "timestamp_granularities": [timestamp_type],
+        "response_format": "verbose_json"
+    }
 
 def transcribe_with_fireworks(
     client: AudioInference,
-    file_path: str,
+    file_path,
     model: str,
     language: str,
     timestamp_type: str = 'segment',
     vad_model: str = 'silero',
     temperature: float = 0.0,
-    endpoint: str = "https://audio-prod.us-virginia-1.direct.fireworks.ai/v1/audio/transcriptions"
+    endpoint: str = None,
+    session: requests.Session = None,
+    timeout: tuple = None
 ) -> tuple[dict, float]:
     """
     Transcribes audio using Fireworks.ai Whisper API with support for segment/word-level timestamps.
 
     Args:
         client: initialized AudioInference instance (provides .api_key)
-        file_path: Path to the FLAC file (must exist)
+        file_path: Path to the FLAC file (must exist), or an in-memory FLAC file object
         model: Whisper model name
         language: language code ('en', 'ar', etc.)
         timestamp_type: list e.g. ['segment'], ['word'], or both
         vad_model: VAD model to use (default 'silero')
         temperature: float, temperature sampling
-        endpoint: transcription API endpoint
+        endpoint: transcription API endpoint (FIREWORKS_AUDIO_ENDPOINT or the production URL if None)
+        session: keep-alive session to send the request with (a one-off connection if None)
+        timeout: (connect, read) timeouts in seconds, or None to wait indefinitely
 
     Returns:
         tuple of (transcription JSON dict, elapsed time in seconds)
@@ -32,24 +59,18 @@ def transcribe_with_fireworks(
         FileNotFoundError: If `file_path` doesn't exist.
         Any error raised by the fireworks client (e.g., HTTP/auth issues)
     """
-    if not os.path.exists(file_path):
+    if not hasattr(file_path, "read") and not os.path.exists(file_path):
         raise FileNotFoundError(f"File not found: {file_path}")
 
+    endpoint = endpoint or _default_endpoint()
     start = time.time()
-    with open(file_path, "rb") as f:
-        resp = requests.post(
+    with _open_audio(file_path) as f:
+        resp = (session or requests).post(
             endpoint,
+            timeout=timeout,
             headers={"Authorization": f"Bearer {client.api_key}"},
-            files={"file": f},
-            data={
-                "model": model,
-                "language": language,
-                "vad_model": vad_model,
-                "temperature": str(temperature),
-                "timestamp_granularities": [timestamp_type],
-                "response_format": "verbose_json"
-
-            }
+            files={"file": (os.path.basename(getattr(f, "name", "chunk.flac")), f)},
+            data=_form_data(model, language, timestamp_type, vad_model, temperature)
         )
 
     try:
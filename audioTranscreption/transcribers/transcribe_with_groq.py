@@ -1,12 +1,23 @@
 import time
+from contextlib import nullcontext
 from groq import Groq, RateLimitError
-def transcribe_with_groq(client: Groq, file_path: str, model: str, language: str, timestamp_type: str):
+
+def _open_audio(file_path):
+    """
+    Opens a path for reading, or passes an already open file-like object through unclosed.
+    """
+    if hasattr(file_path, "read"):
+        return nullcontext(file_path)
+    return open(file_path, "rb")
+
+def transcribe_with_groq(client: Groq, file_path, model: str, language: str, timestamp_type: str):
     """
     Transcribe an audio file using the Groq Whisper API and measure elapsed time.
 
     Args:
         client (Groq): Initialized Groq client instance (from `groq import Groq`).
-        file_path (str): Path to the audio file (must exist, supported formats: flac, wav, mp3, m4a, ogg, etc).
+        file_path (str | BinaryIO): Path to the audio file (must exist, supported formats: flac, wav, mp3, m4a, ogg, etc),
+            or an in-memory FLAC file such as the buffer built by `transcribe_single_chunk`.
         model (str): Whisper model variant to use. 
         language (str): Language code for transcription (e.g., "en", "ar", etc).
         timestamp_type (str): Timestamp granularity, one of:
@@ -25,7 +36,7 @@ def transcribe_with_groq(client: Groq, file_path: str, model: str, language: str
     """
   
     start = time.time()
-    with open(file_path, "rb") as f:
+    with _open_audio(file_path) as f:
         result = client.audio.transcriptions.create(
             file=("chunk.flac", f, "audio/flac"),
             model=model,
@@ -0,0 +1,113 @@
+import threading
+import time
+
+# Published free-tier limits per provider; override through `transcribe_audio_in_chunks(rate_limits=...)`
+PROVIDER_LIMITS = {
+    "groq": {"requests_per_minute": 20, "audio_seconds_per_hour": 7200},
+    "fireworks": {"requests_per_minute": 60, "audio_seconds_per_hour": None},
+}
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at `rate` tokens per second.
+
+    Args:
+        rate (float): Tokens added per second.
+        capacity (float): Maximum number of tokens the bucket can hold (the allowed burst).
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """
+        Blocks until `tokens` are available and takes them.
+
+        Requests larger than the capacity wait for a full bucket instead of blocking forever.
+
+        Returns:
+            float: Total time spent waiting, in seconds.
+        """
+        tokens = min(tokens, self.capacity)
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return waited
+                delay = (tokens - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def drain(self) -> None:
+        """
+        Empties the bucket, e.g. after the provider reported that the limit was hit.
+        """
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.tokens, 0.0)
+
+class RateLimiter:
+    """
+    Provider-side request and audio-duration limits shared by all concurrent chunk workers.
+
+    Args:
+        requests_per_minute (float, optional): Maximum API calls per minute, or None for no limit.
+        audio_seconds_per_hour (float, optional): Maximum seconds of audio uploaded per hour,
+            or None for no limit.
+    """
+
+    def __init__(self, requests_per_minute: float = None, audio_seconds_per_hour: float = None):
+        self.requests = TokenBucket(requests_per_minute / 60.0, requests_per_minute) if requests_per_minute else None
+        self.audio = TokenBucket(audio_seconds_per_hour / 3600.0, audio_seconds_per_hour) if audio_seconds_per_hour else None
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    @classmethod
+    def for_provider(cls, provider: str, **overrides) -> "RateLimiter":
+        """
+        Builds a limiter from `PROVIDER_LIMITS`, with any keyword overriding the defaults.
+        """
+        limits = {**PROVIDER_LIMITS.get(provider, {}), **overrides}
+        return cls(**limits)
+
+    def acquire(self, audio_seconds: float = 0.0) -> float:
+        """
+        Blocks until one request carrying `audio_seconds` of audio may be sent.
+
+        Returns:
+            float: Total time spent waiting, in seconds.
+        """
+        waited = 0.0
+        while True:
+            with self.lock:
+                delay = self.paused_until - time.monotonic()
+            if delay <= 0:
+                break
+            time.sleep(delay)
+            waited += delay
+
+        if self.requests:
+            waited += self.requests.acquire(1)
+        if self.audio and audio_seconds:
+            waited += self.audio.acquire(audio_seconds)
+        return waited
+
+    def pause(self, seconds: float) -> None:
+        """
+        Holds back every worker for `seconds`, e.g. after a 429 response.
+        """
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        if self.requests:
+            self.requests.drain()
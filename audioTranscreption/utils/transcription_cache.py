@@ -0,0 +1,125 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+class TranscriptionCache:
+    """
+    Persistent content-addressed cache of provider responses, one JSON file per audio chunk.
+
+    Keys hash the chunk's raw PCM bytes together with every request parameter that changes the
+    response, so re-running a video (or a run that crashed halfway) only uploads the chunks
+    that were never transcribed. Files are evicted least-recently-used first once the cache
+    grows past `max_bytes`; the file modification time records the last use across runs.
+
+    Args:
+        cache_dir (str): Directory holding the cached responses.
+        max_bytes (int): Size cap of the cache directory, in bytes.
+
+    Attributes:
+        hits (int): Number of lookups answered from the cache.
+        misses (int): Number of lookups that had to go to the provider.
+    """
+
+    def __init__(self, cache_dir: str = "tmp/cache/transcriptions", max_bytes: int = 256 * 1024 * 1024):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+        # key -> size in bytes, ordered from least to most recently used
+        self.entries = OrderedDict()
+        files = sorted(self.cache_dir.glob("*.json"), key=lambda p: p.stat().st_mtime)
+        for path in files:
+            self.entries[path.stem] = path.stat().st_size
+        self.total_bytes = sum(self.entries.values())
+
+    @staticmethod
+    def make_key(pcm: bytes, sample_rate: int, provider: str, model: str, language: str, timestamp_type: str) -> str:
+        """
+        Builds the cache key of a chunk: a SHA-256 over its PCM bytes and request parameters.
+
+        Args:
+            pcm (bytes): Raw 16-bit mono samples of the chunk (any buffer-protocol object).
+            sample_rate (int): Sample rate of `pcm` in Hz.
+            provider (str): Transcription provider name.
+            model (str): Model name.
+            language (str): Language code.
+            timestamp_type (str): Timestamp granularity.
+
+        Returns:
+            str: Hex digest identifying the response.
+        """
+        digest = hashlib.sha256()
+        digest.update(f"{provider}\0{model}\0{language}\0{timestamp_type}\0{sample_rate}\0".encode())
+        digest.update(pcm)
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key: str):
+        """
+        Returns the cached response for `key`, or None on a miss.
+        """
+        path = self._path(key)
+        with self.lock:
+            if key not in self.entries:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                result = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            # Deleted or partially written by someone else: treat as a miss
+            with self.lock:
+                self.total_bytes -= self.entries.pop(key, 0)
+                self.misses += 1
+            return None
+
+        with self.lock:
+            self.hits += 1
+        return result
+
+    def put(self, key: str, result) -> None:
+        """
+        Stores a provider response (a dict or a pydantic model) and evicts old entries if needed.
+        """
+        data = result.model_dump() if hasattr(result, "model_dump") else result
+        payload = json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+        # Write then rename, so an interrupted run never leaves a truncated entry behind
+        path = self._path(key)
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+
+        with self.lock:
+            self.total_bytes += len(payload) - self.entries.pop(key, 0)
+            self.entries[key] = len(payload)
+            while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+                old_key, size = self.entries.popitem(last=False)
+                self.total_bytes -= size
+                self._path(old_key).unlink(missing_ok=True)
+
+    def stats(self) -> dict:
+        """
+        Returns the hit/miss counters and the current size of the cache.
+        """
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self.entries),
+                "bytes": self.total_bytes,
+            }
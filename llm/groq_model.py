@@ -1,9 +1,20 @@
 import os
 from dotenv import load_dotenv
 from groq import Groq
+from utils.retry import DEFAULT_POLICY, get_breaker
 
 load_dotenv()
 
-groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+# SDK retries are disabled: chat_completion applies the shared retry policy instead
+groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"), max_retries=0)
 
 MODEL_NAME = "meta-llama/llama-4-scout-17b-16e-instruct"
+
+def chat_completion(**kwargs):
+    """
+    Calls `groq_client.chat.completions.create(**kwargs)` under the shared retry policy.
+
+    Rate limits wait for the server's `Retry-After`, transient failures back off with jitter,
+    bad requests fail at once, and the "groq-llm" circuit breaker fails fast while Groq is down.
+    """
+    return DEFAULT_POLICY.call(groq_client.chat.completions.create, breaker=get_breaker("groq-llm"), **kwargs)
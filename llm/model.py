@@ -3,7 +3,14 @@ from dotenv import load_dotenv
 import os
 load_dotenv()
 
+# GEMINI_API_ENDPOINT redirects Gemini calls, e.g. to utils/mock_server.py
+gemini_endpoint_options = (
+    {"client_options": {"api_endpoint": os.getenv("GEMINI_API_ENDPOINT")}, "transport": "rest"}
+    if os.getenv("GEMINI_API_ENDPOINT") else {}
+)
+
 model = ChatGoogleGenerativeAI(
     model="gemini-1.5-flash",
     google_api_key=os.getenv("GOOGLE_API_KEY"),
+    **gemini_endpoint_options,
 )
@@ -2,77 +2,183 @@ from audioTranscreption.getTranscription import transcribe_audio_in_chunks
 from visualExtractionEngine.keyframes import get_keyframes
 from utils.cleanup_utils import clear_tmp_directory
 from search.search import search_and_respond
-from summeraization.summarize import load_transcript, generate_markdown_summary
+from summeraization.summarize import load_transcript, load_segments, generate_markdown_summary
 from summeraization.visuals.process import run_visual_pipeline
+from summeraization.visuals.records import FrameTable
+from llm.groq_model import MODEL_NAME
+from llm.model import gemini_endpoint_options
+from utils.checkpoints import JobStore
+from audioTranscreption.audioProcessing.convert_process_audio import SPEECH_FILTERS
+from audioTranscreption.audioProcessing.pcm_store import SAMPLE_RATE
+from search.rag import CHUNK_SIZE, CHUNK_OVERLAP
 from concurrent.futures import ProcessPoolExecutor
 from transformers import CLIPProcessor, CLIPModel
 from langchain_google_genai import ChatGoogleGenerativeAI
 from sentence_transformers import SentenceTransformer
 from dotenv import load_dotenv
+import os
+import shutil
 load_dotenv()
 
-clip_model = CLIPModel.from_pretrained("openai/clip-vit-base-patch32", trust_remote_code=True, use_safetensors=True)
-clip_processor = CLIPProcessor.from_pretrained("openai/clip-vit-base-patch32")
+CLIP_MODEL_NAME = "openai/clip-vit-base-patch32"
+EMBEDDING_MODEL_NAME = "paraphrase-multilingual-MiniLM-L12-v2"
+TRANSCRIPTION_MODELS = {"groq": "whisper-large-v3", "fireworks": "whisper-v3"}
+# Stage settings: each dict is passed to the stage call as is and also keys its checkpoint
+TRANSCRIPTION_OPTIONS = {"language": "ar", "chunk_length": 600, "overlap": 10, "vad": False, "drop_silence": 2.0, "fallback_provider": None}
+KEYFRAME_OPTIONS = {"sampling_mode": "seek", "interval_sec": 10, "streaming": False, "sampler_options": {}}
+DESCRIPTION_OPTIONS = {"combined": True, "frames_per_request": 1}
+# Stage outputs of every processed video, keyed by the video content hash
+JOBS = JobStore()
+
+clip_model = CLIPModel.from_pretrained(CLIP_MODEL_NAME, trust_remote_code=True, use_safetensors=True)
+clip_processor = CLIPProcessor.from_pretrained(CLIP_MODEL_NAME)
 llm = ChatGoogleGenerativeAI(
     model="gemini-1.5-flash",
     temperature=0.3,
+    **gemini_endpoint_options,
 )
 
 
+def job_stages(video_path: str, transcription_provider: str = "groq"):
+    """
+    Checkpointed stages of a video's job. Each stage key covers its parameters and the keys
+    of the stages it reads, so changing a setting re-runs that stage and everything after it.
+    `Stage.params` are the keyword arguments the stage is run with.
+
+    Returns:
+        tuple: (Job, dict of stage name -> Stage)
+    """
+    job = JOBS.job(video_path)
+    # Settings that are fixed inside a stage, rather than passed to it, are keyed as inputs
+    audio = job.stage(
+        "audio", {}, {"video": job.video_hash, "sample_rate": SAMPLE_RATE, "filters": SPEECH_FILTERS}
+    )
+    transcription = job.stage(
+        "transcription",
+        {"provider": transcription_provider, "model": TRANSCRIPTION_MODELS[transcription_provider], **TRANSCRIPTION_OPTIONS},
+        {"audio": audio.key}
+    )
+    # Feature flags are computed while the keyframes are saved
+    keyframes = job.stage("keyframes", dict(KEYFRAME_OPTIONS), {"video": job.video_hash, "clip_model": CLIP_MODEL_NAME})
+    # LLM flags and descriptions come from the same combined request
+    descriptions = job.stage("descriptions", dict(DESCRIPTION_OPTIONS), {"keyframes": keyframes.key, "model": MODEL_NAME})
+    search_index = job.stage(
+        "search_index", {},
+        {"transcription": transcription.key, "embedding_model": EMBEDDING_MODEL_NAME,
+         "chunk_size": CHUNK_SIZE, "chunk_overlap": CHUNK_OVERLAP}
+    )
+    return job, {
+        "audio": audio,
+        "transcription": transcription,
+        "keyframes": keyframes,
+        "descriptions": descriptions,
+        "search_index": search_index,
+    }
+
 def analyze_video(video_path : str, transcription_provider: str = "groq"):
     
     clear_tmp_directory()    
 
-    if transcription_provider == "groq":
-        with ProcessPoolExecutor() as executor:
-            t_future = executor.submit(transcribe_audio_in_chunks, video_path=video_path, provider = transcription_provider ,model= "whisper-large-v3")
-            v_future = executor.submit(get_keyframes, video_path, clip_model, clip_processor)
-
-    elif transcription_provider == "fireworks":
-        with ProcessPoolExecutor() as executor:
-            t_future = executor.submit(transcribe_audio_in_chunks, video_path=video_path, provider = transcription_provider ,model= "whisper-v3")
-            v_future = executor.submit(get_keyframes, video_path, clip_model, clip_processor)
-
-    else:
+    if transcription_provider not in TRANSCRIPTION_MODELS:
         return f"{transcription_provider} is not avilable / supported"
 
-    transcription_result = t_future.result()
-    return transcription_result
+    job, stages = job_stages(video_path, transcription_provider)
+    audio, transcription, keyframes = stages["audio"], stages["transcription"], stages["keyframes"]
+
+    # Only stages whose manifest does not match their parameters and inputs are run
+    t_future = v_future = None
+    with ProcessPoolExecutor() as executor:
+        if not transcription.fresh():
+            if not audio.fresh():
+                audio.begin()
+            t_future = executor.submit(
+                transcribe_audio_in_chunks, video_path=video_path, pcm_path=audio.path("audio.pcm"), **transcription.params
+            )
+        if not keyframes.fresh():
+            v_future = executor.submit(get_keyframes, video_path, clip_model, clip_processor, **keyframes.params)
+
+        if t_future is not None:
+            json_path, text_path = t_future.result()
+            if not audio.fresh():
+                audio.commit({"pcm": "audio.pcm"})
+            transcription.begin()
+            transcription.commit({
+                "json": shutil.copy(json_path, transcription.path(os.path.basename(json_path))),
+                "text": shutil.copy(text_path, transcription.path(os.path.basename(text_path))),
+            })
+        if v_future is not None:
+            v_future.result()
+            keyframes.begin()
+            shutil.copytree("tmp/frames", keyframes.path("frames"))
+            keyframes.commit({"frames": "frames"})
+
+    if t_future is None:
+        print("♻️ Reusing checkpointed transcription")
+    if v_future is None:
+        print("♻️ Reusing checkpointed keyframes")
+        shutil.copytree(keyframes.output("frames"), "tmp/frames", dirs_exist_ok=True)
+
+    JOBS.evict(keep=(job.dir,))
+    return transcription.output("json"), transcription.output("text")
 
 def main(video_path, task, transcription_provider, query=None):
     # extract frames and transcripts
     json_path, text_path = analyze_video(video_path, transcription_provider)
+    _, stages = job_stages(video_path, transcription_provider)
 
     # use seacrh feature
     if task == "search":
+        index = stages["search_index"]
+        reuse_index = index.fresh()
+        if not reuse_index:
+            index.begin()
         search_response, top_images=  search_and_respond(
             text_path=json_path,
             image_path="tmp/frames/keyframes",
-            embedding_model=SentenceTransformer("paraphrase-multilingual-MiniLM-L12-v2"),
+            embedding_model=SentenceTransformer(EMBEDDING_MODEL_NAME),
             model=clip_model,
             processor=clip_processor,
             llm= llm,
             query=query,
             top_k=1,
+            db_path=index.path("vector_db"),
+            reuse_index=reuse_index,
             )
+        if not reuse_index:
+            index.commit({"index": "vector_db"})
         
         return search_response, top_images
     
     elif task == "summarize":
         TRANSCRIPT_PATH = text_path
         KEYFRAMES_CSV = "tmp/frames/keyframes.csv"
-        DESCRIPTIONS_CSV = "tmp/frames/descriptions.csv"
+        DESCRIPTIONS_PATH = "tmp/frames/descriptions.parquet"
         OUTPUT_MD = "summary.md"
 
-        print("📊 Starting visual pipeline...")
-        run_visual_pipeline(KEYFRAMES_CSV, DESCRIPTIONS_CSV)
+        descriptions = stages["descriptions"]
+        if descriptions.fresh():
+            print("♻️ Reusing checkpointed frame descriptions")
+            frames = FrameTable.load(descriptions.output("table"))
+        else:
+            print("📊 Starting visual pipeline...")
+            # The journal lives in the stage directory, which survives clear_tmp_directory, and
+            # is keyed to this stage so another video's journal is never replayed
+            frames = run_visual_pipeline(
+                KEYFRAMES_CSV, output_path=DESCRIPTIONS_PATH,
+                journal_path=descriptions.path("descriptions.journal.jsonl"), journal_key=descriptions.key,
+                **descriptions.params
+            )
+            descriptions.begin()
+            saved_path = frames.save(descriptions.path("descriptions.parquet"))
+            descriptions.commit({"table": os.path.basename(saved_path)})
 
         print("📝 Generating final markdown summary...")
         transcript_text = load_transcript(TRANSCRIPT_PATH)
-        markdown = generate_markdown_summary(transcript_text, DESCRIPTIONS_CSV)
-
-        with open(OUTPUT_MD, "w", encoding="utf-8") as f:
-            f.write(markdown)
+        # Timed segments let long lectures be summarized section by section
+        # The summary is streamed into OUTPUT_MD as it is generated
+        generate_markdown_summary(
+            transcript_text, frames, segments=load_segments(json_path), stream=True, output_path=OUTPUT_MD
+        )
 
         return [True, True]
     else:
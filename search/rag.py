@@ -4,6 +4,10 @@ import json
 import chromadb
 from chromadb.config import Settings
 
+# Transcript chunking of the vector index, in characters
+CHUNK_SIZE = 300
+CHUNK_OVERLAP = 50
+
 def read_text(path):
     with open(path, 'r', encoding='utf-8') as f:
         data = json.load(f)
@@ -20,8 +24,8 @@ def split_text_into_chunks(segments):
     from langchain.text_splitter import RecursiveCharacterTextSplitter
 
     splitter = RecursiveCharacterTextSplitter(
-        chunk_size=300,
-        chunk_overlap=50,
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP,
         separators=["\n", "۔", "؟", "!", " ", ""]
     )
 
@@ -43,7 +47,7 @@ def split_text_into_chunks(segments):
 
     return chunks
 
-def initialize_db(embedding_model, chunks: list[dict]):
+def initialize_db(embedding_model, chunks: list[dict], db_path="tmp/search/vector_db"):
 
     texts = [chunk["text"] for chunk in chunks]
     metadatas = [{
@@ -53,7 +57,7 @@ def initialize_db(embedding_model, chunks: list[dict]):
     
     embeddings = embedding_model.encode(texts).tolist()
 
-    client = chromadb.PersistentClient(path="tmp/search/vector_db")
+    client = chromadb.PersistentClient(path=db_path)
     try:
         client.delete_collection("tts_collection1")
     except:
@@ -75,9 +79,9 @@ def initialize_db(embedding_model, chunks: list[dict]):
     return collection
 
 
-def retrieve_with_surrounding_chunks(chunks, query, embedding_model, before=10, after=20):
+def retrieve_with_surrounding_chunks(chunks, query, embedding_model, before=10, after=20, db_path="tmp/search/vector_db"):
 
-    client = chromadb.PersistentClient(path="tmp/search/vector_db")
+    client = chromadb.PersistentClient(path=db_path)
     collection = client.get_or_create_collection(name="tts_collection1")
 
     query_embedding = embedding_model.encode([query]).tolist()
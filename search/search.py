@@ -75,16 +75,26 @@ def clean_tmp_folder(path="tmp/search"):
             else:
                 shutil.rmtree(item_path)
 
-def search_and_respond(text_path, image_path, embedding_model, model, processor, llm, query=None, top_k=1):
-    clean_tmp_folder()
+def search_and_respond(text_path, image_path, embedding_model, model, processor, llm, query=None, top_k=1, db_path=None, reuse_index=False):
+    """
+    Answer `query` from the transcript and return the best matching keyframes.
+
+    The transcript embeddings go to a Chroma index at `db_path` (tmp/search/vector_db by
+    default, cleared on every call). With `reuse_index`, an index built earlier at `db_path`
+    for the same transcript and embedding model is queried without embedding the transcript again.
+    """
+    if db_path is None:
+        clean_tmp_folder()
+        db_path = "tmp/search/vector_db"
     print("✅ Starting")
     text = read_text(text_path)
     print("✅ Got Text")
     chunks = split_text_into_chunks(text)
     print("✅ Chunks created")
-    initialize_db(embedding_model, chunks)
-    print("✅ Stored in vectorDB")
-    surrounding_chunks = retrieve_with_surrounding_chunks(chunks, query, embedding_model)
+    if not reuse_index:
+        initialize_db(embedding_model, chunks, db_path)
+        print("✅ Stored in vectorDB")
+    surrounding_chunks = retrieve_with_surrounding_chunks(chunks, query, embedding_model, db_path=db_path)
     print("✅ Restored surrounding_chunks")
     text_response = generate_answer_with_context(surrounding_chunks, query, llm)
     print("✅ text answer generated")
@@ -1,44 +1,66 @@
-import pandas as pd
 import os
-from llm.groq_model import groq_client, MODEL_NAME  # make sure this points to your Groq client/module
+import re
+import json
+import time
+import threading
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+from summeraization.visuals.records import FrameTable
+from llm.groq_model import chat_completion, MODEL_NAME  # make sure this points to your Groq client/module
+
+# Longest stretch of lecture summarized by one request in hierarchical mode
+SECTION_SECONDS = 600
 
 
 def load_transcript(path: str) -> str:
     with open(path, "r", encoding="utf-8") as f:
         return f.read()
 
-def generate_markdown_summary(
-    transcript_text: str,
-    keyframes_csv_path: str = "tmp/frames/descriptions.csv"
-) -> str:
+def load_segments(path: str) -> List[dict]:
+    """
+    Load timed transcript segments from a transcription JSON (the `_full.json` written by
+    `save_results`, or one of its segment lists).
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    segments = data["segments"] if isinstance(data, dict) else data
+    return [
+        {"start": float(seg.get("start") or 0), "end": float(seg.get("end") or 0), "text": seg.get("text", "")}
+        for seg in segments
+    ]
 
-    try:
-        df = pd.read_csv(keyframes_csv_path)
-    except FileNotFoundError:
-        print(f"❌ File not found: {keyframes_csv_path}")
-        return ""
+def _timestamp_seconds(timestamp) -> float:
+    """Converts a keyframe timestamp ('HH:MM:SS.mmm' or plain seconds) to seconds."""
+    seconds = 0.0
+    for part in str(timestamp).split(":"):
+        seconds = seconds * 60 + float(part)
+    return seconds
 
-    important_df = df[
-        (df.get("feature_flag") == "important") &
-        (df.get("llm_flag") == "important")
-    ]
+def _load_visuals(frames) -> List[Dict[str, str]]:
+    """Described important keyframes of a `FrameTable` or saved table, in frame order."""
+    table = frames if isinstance(frames, FrameTable) else FrameTable.load(frames)
 
     visuals = []
-    for _, row in important_df.iterrows():
-        image_path = row.get("path") or row.get("keyframe")
-        explanation = row.get("explanation", "").strip()
-        summary = row.get("summary", "").strip()
+    for record in table.important():
+        image_path = record.keyframe
+        explanation = (record.explanation or "").strip()
+        summary = (record.summary or "").strip()
         if explanation and summary and image_path and os.path.exists(image_path):
             visuals.append({
                 "path": image_path.replace("\\", "/"),
                 "summary": summary,
-                "explanation": explanation
+                "explanation": explanation,
+                "time": _timestamp_seconds(record.timestamp) if record.timestamp else 0.0
             })
+    return visuals
 
+def _summary_prompt(transcript_text: str, visuals: List[Dict[str, str]], scope: str = "") -> str:
     visual_snippets = "\n".join([
         f"- path: {v['path']}\n  description: {v['summary'] or v['explanation']}"
         for v in visuals
     ])
+    scope = f"{scope}\n\n        " if scope else ""
     prompt = f"""
         You are an expert assistant specialized in summarizing educational videos for students.
 
@@ -84,7 +106,7 @@ def generate_markdown_summary(
         <img src="tmp/frames/keyframes/00-00-01-234.jpg" alt="رسم يوضح معادلة الانحدار" width="500"/> --> must be centered and like this
         </div>
 
-        Transcript:
+        {scope}Transcript:
         {transcript_text}
 
         Visuals:
@@ -92,15 +114,400 @@ def generate_markdown_summary(
 
         Respond with only the final Markdown summary document.
         """
+    return prompt
+
+def _request_summary(prompt: str) -> str:
+    response = chat_completion(
+        messages=[{"role": "user", "content": prompt}],
+        model=MODEL_NAME
+    )
+    return response.choices[0].message.content.strip()
+
+def _stream_completion(prompt: str, on_text: Callable[[str], None] = None) -> tuple:
+    """
+    Streams one completion, passing text to `on_text` as it arrives. Leading whitespace and
+    whitespace not yet followed by text are held back, so the streamed text is exactly the
+    `.strip()`-ed text of the non-streamed reply.
+
+    Returns:
+        (text, timing) where timing holds the perf-counter `start`, `first_token_at` (None if
+        nothing arrived) and `end`, and the number of completion `tokens`.
+    """
+    start = time.perf_counter()
+    # Retries cover opening the stream; a failure halfway through is not replayed
+    stream = chat_completion(
+        messages=[{"role": "user", "content": prompt}],
+        model=MODEL_NAME,
+        stream=True
+    )
+
+    parts = []
+    pending = ""
+    first_token_at = None
+    chunks = 0
+    completion_tokens = None
+    for chunk in stream:
+        x_groq = getattr(chunk, "x_groq", None)
+        if x_groq is not None and getattr(x_groq, "usage", None) is not None:
+            completion_tokens = x_groq.usage.completion_tokens
+        if not chunk.choices or not chunk.choices[0].delta.content:
+            continue
+        chunks += 1
+        if first_token_at is None:
+            first_token_at = time.perf_counter()
+
+        text = pending + chunk.choices[0].delta.content
+        if not parts:
+            text = text.lstrip()
+        emitted = text.rstrip()
+        pending = text[len(emitted):]
+        if not emitted:
+            continue
+        parts.append(emitted)
+        if on_text:
+            on_text(emitted)
+
+    timing = {
+        "start": start,
+        "first_token_at": first_token_at,
+        "end": time.perf_counter(),
+        "tokens": completion_tokens or chunks
+    }
+    return "".join(parts), timing
+
+def _report_stream(start: float, first_token_at: float, end: float, tokens: int) -> None:
+    if first_token_at is None:
+        return
+    rate = tokens / (end - first_token_at) if end > first_token_at else float("inf")
+    print(f"⏱️ Time to first token: {first_token_at - start:.2f}s, {tokens} tokens at {rate:.1f} tokens/s")
+
+def _stream_summary(prompt: str, output_path: str = None, on_token: Callable[[str], None] = None) -> str:
+    """
+    Streams the summary, appending text to `output_path` and passing it to `on_token` as it
+    arrives (see `_stream_completion`).
+    """
+    out = open(output_path, "w", encoding="utf-8") if output_path else None
+
+    def emit(text: str) -> None:
+        if out:
+            out.write(text)
+            out.flush()
+        if on_token:
+            on_token(text)
 
     try:
-        print("📨 Sending summary prompt to Groq LLM...")
-        response = groq_client.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
-            model=MODEL_NAME
+        summary, timing = _stream_completion(prompt, emit)
+    finally:
+        if out:
+            out.close()
+    _report_stream(**timing)
+    return summary
+
+class _SectionStream:
+    """
+    Writes section summaries that are streamed concurrently into one draft, in lecture order.
+
+    Text of the earliest unfinished section goes straight to `output_path` and `on_token`;
+    text of later sections is buffered until every section before them has finished.
+    Sections are separated by a blank line.
+    """
+
+    def __init__(self, n_sections: int, output_path: str = None, on_token: Callable[[str], None] = None):
+        self.lock = threading.Lock()
+        self.buffers = [[] for _ in range(n_sections)]
+        self.finished = [False] * n_sections
+        self.current = 0
+        self.started = False
+        self.section_started = False
+        self.first_write_at = None
+        self.on_token = on_token
+        self.out = open(output_path, "w", encoding="utf-8") if output_path else None
+
+    def _emit(self, text: str) -> None:
+        if not self.section_started:
+            self.section_started = True
+            if self.started:
+                text = "\n\n" + text
+            self.started = True
+        if self.first_write_at is None:
+            self.first_write_at = time.perf_counter()
+        if self.out:
+            self.out.write(text)
+            self.out.flush()
+        if self.on_token:
+            self.on_token(text)
+
+    def write(self, k: int, text: str) -> None:
+        with self.lock:
+            if k == self.current:
+                self._emit(text)
+            else:
+                self.buffers[k].append(text)
+
+    def finish(self, k: int) -> None:
+        with self.lock:
+            self.finished[k] = True
+            while self.current < len(self.finished) and self.finished[self.current]:
+                self.current += 1
+                self.section_started = False
+                if self.current < len(self.buffers):
+                    for text in self.buffers[self.current]:
+                        self._emit(text)
+                    self.buffers[self.current] = []
+
+    def close(self) -> None:
+        if self.out:
+            self.out.close()
+            self.out = None
+
+def split_sections(segments: List[dict], section_sec: float = SECTION_SECONDS) -> List[dict]:
+    """
+    Group consecutive transcript segments into sections of at most `section_sec` seconds.
+
+    Returns:
+        List of {"start", "end", "text"} dicts in time order.
+    """
+    sections = []
+    for seg in segments:
+        if not sections or seg["end"] - sections[-1]["start"] > section_sec:
+            sections.append({"start": seg["start"], "end": seg["end"], "texts": []})
+        section = sections[-1]
+        section["end"] = max(section["end"], seg["end"])
+        section["texts"].append(seg["text"].strip())
+    return [
+        {"start": s["start"], "end": s["end"], "text": " ".join(t for t in s["texts"] if t)}
+        for s in sections
+    ]
+
+def _clock(seconds: float) -> str:
+    return f"{int(seconds // 3600):02d}:{int(seconds % 3600 // 60):02d}:{int(seconds % 60):02d}"
+
+def _split_topics(markdown: str) -> List[List[str]]:
+    """
+    Splits a Markdown summary into [title, body] topics at its `## ` headings. Text before the
+    first heading, except a `# ` document title, is kept with the first topic.
+    """
+    topics = []
+    preamble = []
+    for line in markdown.splitlines():
+        if line.startswith("## "):
+            topics.append([line[3:].strip(), []])
+        elif topics:
+            topics[-1][1].append(line)
+        elif not line.startswith("# "):
+            preamble.append(line)
+    if not topics:
+        return [["", markdown.strip()]] if markdown.strip() else []
+    if any(line.strip() for line in preamble):
+        topics[0][1] = preamble + topics[0][1]
+    return [[title, "\n".join(body).strip()] for title, body in topics]
+
+def _merge_plan(section_topics: List[List[List[str]]]) -> List[dict]:
+    """
+    Asks the LLM how to merge and order the section topics. Only the topic titles are sent
+    and a short JSON plan comes back, so this pass stays fast however long the lecture is.
+
+    Returns:
+        [{"title": "...", "parts": ["1.1", "2.1", ...]}, ...] where every topic id appears once.
+    """
+    ids = [
+        (f"{s + 1}.{t + 1}", title)
+        for s, topics in enumerate(section_topics)
+        for t, (title, _) in enumerate(topics)
+    ]
+    fallback = [{"title": title, "parts": [topic_id]} for topic_id, title in ids]
+    if len(ids) < 2:
+        return fallback
+
+    listing = "\n".join(f"- {topic_id}: {title}" for topic_id, title in ids)
+    prompt = (
+        "These are the topic headings of consecutive parts of one lecture summary, written as "
+        "<part>.<topic>: <title>, in lecture order.\n\n"
+        f"{listing}\n\n"
+        "Merge headings that continue the same topic across parts (a topic split at a part "
+        "boundary, or the same subject revisited) and otherwise keep the lecture order. "
+        "Give each merged topic a title in the same language as the headings.\n\n"
+        "Respond ONLY in this JSON format:\n"
+        '[ { "title": "...", "parts": ["1.1", "2.1"] }, ... ] using every id exactly once.'
+    )
+    try:
+        reply = _request_summary(prompt)
+        match = re.search(r'\[.*\]', reply, re.DOTALL)
+        plan = json.loads(match.group(0)) if match else []
+    except Exception as e:
+        print(f"⚠️ Topic merge failed, keeping section order: {e}")
+        return fallback
+
+    known = dict(ids)
+    used = set()
+    merged = []
+    for item in plan if isinstance(plan, list) else []:
+        if not isinstance(item, dict):
+            continue
+        parts = [p for p in map(str, item.get("parts") or []) if p in known and p not in used]
+        if parts:
+            used.update(parts)
+            merged.append({"title": str(item.get("title") or known[parts[0]]), "parts": parts})
+    # Topics the plan left out are kept, in their original place at the end
+    merged += [entry for entry in fallback if entry["parts"][0] not in used]
+    return merged
+
+def generate_hierarchical_summary(
+    segments: List[dict],
+    keyframes_csv_path="tmp/frames/descriptions.csv",
+    section_sec: float = SECTION_SECONDS,
+    max_workers: int = 4,
+    stream: bool = False,
+    output_path: str = None,
+    on_token: Callable[[str], None] = None
+) -> str:
+    """
+    Map-reduce version of `generate_markdown_summary` for long lectures.
+
+    The transcript is split into sections of at most `section_sec` seconds using the segment
+    timestamps. Sections are summarized concurrently (up to `max_workers` requests in flight),
+    each with only the keyframes shown during its time range. A final pass merges topics that
+    span sections and orders them, and the document is assembled locally from the section
+    texts, so the latency stays about one section request plus one short merge request
+    however long the lecture is.
+
+    With `stream`, the section summaries are streamed: a draft holding the sections in
+    lecture order is appended to `output_path` and passed to `on_token` as they arrive, and
+    time-to-first-token and tokens/sec are reported for the whole draft. Once the merge pass
+    is done, `output_path` is rewritten with the merged document, which is byte-identical to
+    the non-streamed result.
+
+    Args:
+        segments: Timed transcript segments, e.g. from `load_segments`.
+        keyframes_csv_path: `FrameTable` or saved table of described keyframes.
+        section_sec: Longest section, in seconds.
+        max_workers: Maximum number of section requests in flight.
+        stream: Stream the section summaries into a draft.
+        output_path: File receiving the streamed draft, then the final summary.
+        on_token: Callback receiving the streamed draft text.
+
+    Returns:
+        The Markdown summary, or "Error generating summary." if every section failed.
+    """
+    try:
+        visuals = _load_visuals(keyframes_csv_path)
+    except FileNotFoundError:
+        print(f"❌ File not found: {keyframes_csv_path}")
+        return _write_summary("", output_path)
+
+    sections = split_sections(segments, section_sec)
+    # Keyframes go to the section they were shown in, or the last one that started before them
+    starts = [section["start"] for section in sections]
+    section_visuals = [[] for _ in sections]
+    for v in visuals:
+        section_visuals[max(0, bisect_right(starts, v["time"]) - 1)].append(v)
+
+    draft = _SectionStream(len(sections), output_path, on_token) if stream else None
+    section_tokens = [0] * len(sections)
+
+    def summarize_section(k: int) -> str:
+        section = sections[k]
+        scope = (
+            f"Note: this is part {k + 1} of {len(sections)} of the lecture, from "
+            f"{_clock(section['start'])} to {_clock(section['end'])}. Summarize only this part; "
+            "it is combined with the summaries of the other parts afterwards."
+        )
+        prompt = _summary_prompt(section["text"], section_visuals[k], scope)
+        try:
+            if draft is None:
+                return _request_summary(prompt)
+            summary, timing = _stream_completion(prompt, lambda text: draft.write(k, text))
+            section_tokens[k] = timing["tokens"]
+            return summary
+        except Exception as e:
+            print(f"❌ LLM summarization error in part {k + 1}: {e}")
+            return None
+        finally:
+            if draft is not None:
+                draft.finish(k)
+
+    print(f"📨 Sending {len(sections)} section summary prompts to Groq LLM...")
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            section_summaries = list(executor.map(summarize_section, range(len(sections))))
+    finally:
+        if draft is not None:
+            draft.close()
+    if draft is not None:
+        _report_stream(start, draft.first_write_at, time.perf_counter(), sum(section_tokens))
+
+    section_topics = [_split_topics(summary) for summary in section_summaries if summary]
+    if not section_topics:
+        return _write_summary("Error generating summary.", output_path)
+
+    bodies = {
+        f"{s + 1}.{t + 1}": body
+        for s, topics in enumerate(section_topics)
+        for t, (_, body) in enumerate(topics)
+    }
+    document = []
+    for topic in _merge_plan(section_topics):
+        body = "\n\n".join(bodies[p] for p in topic["parts"] if bodies[p])
+        document.append(f"## {topic['title']}\n\n{body}" if topic["title"] else body)
+    print("✅ Summary received.")
+    return _write_summary("\n\n".join(document).strip(), output_path)
+
+def generate_markdown_summary(
+    transcript_text: str,
+    keyframes_csv_path="tmp/frames/descriptions.csv",
+    segments: List[dict] = None,
+    section_sec: float = SECTION_SECONDS,
+    max_workers: int = 4,
+    stream: bool = False,
+    output_path: str = None,
+    on_token: Callable[[str], None] = None
+) -> str:
+    """
+    Generate the Markdown summary of a lecture from its transcript and described keyframes.
+
+    `keyframes_csv_path` is either the `FrameTable` returned by `run_visual_pipeline`, used
+    without touching the disk, or the path of a saved table (Parquet or CSV).
+
+    When timed `segments` are given and the lecture is longer than `section_sec`, the summary
+    is built by `generate_hierarchical_summary` instead of a single prompt holding the whole
+    transcript, which overflows the context window for multi-hour lectures.
+
+    With `stream`, the summary is streamed: text is appended to `output_path` and passed to
+    `on_token` as it arrives, and time-to-first-token and tokens/sec are reported. The result
+    is byte-identical to the non-streamed one. In hierarchical mode the streamed text is the
+    draft of the section summaries, and `output_path` is rewritten with the merged document
+    at the end (see `generate_hierarchical_summary`). Without `stream`, the summary is written
+    to `output_path`, if given, when it is complete.
+    """
+    if segments and len(split_sections(segments, section_sec)) > 1:
+        return generate_hierarchical_summary(
+            segments, keyframes_csv_path, section_sec, max_workers, stream, output_path, on_token
         )
+
+    try:
+        visuals = _load_visuals(keyframes_csv_path)
+    except FileNotFoundError:
+        print(f"❌ File not found: {keyframes_csv_path}")
+        return _write_summary("", output_path)
+
+    prompt = _summary_prompt(transcript_text, visuals)
+
+    try:
+        print("📨 Sending summary prompt to Groq LLM...")
+        if stream:
+            summary = _stream_summary(prompt, output_path, on_token)
+            print("✅ Summary received.")
+            return summary
+        summary = _request_summary(prompt)
         print("✅ Summary received.")
-        return response.choices[0].message.content.strip()
+        return _write_summary(summary, output_path)
     except Exception as e:
         print(f"❌ LLM summarization error: {e}")
-        return "Error generating summary."
+        return _write_summary("Error generating summary.", output_path)
+
+def _write_summary(summary: str, output_path: str = None) -> str:
+    if output_path:
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(summary)
+    return summary
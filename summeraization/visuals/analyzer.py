@@ -0,0 +1,224 @@
+import re
+import json
+import os
+from typing import Dict, List
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from llm.groq_model import chat_completion, MODEL_NAME
+from summeraization.visuals.encoder import encode_image_to_base64
+from summeraization.visuals.description_cache import DescriptionCache
+from summeraization.visuals.records import FrameTable
+
+# Groq's LLaMA-4 vision models accept at most 5 images per request
+MAX_FRAMES_PER_REQUEST = 5
+
+FAILED_ANALYSIS = {
+    "importance": "not_important",
+    "reason": "Invalid LLM response",
+    "explanation": "Failed to generate explanation.",
+    "summary": "Failed to generate summary."
+}
+
+def _analysis_prompt(image_names: List[str]) -> str:
+    if len(image_names) == 1:
+        target = f"the image `{image_names[0]}`"
+        shape = (
+            '{ "importance": "important" or "not_important", "reason": "...", '
+            '"explanation": "...", "summary": "..." }'
+        )
+    else:
+        target = f"each of the {len(image_names)} images, given in this order: " + ", ".join(f"`{n}`" for n in image_names)
+        shape = (
+            '[ { "frame": "<image name>", "importance": "important" or "not_important", '
+            '"reason": "...", "explanation": "...", "summary": "..." }, ... ] with one object per image, in order'
+        )
+    return (
+        "You are an expert in visual understanding of educational content, helping summarize "
+        "educational video content.\n\n"
+        f"For {target}:\n"
+        "1. Evaluate whether the frame is important for the summary, with a short reason.\n"
+        "2. Explain and summarize its visual content.\n\n"
+        f"Respond ONLY in this JSON format:\n{shape}\n\n"
+        "Guidelines:\n"
+        "- Do not include decorative elements.\n"
+        "- Avoid raw OCR or copying text.\n"
+        "- Be concise.\n"
+        "- If the image is in Arabic, respond in Arabic; otherwise, use English."
+    )
+
+def _normalize(parsed: dict) -> Dict[str, str]:
+    importance = parsed.get("importance", "not_important")
+    return {
+        "importance": importance if importance in ("important", "not_important") else "not_important",
+        "reason": parsed.get("reason") or "No reason provided",
+        "explanation": parsed.get("explanation") or "N/A",
+        "summary": parsed.get("summary") or "N/A"
+    }
+
+def _parse_reply(reply: str, image_names: List[str]) -> List[Dict[str, str]]:
+    """
+    Extracts one analysis per image from the model reply, matched by frame name or else by order.
+    """
+    match = re.search(r'[\[{].*[\]}]', reply, re.DOTALL)
+    if not match:
+        return [dict(FAILED_ANALYSIS) for _ in image_names]
+    try:
+        parsed = json.loads(match.group(0))
+    except json.JSONDecodeError:
+        return [dict(FAILED_ANALYSIS) for _ in image_names]
+
+    items = parsed if isinstance(parsed, list) else [parsed]
+    items = [item for item in items if isinstance(item, dict)]
+    by_name = {str(item.get("frame", "")).strip("` "): item for item in items}
+
+    results = []
+    for i, name in enumerate(image_names):
+        item = by_name.get(name) or (items[i] if i < len(items) else None)
+        results.append(_normalize(item) if item else dict(FAILED_ANALYSIS))
+    return results
+
+def analyze_frames(image_paths: List[str]) -> List[Dict[str, str]]:
+    """
+    Evaluate importance and describe one or more frames with a single LLaMA-4 vision call.
+
+    This replaces the separate `evaluate_llm_importance` and `describe_frame` requests, so each
+    image is uploaded once.
+
+    Args:
+        image_paths: Local paths of the frames (at most `MAX_FRAMES_PER_REQUEST`).
+
+    Returns:
+        One dict per frame, in order:
+        {
+            "importance": "important" | "not_important",
+            "reason": "...",
+            "explanation": "...",
+            "summary": "..."
+        }
+    """
+    image_names = [os.path.basename(p) for p in image_paths]
+    try:
+        content = [{"type": "text", "text": _analysis_prompt(image_names)}]
+        for image_path in image_paths:
+            content.append({
+                "type": "image_url",
+                "image_url": {"url": f"data:image/jpeg;base64,{encode_image_to_base64(image_path)}"}
+            })
+
+        response = chat_completion(
+            messages=[{"role": "user", "content": content}],
+            model=MODEL_NAME
+        )
+        reply = response.choices[0].message.content.strip()
+        return _parse_reply(reply, image_names)
+
+    except Exception as e:
+        print(f"❌ Error analyzing {', '.join(image_names)}: {e}")
+        return [
+            {**FAILED_ANALYSIS, "reason": f"Error: {str(e)}", "explanation": "Error", "summary": "Error"}
+            for _ in image_names
+        ]
+
+def _is_failure(result: Dict[str, str]) -> bool:
+    return result["reason"] == FAILED_ANALYSIS["reason"] or result["reason"].startswith("Error:")
+
+def analyze_frame(image_path: str) -> Dict[str, str]:
+    """
+    Evaluate importance and describe a single frame in one vision call (see `analyze_frames`).
+    """
+    return analyze_frames([image_path])[0]
+
+def analyze_records(
+    table: FrameTable,
+    frames_per_request: int = 1,
+    max_workers: int = 4,
+    cache: DescriptionCache = None
+) -> FrameTable:
+    """
+    Combined replacement for `evaluate_records` followed by `describe_records`.
+
+    Frames that passed the feature filter are analyzed in one vision call each, or in groups
+    of `frames_per_request` images per call. The same fields are filled as by the two
+    separate steps: llm_flag, llm_reason, explanation and summary. Records that already have
+    an `llm_flag` are left as they are.
+
+    Args:
+        table: Frame records with `feature_flag` set, updated in place.
+        frames_per_request: Frames packed into one multi-image request (1 to 5).
+        max_workers: Maximum number of requests in flight.
+        cache: Optional `DescriptionCache`; frames perceptually close to an analyzed one reuse
+            its results, and new results are added to it.
+
+    Returns:
+        The updated table.
+    """
+    frames_per_request = max(1, min(frames_per_request, MAX_FRAMES_PER_REQUEST))
+
+    def _apply(i, result):
+        if result["importance"] == "important":
+            explanation, summary = result["explanation"], result["summary"]
+        else:
+            explanation = summary = "Skipped"
+        table.update(
+            i, llm_flag=result["importance"], llm_reason=result["reason"],
+            explanation=explanation, summary=summary
+        )
+
+    pending = []
+    for i, record in enumerate(table):
+        if record.llm_flag is not None:
+            continue
+        if not record.exists():
+            table.update(i, llm_flag="not_important", llm_reason="Missing file", explanation="Missing", summary="Missing")
+            continue
+        if record.feature_flag != "important":
+            table.update(
+                i, llm_flag="not_important", llm_reason="Skipped due to bad visual quality",
+                explanation="Skipped", summary="Skipped"
+            )
+            continue
+        phash = None
+        if cache is not None:
+            phash, entry = cache.lookup(record.keyframe)
+            if entry and entry["importance"] is not None and (
+                entry["importance"] != "important" or entry["explanation"] is not None
+            ):
+                _apply(i, entry)
+                continue
+        pending.append((i, record.keyframe, phash))
+
+    groups = [pending[start:start + frames_per_request] for start in range(0, len(pending), frames_per_request)]
+
+    def analyze_group(group):
+        print(f"🧠 Analyzing {', '.join(os.path.basename(p) for _, p, _ in group)}...")
+        return analyze_frames([p for _, p, _ in group])
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # Results arrive in frame order and are journaled as soon as each group is done
+        for group, results in zip(groups, executor.map(analyze_group, groups)):
+            for (i, _, phash), result in zip(group, results):
+                _apply(i, result)
+                # Failed calls are not cached, so they are retried on the next run
+                if cache is not None and not _is_failure(result):
+                    cache.store(phash, **result)
+
+    return table
+
+def analyze_frames_to_csv(
+    csv_path: str = "tmp/frames/descriptions.csv",
+    frames_per_request: int = 1,
+    max_workers: int = 4,
+    cache: DescriptionCache = None
+) -> pd.DataFrame:
+    """
+    CSV version of `analyze_records`: analyzes every frame of `csv_path` and updates it in place.
+
+    Returns:
+        The updated DataFrame.
+    """
+    table = FrameTable.load(csv_path)
+    table.clear("llm_flag", "llm_reason", "explanation", "summary")
+    analyze_records(table, frames_per_request, max_workers, cache)
+    table.save(csv_path)
+    print(f"✅ LLM flags and descriptions saved to {csv_path}")
+    return table.to_dataframe()
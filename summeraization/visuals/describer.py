@@ -1,7 +1,7 @@
 import re
 import os
 from typing import Dict
-from llm.groq_model import groq_client, MODEL_NAME
+from llm.groq_model import chat_completion, MODEL_NAME
 from summeraization.visuals.encoder import encode_image_to_base64
 
 
@@ -56,7 +56,7 @@ def describe_frame(image_path: str) -> Dict[str, str]:
             }
         ]
 
-        response = groq_client.chat.completions.create(
+        response = chat_completion(
             messages=messages,
             model=MODEL_NAME
         )
@@ -0,0 +1,175 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+import numpy as np
+import imagehash
+from PIL import Image
+from visualExtractionEngine.KeyFrameSelection.HashIndex import hash_to_uint64, _popcount
+
+FIELDS = ("importance", "reason", "explanation", "summary")
+
+
+def _to_signed(value: int) -> int:
+    # SQLite integers are signed 64-bit
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def _to_unsigned(value: int) -> int:
+    return value + (1 << 64) if value < 0 else value
+
+
+def frame_phash(image_path: str) -> int:
+    """Perceptual hash of an image file, packed into an unsigned 64-bit int."""
+    with Image.open(image_path) as img:
+        return hash_to_uint64(imagehash.phash(img))
+
+
+class DescriptionCache:
+    """
+    Persistent SQLite cache of vision LLM results, keyed by the frame's perceptual hash.
+
+    Slides reused across the lectures of a series (or a re-uploaded lecture) hash within a few
+    bits of each other, so a lookup returns the closest cached frame within
+    `hamming_tolerance` bits. Results are stored per model, since another model would describe
+    the frame differently.
+
+    Args:
+        db_path: SQLite database file.
+        model: Vision model the cached results come from.
+        hamming_tolerance: Maximum Hamming distance (out of 64 bits) for a cache hit.
+        ttl_days: Entries older than this are evicted on open and ignored by `lookup`; None keeps
+            them forever.
+        max_entries: Least recently used entries are evicted above this count.
+    """
+
+    def __init__(
+        self,
+        db_path: str = "tmp/cache/descriptions.sqlite",
+        model: str = "",
+        hamming_tolerance: int = 4,
+        ttl_days: Optional[float] = 180,
+        max_entries: int = 20000
+    ):
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self.model = model
+        self.hamming_tolerance = hamming_tolerance
+        self.ttl_seconds = ttl_days * 86400 if ttl_days is not None else None
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+        self.db = sqlite3.connect(db_path, check_same_thread=False)
+        self.db.execute(
+            """CREATE TABLE IF NOT EXISTS descriptions (
+                phash INTEGER NOT NULL,
+                model TEXT NOT NULL,
+                importance TEXT, reason TEXT, explanation TEXT, summary TEXT,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (phash, model)
+            )"""
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS descriptions_last_used ON descriptions (last_used)")
+        self._evict()
+        self._load_hashes()
+
+    def _evict(self) -> None:
+        with self.db:
+            if self.ttl_seconds is not None:
+                self.db.execute("DELETE FROM descriptions WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+            self.db.execute(
+                """DELETE FROM descriptions WHERE rowid IN (
+                    SELECT rowid FROM descriptions ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                )""",
+                (self.max_entries,)
+            )
+
+    def _load_hashes(self) -> None:
+        rows = self.db.execute("SELECT phash FROM descriptions WHERE model = ?", (self.model,)).fetchall()
+        self.hashes = np.array([_to_unsigned(r[0]) for r in rows], dtype=np.uint64)
+
+    def lookup(self, image_path: str) -> Tuple[int, Optional[Dict[str, str]]]:
+        """
+        Find cached results for a frame.
+
+        Returns:
+            (phash, entry): the frame's hash, to pass to `store`, and the cached fields of the
+            closest frame within tolerance (values may be None if never computed), or None.
+        """
+        phash = frame_phash(image_path)
+        with self.lock:
+            while True:
+                match = None
+                if len(self.hashes):
+                    distances = _popcount(self.hashes ^ np.uint64(phash))
+                    best = int(np.argmin(distances))
+                    if distances[best] <= self.hamming_tolerance:
+                        match = int(self.hashes[best])
+
+                if match is None:
+                    self.misses += 1
+                    return phash, None
+
+                row = self.db.execute(
+                    f"SELECT {', '.join(FIELDS)}, created_at FROM descriptions WHERE phash = ? AND model = ?",
+                    (_to_signed(match), self.model)
+                ).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return phash, None
+                if self.ttl_seconds is None or row[-1] >= time.time() - self.ttl_seconds:
+                    break
+                # Expired while the process was running: drop it and look for another match
+                with self.db:
+                    self.db.execute(
+                        "DELETE FROM descriptions WHERE phash = ? AND model = ?", (_to_signed(match), self.model)
+                    )
+                self.hashes = self.hashes[self.hashes != np.uint64(match)]
+
+            with self.db:
+                self.db.execute(
+                    "UPDATE descriptions SET last_used = ? WHERE phash = ? AND model = ?",
+                    (time.time(), _to_signed(match), self.model)
+                )
+            self.hits += 1
+            return phash, dict(zip(FIELDS, row[:-1]))
+
+    def store(self, phash: int, **fields) -> None:
+        """
+        Save results for a frame hash. Only the given fields are updated, so the importance
+        and description stages can fill the same entry separately.
+        """
+        values = {name: fields.get(name) for name in FIELDS}
+        now = time.time()
+        with self.lock:
+            with self.db:
+                self.db.execute(
+                    f"""INSERT INTO descriptions (phash, model, {', '.join(FIELDS)}, created_at, last_used)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                        ON CONFLICT (phash, model) DO UPDATE SET
+                        {', '.join(f'{name} = COALESCE(excluded.{name}, {name})' for name in FIELDS)},
+                        last_used = excluded.last_used""",
+                    (_to_signed(phash), self.model, *values.values(), now, now)
+                )
+            if phash not in set(self.hashes.tolist()):
+                self.hashes = np.append(self.hashes, np.uint64(phash))
+            if len(self.hashes) > self.max_entries:
+                self._evict()
+                self._load_hashes()
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters and number of cached frames."""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self.hashes)
+            }
+
+    def close(self) -> None:
+        self.db.close()
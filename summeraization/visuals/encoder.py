@@ -1,13 +1,119 @@
 import base64
+import os
+import threading
+from collections import OrderedDict
+import cv2
 from PIL import Image
-from io import BytesIO
 
+# Longest side sent to the vision model; larger frames are downscaled once
+MAX_SIDE = 1280
+# Largest JPEG passed through untouched (Groq rejects base64 images above 4 MB)
+MAX_PASSTHROUGH_BYTES = 3 * 1024 * 1024
+# JPEGs compressed less than this are re-encoded, which shrinks the upload
+MAX_PASSTHROUGH_BITS_PER_PIXEL = 2.0
+JPEG_QUALITY = 85
+# Memory cap of the base64 payload cache
+CACHE_MAX_BYTES = 64 * 1024 * 1024
 
-def encode_image_to_base64(image_path: str) -> str:
+
+class _PayloadCache:
+    """Thread-safe LRU of base64 payloads, bounded by their total size in bytes."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            payload = self.entries.get(key)
+            if payload is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return payload
+
+    def put(self, key, payload: str) -> None:
+        with self.lock:
+            if key in self.entries:
+                return
+            self.entries[key] = payload
+            self.total_bytes += len(payload)
+            while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+                _, old = self.entries.popitem(last=False)
+                self.total_bytes -= len(old)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+
+
+_cache = _PayloadCache(CACHE_MAX_BYTES)
+
+
+def _jpeg_payload(image_path: str, max_side: int) -> bytes:
     """
-    Load an image and encode it to a base64 JPEG string for use with Groq API.
+    Returns JPEG bytes for the vision model: the file itself when it already is a small,
+    well-compressed JPEG, otherwise a single downscale and encode.
     """
+    file_size = os.path.getsize(image_path)
+    # Image.open only parses the header, so this check does not decode the pixels
     with Image.open(image_path) as img:
-        buffer = BytesIO()
-        img.save(buffer, format="JPEG")
-        return base64.b64encode(buffer.getvalue()).decode("utf-8")
+        image_format, (width, height) = img.format, img.size
+
+    if (
+        image_format == "JPEG"
+        and max(width, height) <= max_side
+        and file_size <= MAX_PASSTHROUGH_BYTES
+        and file_size * 8 <= MAX_PASSTHROUGH_BITS_PER_PIXEL * width * height
+    ):
+        with open(image_path, "rb") as f:
+            return f.read()
+
+    scale = min(1.0, max_side / max(width, height))
+    # Halving during decoding is much cheaper than decoding at full size and resizing
+    img = cv2.imread(image_path, cv2.IMREAD_REDUCED_COLOR_2 if scale <= 0.5 else cv2.IMREAD_COLOR)
+    if img is None:
+        raise ValueError(f"Cannot decode image: {image_path}")
+    target = (max(1, round(width * scale)), max(1, round(height * scale)))
+    if (img.shape[1], img.shape[0]) != target:
+        img = cv2.resize(img, target, interpolation=cv2.INTER_AREA)
+
+    ok, encoded = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
+    if not ok:
+        raise ValueError(f"Cannot encode image: {image_path}")
+    return encoded.tobytes()
+
+
+def encode_image_to_base64(image_path: str, max_side: int = MAX_SIDE) -> str:
+    """
+    Load an image and encode it to a base64 JPEG string for use with Groq API.
+
+    Frames that are already JPEGs within `max_side` are sent as-is, without decoding and
+    re-encoding; others are downscaled once. Payloads are memoized per path and modification
+    time, so the evaluation and description calls of a frame share one encoding.
+    """
+    stat = os.stat(image_path)
+    key = (os.path.abspath(image_path), stat.st_mtime_ns, stat.st_size, max_side)
+
+    payload = _cache.get(key)
+    if payload is None:
+        payload = base64.b64encode(_jpeg_payload(image_path, max_side)).decode("utf-8")
+        _cache.put(key, payload)
+    return payload
+
+
+def payload_cache_info() -> dict:
+    """Hit/miss counters and size of the payload cache."""
+    with _cache.lock:
+        return {
+            "hits": _cache.hits,
+            "misses": _cache.misses,
+            "entries": len(_cache.entries),
+            "bytes": _cache.total_bytes
+        }
@@ -2,79 +2,115 @@ import re
 import json
 import os
 import pandas as pd
-from llm.groq_model import groq_client, MODEL_NAME
+from concurrent.futures import ThreadPoolExecutor
+from llm.groq_model import chat_completion, MODEL_NAME
 from summeraization.visuals.encoder import encode_image_to_base64
+from summeraization.visuals.description_cache import DescriptionCache
+from summeraization.visuals.records import FrameTable
+
+
+def _evaluate_frame(frame_path: str) -> tuple:
+    """Ask the LLM whether one frame is important. Returns (llm_flag, reason); never raises."""
+    print(f"🧠 Evaluating LLM importance for {frame_path}...")
+
+    try:
+        base64_image = encode_image_to_base64(frame_path)
+
+        response = chat_completion(
+            messages=[
+                {
+                    "role": "user",
+                    "content": [
+                        {
+                            "type": "text",
+                            "text": (
+                                f"Evaluate importance of this frame: {os.path.basename(frame_path)}\n\n"
+                                "You're helping summarize educational video content.\n"
+                                "Respond ONLY in this JSON format:\n"
+                                '{ "importance": "important" or "not_important", "reason": "..." }'
+                            )
+                        },
+                        {
+                            "type": "image_url",
+                            "image_url": {
+                                "url": f"data:image/jpeg;base64,{base64_image}"
+                            }
+                        }
+                    ]
+                }
+            ],
+            model=MODEL_NAME
+        )
+
+        reply = response.choices[0].message.content.strip()
+        match = re.search(r'{.*}', reply, re.DOTALL)
+        if match:
+            parsed = json.loads(match.group(0))
+            return parsed.get("importance", "not_important"), parsed.get("reason", "No reason provided")
+        return "not_important", "Invalid LLM response"
+
+    except Exception as e:
+        return "not_important", f"Error: {str(e)}"
+
+
+def evaluate_records(
+    table: FrameTable,
+    max_workers: int = 4,
+    cache: DescriptionCache = None
+) -> FrameTable:
+    """
+    Evaluate frame importance using Groq + LLaMA-4 model, and flag the records.
+
+    Only records without an `llm_flag` are evaluated. Up to `max_workers` frames are evaluated
+    concurrently and a failing frame only affects its own record. With a `cache`, frames
+    perceptually close to an already evaluated one reuse its flag instead of calling the LLM.
+    """
+    futures = []
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for i, record in enumerate(table):
+            if record.llm_flag is not None:
+                continue
+
+            if not record.exists():
+                table.update(i, llm_flag="not_important", llm_reason="Missing file")
+                continue
+
+            if record.feature_flag != "important":
+                table.update(i, llm_flag="not_important", llm_reason="Skipped due to bad visual quality")
+                continue
+
+            phash = None
+            if cache is not None:
+                phash, entry = cache.lookup(record.keyframe)
+                if entry and entry["importance"] is not None:
+                    table.update(i, llm_flag=entry["importance"], llm_reason=entry["reason"])
+                    continue
+
+            futures.append((i, phash, executor.submit(_evaluate_frame, record.keyframe)))
+
+        for i, phash, future in futures:
+            llm_flag, reason = future.result()
+            table.update(i, llm_flag=llm_flag, llm_reason=reason)
+            # Failed calls are not cached, so they are retried on the next run
+            if cache is not None and not reason.startswith("Error:") and reason != "Invalid LLM response":
+                cache.store(phash, importance=llm_flag, reason=reason)
+
+    return table
 
 
 def evaluate_llm_importance(
     input_csv: str = "tmp/frames/descriptions.csv",
-    output_csv: str = "tmp/frames/descriptions.csv"
+    output_csv: str = "tmp/frames/descriptions.csv",
+    max_workers: int = 4,
+    cache: DescriptionCache = None
 ) -> pd.DataFrame:
-    """Evaluate frame importance using Groq + LLaMA-4 model, and flag results."""
-
-    df = pd.read_csv(input_csv)
-    llm_flags = []
-    reasons = []
-
-    for idx, row in df.iterrows():
-        frame_path = row.get("path") or row.get("keyframe")
-        if not frame_path or not os.path.exists(frame_path):
-            llm_flags.append("not_important")
-            reasons.append("Missing file")
-            continue
-
-        if row.get("feature_flag") != "important":
-            llm_flags.append("not_important")
-            reasons.append("Skipped due to bad visual quality")
-            continue
-
-        print(f"🧠 Evaluating LLM importance for {frame_path}...")
-
-        try:
-            base64_image = encode_image_to_base64(frame_path)
-
-            response = groq_client.chat.completions.create(
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": (
-                                    f"Evaluate importance of this frame: {os.path.basename(frame_path)}\n\n"
-                                    "You're helping summarize educational video content.\n"
-                                    "Respond ONLY in this JSON format:\n"
-                                    '{ "importance": "important" or "not_important", "reason": "..." }'
-                                )
-                            },
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/jpeg;base64,{base64_image}"
-                                }
-                            }
-                        ]
-                    }
-                ],
-                model=MODEL_NAME
-            )
-
-            reply = response.choices[0].message.content.strip()
-            match = re.search(r'{.*}', reply, re.DOTALL)
-            if match:
-                parsed = json.loads(match.group(0))
-                llm_flags.append(parsed.get("importance", "not_important"))
-                reasons.append(parsed.get("reason", "No reason provided"))
-            else:
-                llm_flags.append("not_important")
-                reasons.append("Invalid LLM response")
-
-        except Exception as e:
-            llm_flags.append("not_important")
-            reasons.append(f"Error: {str(e)}")
-
-    df["llm_flag"] = llm_flags
-    df["llm_reason"] = reasons
-    df.to_csv(output_csv, index=False)
+    """
+    CSV version of `evaluate_records`: flags every frame of `input_csv` and writes `output_csv`.
+    """
+    table = FrameTable.load(input_csv)
+    table.clear("llm_flag", "llm_reason")
+    evaluate_records(table, max_workers, cache)
+    table.save(output_csv)
     print(f"✅ LLM flags written to {output_csv}")
-    return df
+    return table.to_dataframe()
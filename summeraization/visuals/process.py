@@ -1,61 +1,149 @@
-import pandas as pd
 import os
-from summeraization.visuals.features import evaluate_feature_quality
-from summeraization.visuals.evaluator import evaluate_llm_importance
+from concurrent.futures import ThreadPoolExecutor
+from summeraization.visuals.features import flag_feature_quality
+from summeraization.visuals.evaluator import evaluate_records
 from summeraization.visuals.describer import describe_frame
+from summeraization.visuals.analyzer import analyze_records
+from summeraization.visuals.description_cache import DescriptionCache
+from summeraization.visuals.records import FrameTable
+from llm.groq_model import MODEL_NAME
 
 
 def run_visual_pipeline(
     keyframes_csv: str = "tmp/frames/keyframes.csv",
-    output_csv: str = "tmp/frames/descriptions.csv"
-) -> None:
-    """Run the full visual processing pipeline with flag-based logic."""
+    output_csv: str = None,
+    combined: bool = True,
+    frames_per_request: int = 1,
+    max_workers: int = 4,
+    cache=True,
+    output_path: str = "tmp/frames/descriptions.parquet",
+    resume: bool = True,
+    journal_path: str = None,
+    journal_key: str = None
+) -> FrameTable:
+    """
+    Run the full visual processing pipeline with flag-based logic.
+
+    The keyframes are loaded once into a `FrameTable` that every stage updates in memory.
+    Each update is appended to a journal (`journal_path`, by default next to `output_path`),
+    so a crashed run picks up where it stopped when `resume` is set. The journal is only
+    replayed when it carries `journal_key`, which defaults to the fingerprint of the keyframes,
+    so a journal left by another video is discarded. The table is written once at the end, as
+    Parquet (CSV when pyarrow is missing), plus an optional CSV export at `output_csv`.
+
+    With `combined`, importance and descriptions come from a single vision call per frame
+    (or per group of `frames_per_request` frames) instead of one evaluation call followed
+    by one description call. Each LLM stage keeps up to `max_workers` requests in flight.
+
+    `cache` reuses LLM results of perceptually identical frames across runs and videos:
+    True uses the default `DescriptionCache` under tmp/cache, a `DescriptionCache` instance
+    is used as is, and False/None always calls the LLM.
+
+    Returns:
+        FrameTable: The described frames, e.g. for `generate_markdown_summary`.
+    """
+    if cache is True:
+        cache = DescriptionCache(model=MODEL_NAME)
+    cache = cache or None
+
+    journal_path = journal_path or f"{output_path}.journal.jsonl"
+    if not resume and os.path.exists(journal_path):
+        os.remove(journal_path)
+    table = FrameTable.load(keyframes_csv, journal_path)
+    table.journal_key = journal_key or table.fingerprint()
+    replayed = table.replay_journal()
+    if replayed:
+        print(f"♻️ Resuming: restored {replayed} results from {journal_path}")
 
     print("🔍 Step 1: Evaluating visual features...")
-    evaluate_feature_quality(keyframes_csv, output_csv)
+    flag_feature_quality(table)
+
+    if combined:
+        print("🧠 Step 2: Evaluating importance and generating descriptions (combined LLM call)...")
+        analyze_records(table, frames_per_request, max_workers, cache)
+    else:
+        print("🧠 Step 2: Evaluating semantic importance (LLM)...")
+        evaluate_records(table, max_workers, cache)
+
+        print("📋 Step 3: Generating visual descriptions...")
+        describe_records(table, max_workers, cache)
+
+    saved_path = table.save(output_path)
+    if output_csv and output_csv != saved_path:
+        table.save(output_csv)
+    table.close_journal(remove=True)
+    print(f"✅ Frame descriptions saved to {saved_path}")
 
-    print("🧠 Step 2: Evaluating semantic importance (LLM)...")
-    evaluate_llm_importance(output_csv, output_csv)
+    if cache is not None:
+        print(f"🗂️ Description cache: {cache.stats()}")
+    return table
 
-    print("📋 Step 3: Generating visual descriptions...")
-    add_descriptions_to_csv(output_csv)
+def _describe(image_path: str) -> tuple:
+    """Describe one frame. Returns (explanation, summary); never raises."""
+    try:
+        result = describe_frame(image_path)
+        print(f"📝 Described: {os.path.basename(image_path)}")
+        return result["explanation"], result["summary"]
+    except Exception as e:
+        print(f"⚠️ Error describing {image_path}: {e}")
+        return "Error", "Error"
 
-def add_descriptions_to_csv(csv_path: str = "tmp/frames/descriptions.csv") -> None:
+def describe_records(
+    table: FrameTable,
+    max_workers: int = 4,
+    cache: DescriptionCache = None
+) -> FrameTable:
+    """
+    Describe every important frame without a description, with up to `max_workers` LLM calls
+    in flight. A failing frame only affects its own record. With a `cache`, descriptions of
+    perceptually identical frames are reused.
+    """
+    futures = []
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for i, record in enumerate(table):
+            if record.explanation is not None:
+                continue
+
+            if record.feature_flag != "important" or record.llm_flag != "important":
+                table.update(i, explanation="Skipped", summary="Skipped")
+                continue
+
+            if not record.exists():
+                table.update(i, explanation="Missing", summary="Missing")
+                continue
+
+            phash = None
+            if cache is not None:
+                phash, entry = cache.lookup(record.keyframe)
+                if entry and entry["explanation"] is not None:
+                    table.update(i, explanation=entry["explanation"], summary=entry["summary"])
+                    continue
+
+            futures.append((i, phash, executor.submit(_describe, record.keyframe)))
+
+        for i, phash, future in futures:
+            explanation, summary = future.result()
+            table.update(i, explanation=explanation, summary=summary)
+            if cache is not None and explanation not in ("Error", "Failed to generate explanation."):
+                cache.store(phash, explanation=explanation, summary=summary)
+
+    return table
+
+def add_descriptions_to_csv(
+    csv_path: str = "tmp/frames/descriptions.csv",
+    max_workers: int = 4,
+    cache: DescriptionCache = None
+) -> None:
+    """
+    CSV version of `describe_records`: describes the frames of `csv_path` and updates it in place.
+    """
     if not os.path.exists(csv_path):
         print(f"❌ CSV not found at: {csv_path}")
         return
 
-    df = pd.read_csv(csv_path)
-
-    explanations = []
-    summaries = []
-
-    for idx, row in df.iterrows():
-        if (
-            row.get("feature_flag") != "important" or
-            row.get("llm_flag") != "important"
-        ):
-            explanations.append("Skipped")
-            summaries.append("Skipped")
-            continue
-
-        image_path = row.get("path") or row.get("keyframe") or row.get("keyframes")
-        if not image_path or not os.path.exists(image_path):
-            explanations.append("Missing")
-            summaries.append("Missing")
-            continue
-
-        try:
-            result = describe_frame(image_path)
-            explanations.append(result["explanation"])
-            summaries.append(result["summary"])
-            print(f"📝 Described: {os.path.basename(image_path)}")
-        except Exception as e:
-            print(f"⚠️ Error describing {image_path}: {e}")
-            explanations.append("Error")
-            summaries.append("Error")
-
-    df["explanation"] = explanations
-    df["summary"] = summaries
-    df.to_csv(csv_path, index=False)
+    table = FrameTable.load(csv_path)
+    table.clear("explanation", "summary")
+    describe_records(table, max_workers, cache)
+    table.save(csv_path)
     print(f"✅ Descriptions saved to {csv_path}")
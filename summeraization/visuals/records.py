@@ -0,0 +1,215 @@
+import hashlib
+import importlib.util
+import json
+import os
+import threading
+from typing import Iterator, List, Optional
+import pandas as pd
+
+# Columns of the frame table, in output order
+COLUMNS = ("keyframe", "timestamp", "feature_flag", "llm_flag", "llm_reason", "explanation", "summary")
+
+class FrameRecord:
+    """
+    One keyframe and everything the visual pipeline learns about it.
+
+    Attributes:
+        keyframe (str): Path of the saved frame.
+        timestamp (str): Frame time as 'HH:MM:SS.mmm'.
+        feature_flag (str, optional): "important" / "not_important" from the quality rules.
+        llm_flag (str, optional): "important" / "not_important" from the vision LLM.
+        llm_reason (str, optional): Reason given for `llm_flag`.
+        explanation (str, optional): Visual explanation of the frame.
+        summary (str, optional): Short summary of the frame.
+
+    Fields are None until the stage that fills them has run.
+    """
+
+    __slots__ = COLUMNS
+
+    def __init__(self, keyframe: str, timestamp: str = "", **fields):
+        self.keyframe = keyframe
+        self.timestamp = timestamp
+        for name in COLUMNS[2:]:
+            setattr(self, name, fields.get(name))
+
+    def exists(self) -> bool:
+        return isinstance(self.keyframe, str) and os.path.exists(self.keyframe)
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in COLUMNS}
+
+class FrameTable:
+    """
+    Typed, in-memory table of `FrameRecord`s passed between the visual pipeline stages.
+
+    Stages update records through `update`, which also appends the change to an optional
+    JSON-lines journal and flushes it. If the run crashes, `replay_journal` restores the
+    finished work and stages only process records whose fields are still empty. The full table
+    is written once at the end with `save`.
+
+    The journal starts with a header holding `journal_key`, and a journal whose key differs
+    is discarded instead of replayed: keyframe names are timestamps, identical for every video,
+    so the key (e.g. `fingerprint()`) must tell the frames of one video from another.
+
+    Args:
+        records: The frame records, in frame order.
+        journal_path: File the updates are appended to; None disables journaling.
+        journal_key: Identity of the frames the journal belongs to.
+    """
+
+    def __init__(self, records: List[FrameRecord], journal_path: Optional[str] = None, journal_key: Optional[str] = None):
+        self.records = records
+        self.journal_path = journal_path
+        self.journal_key = journal_key
+        self._journal = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame, journal_path: Optional[str] = None, journal_key: Optional[str] = None) -> "FrameTable":
+        if "keyframe" not in df.columns and "path" in df.columns:
+            df = df.rename(columns={"path": "keyframe"})
+        df = df.astype(object).where(df.notna(), None)
+        columns = [c for c in COLUMNS if c in df.columns]
+        records = [
+            FrameRecord(**dict(zip(columns, values)))
+            for values in zip(*(df[c].tolist() for c in columns))
+        ]
+        return cls(records, journal_path, journal_key)
+
+    @classmethod
+    def load(cls, path: str, journal_path: Optional[str] = None, journal_key: Optional[str] = None) -> "FrameTable":
+        """
+        Reads a table written by `save` (Parquet) or any CSV with a keyframe/path column,
+        such as the keyframes.csv from `save_records`.
+        """
+        df = pd.read_parquet(path) if path.endswith(".parquet") else pd.read_csv(path)
+        return cls.from_dataframe(df, journal_path, journal_key)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def fingerprint(self) -> str:
+        """
+        SHA-256 of the keyframe names, timestamps and image contents, identifying the frames
+        of one keyframe extraction.
+        """
+        digest = hashlib.sha256()
+        for record in self.records:
+            digest.update(f"{record.keyframe}|{record.timestamp}\n".encode("utf-8"))
+            if record.keyframe and os.path.exists(record.keyframe):
+                with open(record.keyframe, "rb") as f:
+                    digest.update(hashlib.sha256(f.read()).digest())
+        return digest.hexdigest()
+
+    def __iter__(self) -> Iterator[FrameRecord]:
+        return iter(self.records)
+
+    def __getitem__(self, i: int) -> FrameRecord:
+        return self.records[i]
+
+    def update(self, i: int, **fields) -> None:
+        """
+        Set fields of record `i` and journal the change.
+        """
+        record = self.records[i]
+        for name, value in fields.items():
+            setattr(record, name, value)
+        if self.journal_path is None:
+            return
+        with self._lock:
+            if self._journal is None:
+                os.makedirs(os.path.dirname(self.journal_path) or ".", exist_ok=True)
+                self._journal = open(self.journal_path, "a", encoding="utf-8")
+                if self._journal.tell() == 0:
+                    self._journal.write(json.dumps({"journal_key": self.journal_key}) + "\n")
+            self._journal.write(json.dumps({"keyframe": record.keyframe, **fields}, ensure_ascii=False) + "\n")
+            self._journal.flush()
+
+    def replay_journal(self) -> int:
+        """
+        Apply the updates journaled by an interrupted run to matching records. A journal whose
+        header does not carry this table's `journal_key` belongs to other frames and is deleted.
+
+        Returns:
+            int: Number of updates applied.
+        """
+        if not self.journal_path or not os.path.exists(self.journal_path):
+            return 0
+        by_keyframe = {record.keyframe: record for record in self.records}
+        applied = 0
+        with open(self.journal_path, encoding="utf-8") as f:
+            try:
+                header = json.loads(f.readline())
+            except json.JSONDecodeError:
+                header = None
+            stale = not isinstance(header, dict) or header.get("journal_key") != self.journal_key
+            for line in ([] if stale else f):
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # The last line may be cut short by the crash
+                    continue
+                record = by_keyframe.get(entry.pop("keyframe", None))
+                if record is None:
+                    continue
+                for name, value in entry.items():
+                    if name in COLUMNS:
+                        setattr(record, name, value)
+                applied += 1
+        if stale:
+            os.remove(self.journal_path)
+        return applied
+
+    def clear(self, *fields: str) -> None:
+        """
+        Reset fields on every record, so the stages filling them run again.
+        """
+        for record in self.records:
+            for name in fields:
+                setattr(record, name, None)
+
+    def important(self) -> List[FrameRecord]:
+        """
+        Records that passed both the quality rules and the LLM evaluation.
+        """
+        return [r for r in self.records if r.feature_flag == "important" and r.llm_flag == "important"]
+
+    def to_dataframe(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            {name: [getattr(r, name) for r in self.records] for name in COLUMNS},
+            dtype="string"
+        )
+
+    def save(self, path: str) -> str:
+        """
+        Write the table atomically. ".parquet" paths are written as Parquet when pyarrow is
+        installed, and as CSV next to them (same name, ".csv" suffix) otherwise.
+
+        Returns:
+            str: The path actually written.
+        """
+        if path.endswith(".parquet") and importlib.util.find_spec("pyarrow") is None:
+            print("⚠️ pyarrow is not installed, writing CSV instead of Parquet")
+            path = path[:-len(".parquet")] + ".csv"
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        tmp_path = f"{path}.tmp"
+        df = self.to_dataframe()
+        if path.endswith(".parquet"):
+            df.to_parquet(tmp_path, index=False)
+        else:
+            df.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, path)
+        return path
+
+    def close_journal(self, remove: bool = False) -> None:
+        """
+        Close the journal; `remove` deletes it once the table has been saved.
+        """
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+        if remove and self.journal_path and os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
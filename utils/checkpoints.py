@@ -0,0 +1,231 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+
+# Name of the file describing a finished stage inside its directory
+MANIFEST = "manifest.json"
+
+
+def file_sha256(path: str, block_size: int = 1 << 20) -> str:
+    """
+    SHA-256 of a file's content, read in blocks so large videos are never loaded at once.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _path_bytes(path: str) -> int:
+    """Size of a file, or total size of the files below a directory."""
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path)
+        for name in names
+    )
+
+class Stage:
+    """
+    One checkpointed pipeline stage of a job, stored in its own directory.
+
+    The stage key hashes the stage parameters together with its inputs (the video hash or the
+    keys of the upstream stages). `fresh()` is true when the stored manifest has the same key
+    and all recorded outputs are still present, so the stage can be skipped. Because keys
+    chain through the inputs, changing a parameter re-runs that stage and everything after it.
+
+    Args:
+        job_dir (str): Directory of the job.
+        name (str): Stage name, also the name of its directory.
+        params (dict): Settings that change the stage output.
+        inputs (dict): Identities of the stage inputs, e.g. {"video": <sha256>} or
+            {"transcription": <stage key>}.
+    """
+
+    def __init__(self, job_dir: str, name: str, params: dict = None, inputs: dict = None):
+        self.name = name
+        self.dir = os.path.join(job_dir, name)
+        self.params = params or {}
+        self.inputs = inputs or {}
+        payload = json.dumps({"stage": name, "params": self.params, "inputs": self.inputs}, sort_keys=True, default=str)
+        self.key = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def path(self, *parts: str) -> str:
+        return os.path.join(self.dir, *parts)
+
+    def manifest(self) -> dict:
+        try:
+            with open(self.path(MANIFEST), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def fresh(self) -> bool:
+        """
+        Whether the stored outputs were produced from the same parameters and inputs.
+        """
+        manifest = self.manifest()
+        if not manifest or manifest.get("key") != self.key:
+            return False
+        for output in manifest.get("outputs", {}).values():
+            path = self.path(output["path"])
+            if not os.path.exists(path):
+                return False
+            # Directories such as the vector DB are rewritten when opened, so only files are size-checked
+            if os.path.isfile(path) and os.path.getsize(path) != output["bytes"]:
+                return False
+        return True
+
+    def output(self, name: str) -> str:
+        """
+        Absolute path of a recorded output.
+
+        Raises:
+            KeyError: If the stage has no manifest or no output called `name`.
+        """
+        manifest = self.manifest() or {}
+        return self.path(manifest.get("outputs", {})[name]["path"])
+
+    def begin(self) -> None:
+        """
+        Discards stale outputs before the stage runs again.
+        """
+        shutil.rmtree(self.dir, ignore_errors=True)
+        os.makedirs(self.dir, exist_ok=True)
+
+    def commit(self, outputs: dict) -> None:
+        """
+        Records the outputs of a finished run, making the stage fresh.
+
+        Args:
+            outputs (dict): Output name -> file or directory path inside the stage directory
+                (relative to it or absolute).
+        """
+        recorded = {}
+        for name, path in outputs.items():
+            full = path if os.path.isabs(path) else self.path(path)
+            recorded[name] = {"path": os.path.relpath(full, self.dir), "bytes": _path_bytes(full)}
+
+        manifest = {
+            "stage": self.name,
+            "key": self.key,
+            "params": self.params,
+            "inputs": self.inputs,
+            "outputs": recorded,
+            "created_at": time.time()
+        }
+        os.makedirs(self.dir, exist_ok=True)
+        tmp_path = self.path(MANIFEST + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2, default=str)
+        os.replace(tmp_path, self.path(MANIFEST))
+
+class Job:
+    """
+    Checkpoint directory of one video, named after the hash of its content.
+
+    Attributes:
+        dir (str): Job directory.
+        video_hash (str): SHA-256 of the video file.
+    """
+
+    def __init__(self, job_dir: str, video_hash: str):
+        self.dir = job_dir
+        self.video_hash = video_hash
+
+    def stage(self, name: str, params: dict = None, inputs: dict = None) -> Stage:
+        return Stage(self.dir, name, params, inputs)
+
+class JobStore:
+    """
+    Content-addressed job directories, one per video, with size-bounded eviction.
+
+    Video hashes are remembered per (path, size, modification time), so an unchanged video
+    is hashed only once. `evict` removes the least recently used jobs once the store grows
+    past `max_bytes`.
+
+    Args:
+        root (str): Directory holding the jobs.
+        max_bytes (int): Size cap of all jobs together, in bytes.
+    """
+
+    def __init__(self, root: str = "tmp/jobs", max_bytes: int = 5 * 1024 ** 3):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+        self._hashes_path = os.path.join(root, "hashes.json")
+
+    def _load_hashes(self) -> dict:
+        try:
+            with open(self._hashes_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_hashes(self, hashes: dict) -> None:
+        tmp_path = self._hashes_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(hashes, f)
+        os.replace(tmp_path, self._hashes_path)
+
+    def video_hash(self, video_path: str) -> str:
+        stat = os.stat(video_path)
+        stamp = f"{os.path.abspath(video_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+        hashes = self._load_hashes()
+        if stamp not in hashes:
+            hashes[stamp] = file_sha256(video_path)
+            self._save_hashes(hashes)
+        return hashes[stamp]
+
+    def job(self, video_path: str) -> Job:
+        """
+        Job of a video, created if needed and marked as the most recently used.
+        """
+        video_hash = self.video_hash(video_path)
+        job_dir = os.path.join(self.root, video_hash[:16])
+        os.makedirs(job_dir, exist_ok=True)
+        os.utime(job_dir)
+        return Job(job_dir, video_hash)
+
+    def evict(self, keep: tuple = ()) -> list:
+        """
+        Deletes least recently used jobs until the store fits in `max_bytes`, together with
+        the remembered hashes that pointed at them.
+
+        Args:
+            keep (tuple): Job directories that must not be deleted, e.g. the current job.
+
+        Returns:
+            list: Deleted job directories.
+        """
+        keep = {os.path.abspath(path) for path in keep}
+        jobs = [
+            os.path.join(self.root, name) for name in os.listdir(self.root)
+            if os.path.isdir(os.path.join(self.root, name))
+        ]
+        sizes = {path: _path_bytes(path) for path in jobs}
+        total = sum(sizes.values())
+
+        deleted = []
+        for path in sorted(jobs, key=os.path.getmtime):
+            if total <= self.max_bytes:
+                break
+            if os.path.abspath(path) in keep:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            total -= sizes[path]
+            deleted.append(path)
+
+        if deleted:
+            # Drop hashes whose job is gone, so hashes.json does not grow with every video ever seen
+            hashes = self._load_hashes()
+            kept = {
+                stamp: video_hash for stamp, video_hash in hashes.items()
+                if os.path.isdir(os.path.join(self.root, video_hash[:16]))
+            }
+            if len(kept) != len(hashes):
+                self._save_hashes(kept)
+        return deleted
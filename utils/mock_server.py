@@ -0,0 +1,354 @@
+import argparse
+import json
+import random
+import re
+import struct
+import threading
+import time
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Fallback for compressed uploads whose duration is not in the header (FLAC written to a pipe)
+DEFAULT_BYTES_PER_SECOND = 16000
+
+class MockConfig:
+    """
+    Behaviour of the mock server, shared by all handler threads.
+
+    Args:
+        latency (float): Base delay of every response, in seconds.
+        jitter (float): Uniform random delay added on top of `latency`, in seconds.
+        latency_per_audio_sec (float): Extra delay per second of uploaded audio.
+        error_rate (float): Probability of answering with a 500 error.
+        rate_limit_rate (float): Probability of answering with a 429 error.
+        requests_per_minute (int, optional): Answer 429 once more requests than this arrived
+            in the last minute, like the real providers.
+        retry_after (float): Value of the `Retry-After` header sent with 429 responses.
+        bytes_per_second (int): Upload size per second of audio when the file header does not say.
+        stream_token_delay (float): Delay between the chunks of a streamed chat completion, in seconds.
+        seed (int, optional): Seed of the random error injection.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.2,
+        jitter: float = 0.0,
+        latency_per_audio_sec: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        requests_per_minute: int = None,
+        retry_after: float = 1.0,
+        bytes_per_second: int = DEFAULT_BYTES_PER_SECOND,
+        stream_token_delay: float = 0.0,
+        seed: int = None
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.latency_per_audio_sec = latency_per_audio_sec
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.requests_per_minute = requests_per_minute
+        self.retry_after = retry_after
+        self.bytes_per_second = bytes_per_second
+        self.stream_token_delay = stream_token_delay
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.recent = []
+        self.stats = {"requests": 0, "transcriptions": 0, "chat": 0, "errors": 0, "rate_limited": 0, "audio_seconds": 0.0}
+
+    def count(self, key: str, amount=1) -> None:
+        with self.lock:
+            self.stats[key] += amount
+
+    def inject(self):
+        """
+        Decides whether the current request fails. Returns an HTTP status code or None.
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.stats["requests"] += 1
+            if self.requests_per_minute:
+                self.recent = [t for t in self.recent if now - t < 60]
+                if len(self.recent) >= self.requests_per_minute:
+                    self.stats["rate_limited"] += 1
+                    return 429
+                self.recent.append(now)
+            roll = self.random.random()
+            if roll < self.rate_limit_rate:
+                self.stats["rate_limited"] += 1
+                return 429
+            if roll < self.rate_limit_rate + self.error_rate:
+                self.stats["errors"] += 1
+                return 500
+            return None
+
+    def delay(self, audio_seconds: float = 0.0) -> float:
+        with self.lock:
+            jitter = self.random.uniform(0, self.jitter) if self.jitter else 0.0
+        return self.latency + jitter + audio_seconds * self.latency_per_audio_sec
+
+def _audio_duration(data: bytes, bytes_per_second: int) -> float:
+    """
+    Reads the duration from a WAV or FLAC header, or estimates it from the upload size.
+    """
+    if data[:4] == b"RIFF" and data[8:12] == b"WAVE":
+        channels, sample_rate = struct.unpack("<HI", data[22:28])
+        bits = struct.unpack("<H", data[34:36])[0]
+        data_at = data.find(b"data", 36)
+        if data_at != -1 and sample_rate and channels and bits:
+            return (len(data) - data_at - 8) / (sample_rate * channels * bits // 8)
+    if data[:4] == b"fLaC" and len(data) >= 26:
+        # STREAMINFO: 20-bit sample rate followed by 36-bit total sample count
+        info = int.from_bytes(data[18:26], "big")
+        sample_rate = info >> 44
+        total_samples = info & ((1 << 36) - 1)
+        if sample_rate and total_samples:
+            return total_samples / sample_rate
+    return len(data) / bytes_per_second
+
+def _transcription(duration: float, granularity: str, segment_sec: float = 5.0) -> dict:
+    """
+    Builds a Whisper `verbose_json` response covering `duration` seconds.
+    """
+    segments, words = [], []
+    start, k = 0.0, 0
+    while start < duration:
+        end = min(start + segment_sec, duration)
+        text = f" mock segment {k}"
+        segments.append({
+            "id": k, "seek": 0, "start": round(start, 3), "end": round(end, 3), "text": text,
+            "tokens": [], "temperature": 0.0, "avg_logprob": -0.1, "compression_ratio": 1.0, "no_speech_prob": 0.0
+        })
+        pieces = text.split()
+        step = (end - start) / len(pieces)
+        words.extend(
+            {"word": piece, "start": round(start + j * step, 3), "end": round(start + (j + 1) * step, 3)}
+            for j, piece in enumerate(pieces)
+        )
+        start, k = end, k + 1
+
+    result = {
+        "task": "transcribe", "language": "mock", "duration": round(duration, 3),
+        "text": "".join(s["text"] for s in segments), "segments": segments
+    }
+    if granularity == "word":
+        result["words"] = words
+    return result
+
+def _chat_reply(prompt: str) -> str:
+    """
+    Returns a reply in the format the calling prompt asks for.
+    """
+    if '"importance"' in prompt and '"explanation"' in prompt:
+        analysis = {
+            "importance": "important", "reason": "Mock evaluation.",
+            "explanation": "Mock explanation of the frame.", "summary": "Mock summary of the frame."
+        }
+        names = re.findall(r"`([^`]+)`", prompt.split("\n\n")[1]) if '"frame"' in prompt else []
+        if names:
+            return json.dumps([{"frame": name, **analysis} for name in names])
+        return json.dumps(analysis)
+    if '"importance"' in prompt:
+        return '{ "importance": "important", "reason": "Mock evaluation." }'
+    if "Explanation:" in prompt:
+        return "Explanation: Mock explanation of the frame.\nSummary: Mock summary of the frame."
+    if '"parts"' in prompt:
+        # Topic merge plan: headings with the same title are merged
+        plan = {}
+        for topic_id, title in re.findall(r"^- (\d+\.\d+): (.*)$", prompt, re.MULTILINE):
+            plan.setdefault(title, []).append(topic_id)
+        return json.dumps([{"title": title, "parts": parts} for title, parts in plan.items()])
+    part = re.search(r"this is part (\d+) of", prompt)
+    if part:
+        # Each section ends with the topic the next one starts with
+        k = int(part.group(1))
+        return (
+            f"## Mock Topic {k}\n\n- Mock summary of part {k}.\n\n"
+            f"## Mock Topic {k + 1}\n\n- Mock start of topic {k + 1}.\n"
+        )
+    return "## Mock Topic\n\n- Mock summary of the transcript.\n"
+
+def _prompt_text(messages: list) -> str:
+    texts = []
+    for message in messages:
+        content = message.get("content", "")
+        if isinstance(content, str):
+            texts.append(content)
+        else:
+            texts.extend(part.get("text", "") for part in content if part.get("type") == "text")
+    return "\n".join(texts)
+
+class MockHandler(BaseHTTPRequestHandler):
+    """
+    Answers the transcription, chat-completion and Gemini `generateContent` calls of the pipeline.
+
+    Paths are matched by suffix, so the same server stands in for
+    Groq (`GROQ_BASE_URL`, which the Groq SDK reads itself), Fireworks (`FIREWORKS_AUDIO_ENDPOINT`)
+    and Gemini (`GEMINI_API_ENDPOINT`).
+    """
+
+    protocol_version = "HTTP/1.1"
+    config = MockConfig()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload: dict, headers: dict = None) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status: int) -> None:
+        headers = {"Retry-After": str(self.config.retry_after)} if status == 429 else None
+        message = "Rate limit reached (mock)" if status == 429 else "Internal server error (mock)"
+        self._send_json(status, {"error": {"message": message, "type": "mock_error", "code": status}}, headers)
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/stats":
+            with self.config.lock:
+                self._send_json(200, dict(self.config.stats))
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        path = self.path.split("?")[0]
+
+        if path.endswith("/audio/transcriptions"):
+            self._transcribe(body)
+        elif path.endswith("/chat/completions"):
+            self._chat(json.loads(body or b"{}"))
+        elif path.endswith(":generateContent"):
+            self._generate_content(json.loads(body or b"{}"))
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+    def _transcribe(self, body: bytes) -> None:
+        message = BytesParser(policy=HTTP).parsebytes(
+            f"Content-Type: {self.headers.get('Content-Type', '')}\r\n\r\n".encode() + body
+        )
+        audio, granularity = b"", "segment"
+        for part in message.iter_parts():
+            name = part.get_param("name", header="content-disposition")
+            if name == "file":
+                audio = part.get_payload(decode=True) or b""
+            elif name and name.startswith("timestamp_granularities"):
+                granularity = part.get_content().strip()
+
+        duration = _audio_duration(audio, self.config.bytes_per_second)
+        time.sleep(self.config.delay(duration))
+        status = self.config.inject()
+        if status:
+            return self._send_error(status)
+
+        self.config.count("transcriptions")
+        self.config.count("audio_seconds", duration)
+        self._send_json(200, _transcription(duration, granularity))
+
+    def _chat(self, request: dict) -> None:
+        time.sleep(self.config.delay())
+        status = self.config.inject()
+        if status:
+            return self._send_error(status)
+
+        self.config.count("chat")
+        reply = _chat_reply(_prompt_text(request.get("messages", [])))
+        created, model = int(time.time()), request.get("model", "mock")
+
+        if not request.get("stream"):
+            return self._send_json(200, {
+                "id": "chatcmpl-mock", "object": "chat.completion", "created": created, "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": reply}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 0, "completion_tokens": len(reply.split()), "total_tokens": len(reply.split())}
+            })
+
+        # Server-sent events, one chunk per word, as in the OpenAI-compatible streaming API
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        pieces = re.findall(r"\s*\S+\s*", reply) + [None]
+        for piece in pieces:
+            time.sleep(self.config.stream_token_delay)
+            delta = {"content": piece} if piece is not None else {}
+            chunk = {
+                "id": "chatcmpl-mock", "object": "chat.completion.chunk", "created": created, "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": None if piece is not None else "stop"}]
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.close_connection = True
+
+    def _generate_content(self, request: dict) -> None:
+        time.sleep(self.config.delay())
+        status = self.config.inject()
+        if status:
+            return self._send_error(status)
+
+        self.config.count("chat")
+        prompt = "\n".join(
+            part.get("text", "") for content in request.get("contents", []) for part in content.get("parts", [])
+        )
+        self._send_json(200, {
+            "candidates": [{
+                "content": {"role": "model", "parts": [{"text": _chat_reply(prompt)}]},
+                "finishReason": "STOP", "index": 0
+            }]
+        })
+
+def run_mock_server(host: str = "127.0.0.1", port: int = 8765, config: MockConfig = None) -> ThreadingHTTPServer:
+    """
+    Starts the mock server in a background thread.
+
+    Args:
+        host (str): Interface to bind.
+        port (int): Port to bind (0 picks a free one, see `server.server_port`).
+        config (MockConfig, optional): Latency and error injection settings.
+
+    Returns:
+        ThreadingHTTPServer: The running server; call `shutdown()` to stop it.
+    """
+    handler = type("ConfiguredMockHandler", (MockHandler,), {"config": config or MockConfig()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for the Groq, Fireworks and Gemini APIs.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2, help="base delay per response (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="random extra delay (s)")
+    parser.add_argument("--latency-per-audio-sec", type=float, default=0.0, help="extra delay per second of audio (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="probability of a 500 response")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="probability of a 429 response")
+    parser.add_argument("--rpm", type=int, default=None, help="requests per minute before answering 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After header of 429 responses (s)")
+    parser.add_argument("--stream-token-delay", type=float, default=0.0, help="delay between streamed chunks (s)")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    server = run_mock_server(args.host, args.port, MockConfig(
+        latency=args.latency, jitter=args.jitter, latency_per_audio_sec=args.latency_per_audio_sec,
+        error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate, requests_per_minute=args.rpm,
+        retry_after=args.retry_after, stream_token_delay=args.stream_token_delay, seed=args.seed
+    ))
+    url = f"http://{args.host}:{server.server_port}"
+    print(f"🧪 Mock API server listening on {url}")
+    print(f"   GROQ_BASE_URL={url}")
+    print(f"   FIREWORKS_AUDIO_ENDPOINT={url}/v1/audio/transcriptions")
+    print(f"   GEMINI_API_ENDPOINT={url}")
+    print(f"   stats: {url}/stats")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,310 @@
+import asyncio
+import random
+import re
+import threading
+import time
+from email.utils import parsedate_to_datetime
+import httpx
+import requests
+from groq import APIConnectionError
+
+# Statuses worth retrying: timeouts, conflicts, rate limits and server-side failures
+RETRYABLE_STATUS = {408, 409, 425, 429, 500, 502, 503, 504}
+# Network-level failures of the HTTP clients used by the providers
+NETWORK_ERRORS = (ConnectionError, TimeoutError, requests.ConnectionError, requests.Timeout, httpx.TransportError, APIConnectionError)
+
+class CircuitOpenError(RuntimeError):
+    """
+    Raised instead of calling a provider whose circuit breaker is open.
+    """
+
+class FailureInfo:
+    """
+    What a failed provider call means for the retry policy.
+
+    Attributes:
+        retryable (bool): Whether the same call may succeed if repeated.
+        status (int, optional): HTTP status of the response, if there was one.
+        retry_after (float, optional): Server-requested wait in seconds, from `Retry-After` or
+            rate-limit reset headers.
+    """
+
+    __slots__ = ("retryable", "status", "retry_after")
+
+    def __init__(self, retryable: bool, status: int = None, retry_after: float = None):
+        self.retryable = retryable
+        self.status = status
+        self.retry_after = retry_after
+
+    @property
+    def rate_limited(self) -> bool:
+        return self.status == 429
+
+def _parse_duration(value: str):
+    """
+    Parses `"7.66s"`, `"2m59.56s"`, `"120ms"` or a bare number of seconds.
+    """
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    units = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+    parts = re.findall(r"([\d.]+)(ms|h|m|s)", value)
+    if not parts or "".join(n + u for n, u in parts) != value:
+        return None
+    return sum(float(n) * units[u] for n, u in parts)
+
+def retry_after_from_headers(headers) -> float:
+    """
+    Reads the wait requested by the server from `Retry-After` (seconds or HTTP date),
+    `retry-after-ms`, or the `x-ratelimit-reset-*` headers sent by Groq/OpenAI-style APIs.
+
+    Returns:
+        float: Seconds to wait, or None if the headers do not say.
+    """
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value:
+        seconds = _parse_duration(value)
+        if seconds is not None:
+            return seconds / 1000
+    value = headers.get("retry-after")
+    if value:
+        seconds = _parse_duration(value)
+        if seconds is not None:
+            return seconds
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            pass
+    resets = [
+        _parse_duration(headers.get(name))
+        for name in ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens", "x-ratelimit-reset-audio-seconds")
+        if headers.get(name)
+    ]
+    resets = [r for r in resets if r is not None]
+    return max(resets) if resets else None
+
+def _response_of(error):
+    response = getattr(error, "response", None)
+    status = getattr(error, "status_code", None) or getattr(response, "status_code", None)
+    return status, response
+
+def classify_error(error: Exception) -> FailureInfo:
+    """
+    Decides whether a provider error is retryable and how long the server asked to wait.
+
+    The error and its causes (`raise ... from e`) are inspected, so wrapped SDK and HTTP errors
+    are recognized. Errors that are neither network failures nor retryable HTTP statuses (bad
+    requests, authentication, missing files, parsing bugs) are not retryable.
+    """
+    seen = set()
+    current = error
+    while current is not None and id(current) not in seen:
+        seen.add(id(current))
+        status, response = _response_of(current)
+        if status:
+            headers = getattr(response, "headers", None)
+            return FailureInfo(status in RETRYABLE_STATUS or status >= 500, status, retry_after_from_headers(headers))
+        if isinstance(current, NETWORK_ERRORS):
+            return FailureInfo(True)
+        current = current.__cause__ or current.__context__
+    return FailureInfo(False)
+
+class CircuitBreaker:
+    """
+    Per-provider circuit breaker.
+
+    After `failure_threshold` consecutive retryable failures (network errors, 5xx) the circuit
+    opens and calls fail fast with `CircuitOpenError` for `reset_timeout` seconds. Then a single
+    trial call is let through: success closes the circuit, failure opens it again. Rate limits
+    and client errors do not count, since the provider itself is up.
+
+    Args:
+        name (str): Provider name, used in error messages.
+        failure_threshold (int): Consecutive failures that open the circuit.
+        reset_timeout (float): Seconds the circuit stays open before a trial call.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self.lock:
+            if self.opened_at is None:
+                return "closed"
+            return "half_open" if time.monotonic() - self.opened_at >= self.reset_timeout else "open"
+
+    def before_call(self) -> bool:
+        """
+        Raises `CircuitOpenError` if the call must not be made now.
+
+        Returns:
+            bool: True if this call is the half-open trial; the caller must then end it with
+            `record_success`, `record_failure` or `end_trial`.
+        """
+        with self.lock:
+            if self.opened_at is None:
+                return False
+            if time.monotonic() - self.opened_at >= self.reset_timeout and not self.trial_running:
+                self.trial_running = True
+                return True
+        raise CircuitOpenError(f"{self.name} circuit is open after {self.failures} consecutive failures")
+
+    def record_success(self) -> None:
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+
+    def end_trial(self) -> None:
+        """
+        Releases the half-open trial without a verdict, e.g. when the attempt was interrupted.
+        """
+        with self.lock:
+            self.trial_running = False
+
+    def record_failure(self, info: FailureInfo) -> None:
+        if not info.retryable or info.rate_limited:
+            with self.lock:
+                self.trial_running = False
+            return
+        with self.lock:
+            self.failures += 1
+            if self.trial_running or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self.trial_running = False
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+def get_breaker(name: str, **options) -> CircuitBreaker:
+    """
+    Returns the process-wide circuit breaker of a provider, creating it on first use.
+    """
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name, **options)
+        return _breakers[name]
+
+class RetryPolicy:
+    """
+    Shared retry policy for transcription and LLM calls.
+
+    Retryable failures are retried up to `max_attempts` calls in total. Between attempts the
+    policy waits for the server-requested time when there is one (capped at `max_retry_after`),
+    and otherwise uses exponential backoff with full jitter: a uniform draw in
+    [0, min(max_delay, base_delay * 2 ** attempt)]. Non-retryable errors are raised at once.
+
+    Args:
+        max_attempts (int): Maximum number of calls, including the first.
+        base_delay (float): Backoff scale in seconds.
+        max_delay (float): Cap of the backoff delay in seconds.
+        max_retry_after (float): Cap of server-requested waits in seconds.
+    """
+
+    def __init__(self, max_attempts: int = 5, base_delay: float = 1.0, max_delay: float = 30.0, max_retry_after: float = 120.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+
+    def delay(self, attempt: int, info: FailureInfo) -> float:
+        """
+        Seconds to wait after the failed attempt number `attempt` (0-based).
+        """
+        if info.retry_after is not None:
+            return min(info.retry_after, self.max_retry_after)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def _failed(self, error, attempt, breaker):
+        info = classify_error(error)
+        if breaker is not None:
+            breaker.record_failure(info)
+        if not info.retryable or attempt == self.max_attempts - 1:
+            return info, None
+        return info, self.delay(attempt, info)
+
+    def call(self, fn, *args, breaker: CircuitBreaker = None, before_attempt=None, on_wait=None, **kwargs):
+        """
+        Calls `fn(*args, **kwargs)` under the policy.
+
+        Args:
+            fn (callable): The provider call.
+            breaker (CircuitBreaker, optional): Breaker checked before and updated after each attempt.
+            before_attempt (callable, optional): Called before each attempt, e.g. to acquire a rate limiter.
+            on_wait (callable, optional): `on_wait(seconds, info)` replaces the sleep between
+                attempts, e.g. to pause a shared rate limiter on 429.
+
+        Returns:
+            The result of `fn`.
+
+        Raises:
+            CircuitOpenError: If the breaker is open.
+            Exception: The last error when it is not retryable or attempts are exhausted.
+        """
+        for attempt in range(self.max_attempts):
+            trial = breaker.before_call() if breaker is not None else False
+            try:
+                if before_attempt is not None:
+                    before_attempt()
+                try:
+                    result = fn(*args, **kwargs)
+                except Exception as e:
+                    info, wait = self._failed(e, attempt, breaker)
+                    if wait is None:
+                        raise
+                else:
+                    if breaker is not None:
+                        breaker.record_success()
+                    return result
+            finally:
+                # An interrupted trial (limiter error, KeyboardInterrupt, ...) must not leave
+                # the breaker half-open forever
+                if trial:
+                    breaker.end_trial()
+            if on_wait is not None:
+                on_wait(wait, info)
+            else:
+                time.sleep(wait)
+
+    async def acall(self, fn, *args, breaker: CircuitBreaker = None, before_attempt=None, on_wait=None, **kwargs):
+        """
+        Async variant of `call` for coroutine functions. `before_attempt` and `on_wait` may be
+        plain or coroutine functions; blocking ones should be wrapped by the caller.
+        """
+        for attempt in range(self.max_attempts):
+            trial = breaker.before_call() if breaker is not None else False
+            try:
+                if before_attempt is not None:
+                    ready = before_attempt()
+                    if asyncio.iscoroutine(ready):
+                        await ready
+                try:
+                    result = await fn(*args, **kwargs)
+                except Exception as e:
+                    info, wait = self._failed(e, attempt, breaker)
+                    if wait is None:
+                        raise
+                else:
+                    if breaker is not None:
+                        breaker.record_success()
+                    return result
+            finally:
+                # Also covers cancellation of the task while the trial is running
+                if trial:
+                    breaker.end_trial()
+            waited = on_wait(wait, info) if on_wait is not None else asyncio.sleep(wait)
+            if asyncio.iscoroutine(waited):
+                await waited
+
+DEFAULT_POLICY = RetryPolicy()
@@ -0,0 +1,181 @@
+import sys
+import time
+import numpy as np
+import cv2
+
+# Same constants as skimage.metrics.structural_similarity defaults for uint8 images
+_WIN_SIZE = 7
+_NP = _WIN_SIZE ** 2
+_COV_NORM = _NP / (_NP - 1)
+_C1 = (0.01 * 255) ** 2
+_C2 = (0.03 * 255) ** 2
+
+def _box_sums(image):
+    """
+    Sums every 7x7 window lying fully inside a float64 image.
+
+    The inputs hold integer values (pixels or pixel products), so the sums are exact.
+    """
+    pad = (_WIN_SIZE - 1) // 2
+    sums = cv2.boxFilter(image, cv2.CV_64F, (_WIN_SIZE, _WIN_SIZE), normalize=False)
+    return sums[pad:-pad, pad:-pad]
+
+class SSIMStats:
+    """
+    Per-frame terms of SSIM that do not depend on the frame it is compared with.
+
+    Computing the local means and variances once per frame leaves only the cross term
+    (local covariance) to be computed per pair.
+
+    Attributes:
+        pixels (np.ndarray): The grayscale image as float64.
+        mu (np.ndarray): Local 7x7 means over the valid (uncropped) region.
+        mu_sq (np.ndarray): Squared local means.
+        var (np.ndarray): Local 7x7 sample variances over the valid region.
+    """
+
+    __slots__ = ("pixels", "mu", "mu_sq", "var")
+
+    def __init__(self, gray):
+        self.pixels = gray.astype(np.float64)
+        self.mu = _box_sums(self.pixels) / _NP
+        self.mu_sq = self.mu * self.mu
+        self.var = _COV_NORM * (_box_sums(self.pixels * self.pixels) / _NP - self.mu_sq)
+
+def ssim_pair(a, b):
+    """
+    Computes the mean SSIM of two frames from their precomputed statistics.
+
+    Matches `skimage.metrics.structural_similarity(a, b)` on uint8 grayscale images with the
+    default settings (7x7 uniform window, sample covariance, edges cropped).
+
+    Args:
+        a (SSIMStats): Statistics of the first frame.
+        b (SSIMStats): Statistics of the second frame (same image size).
+
+    Returns:
+        float: Mean SSIM score.
+    """
+    # Only the cross term is computed per pair; everything else is updated in place
+    cov_term = _box_sums(a.pixels * b.pixels)
+    mean_term = a.mu * b.mu
+    cov_term /= _NP
+    cov_term -= mean_term
+    cov_term *= 2 * _COV_NORM
+    cov_term += _C2
+    mean_term *= 2
+    mean_term += _C1
+    mean_term *= cov_term
+
+    denominator = np.add(a.mu_sq, b.mu_sq)
+    denominator += _C1
+    var_term = np.add(a.var, b.var)
+    var_term += _C2
+    denominator *= var_term
+
+    mean_term /= denominator
+    return float(mean_term.mean(dtype=np.float64))
+
+def ssim_batch(stats, others):
+    """
+    Computes the mean SSIM between one frame and each of several others in one pass.
+
+    The pixel products with every other frame are laid side by side and box-summed with a
+    single filter call; windows never straddle two frames inside the valid region, so the
+    result equals `ssim_pair` for each pair.
+
+    Args:
+        stats (SSIMStats): Precomputed statistics of the candidate frame.
+        others (sequence): `SSIMStats` of the frames to compare against (same image size).
+
+    Returns:
+        np.ndarray: One SSIM score per entry of `others`.
+    """
+    if not len(others):
+        return np.empty(0, dtype=np.float64)
+    height, width = stats.pixels.shape
+    pad = (_WIN_SIZE - 1) // 2
+
+    products = np.stack([other.pixels for other in others], axis=1)
+    products *= stats.pixels[:, np.newaxis, :]
+    sums = cv2.boxFilter(products.reshape(height, -1), cv2.CV_64F, (_WIN_SIZE, _WIN_SIZE), normalize=False)
+    cov_term = sums.reshape(height, len(others), width)[pad:-pad, :, pad:-pad].transpose(1, 0, 2)
+
+    mu = np.stack([other.mu for other in others])
+    mu_sq = np.stack([other.mu_sq for other in others])
+    var = np.stack([other.var for other in others])
+
+    mean_term = stats.mu * mu
+    cov_term = (cov_term / _NP - mean_term) * (2 * _COV_NORM) + _C2
+    mean_term = (mean_term * 2 + _C1) * cov_term
+    denominator = (stats.mu_sq + mu_sq + _C1) * (stats.var + var + _C2)
+    return (mean_term / denominator).mean(axis=(1, 2), dtype=np.float64)
+
+def ssim(gray_a, gray_b):
+    """
+    Mean SSIM between two uint8 grayscale images (see `ssim_pair`).
+    """
+    return ssim_pair(SSIMStats(gray_a), SSIMStats(gray_b))
+
+def benchmark_ssim(n_frames=1000, window=5, size=128, seed=0, tolerance=1e-10):
+    """
+    Compares `ssim_batch` against skimage on the windowed comparison pattern of `hash_filter`.
+
+    Each of `n_frames` synthetic frames is compared with its `window` predecessors. Reports the
+    maximum absolute difference to skimage and the wall-clock time of both implementations,
+    and fails if `ssim_batch` or `ssim_pair` is further than `tolerance` from skimage.
+
+    Args:
+        n_frames (int, optional): Number of synthetic frames. Defaults to 1000.
+        window (int, optional): Number of preceding frames each frame is compared with. Defaults to 5.
+        size (int, optional): Side length of the square frames. Defaults to 128.
+        seed (int, optional): Random seed for the synthetic frames. Defaults to 0.
+        tolerance (float, optional): Largest accepted absolute difference. Defaults to 1e-10.
+
+    Returns:
+        dict: "max_abs_error", "skimage_sec" and "fast_sec".
+
+    Raises:
+        AssertionError: If a score differs from skimage by more than `tolerance`.
+    """
+    from skimage.metrics import structural_similarity
+
+    rng = np.random.default_rng(seed)
+    base = rng.integers(0, 256, (n_frames // 10 + 1, size // 8, size // 8), dtype=np.uint8)
+    grays = []
+    for i in range(n_frames):
+        frame = cv2.resize(base[i // 10], (size, size), interpolation=cv2.INTER_LINEAR)
+        noise = rng.integers(-8, 9, frame.shape)
+        grays.append(np.clip(frame.astype(int) + noise, 0, 255).astype(np.uint8))
+
+    start = time.perf_counter()
+    expected = [
+        [structural_similarity(grays[i], grays[j]) for j in range(max(0, i - window), i)]
+        for i in range(n_frames)
+    ]
+    skimage_sec = time.perf_counter() - start
+
+    start = time.perf_counter()
+    stats = [SSIMStats(g) for g in grays]
+    got = [ssim_batch(stats[i], stats[max(0, i - window):i]) for i in range(n_frames)]
+    fast_sec = time.perf_counter() - start
+
+    max_abs_error = max(
+        (float(np.max(np.abs(np.asarray(e) - g))) for e, g in zip(expected, got) if len(e)),
+        default=0.0
+    )
+    pair_error = max(
+        (abs(ssim_pair(stats[i], stats[j]) - e[j - max(0, i - window)])
+         for i, e in enumerate(expected) for j in range(max(0, i - window), i)),
+        default=0.0
+    )
+    print(f"max |fast - skimage|: {max_abs_error:.3e}  (pairwise: {pair_error:.3e})")
+    if max(max_abs_error, pair_error) > tolerance:
+        raise AssertionError(
+            f"SSIM differs from skimage by {max(max_abs_error, pair_error):.3e} (tolerance {tolerance:.0e})"
+        )
+    print(f"skimage: {skimage_sec:.2f}s  fast: {fast_sec:.2f}s  speedup: {skimage_sec / fast_sec:.1f}x")
+    return {"max_abs_error": max_abs_error, "skimage_sec": skimage_sec, "fast_sec": fast_sec}
+
+if __name__ == "__main__":
+    benchmark_ssim(n_frames=int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
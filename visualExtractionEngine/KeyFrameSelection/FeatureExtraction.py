@@ -1,8 +1,12 @@
 import os
-import csv
+import sys
+import time
 import pandas as pd
 import av
 import cv2
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from .Quality import analysis_image, _score_gray
 
 def _get_timestamp(frame_idx, fps):
     """
@@ -22,58 +26,330 @@ def _get_timestamp(frame_idx, fps):
     ms = int((seconds - int(seconds)) * 1000)
     return f"{h:02d}:{m:02d}:{s:02d}.{ms:03d}"
 
-def process_video(video_path, interval_sec=3):
+def _frame_index(frame, fps, start_time):
+    """
+    Converts a decoded frame's presentation timestamp to a frame index.
+
+    Args:
+        frame (av.VideoFrame): Decoded frame carrying a valid `pts`.
+        fps (float): Frames per second of the video.
+        start_time (float): Start time of the stream in seconds.
+
+    Returns:
+        int: Index of the frame counted from the start of the stream.
+    """
+    return int(round((frame.time - start_time) * fps))
+
+def _decode_all(container, stream, fps, interval_sec):
+    """
+    Decodes every frame and keeps one out of each `interval` frames.
+    """
+    interval = int(fps * interval_sec)
+    for i, frame in enumerate(container.decode(stream)):
+        if i % interval == 0:
+            yield frame.to_ndarray(format="bgr24"), i
+
+def _seek_frame(container, stream, target_pts, half_frame):
+    """
+    Seeks to the keyframe preceding `target_pts` and decodes forward to the first frame
+    at or after it. Returns None when the target lies past the end of the stream.
+    """
+    container.seek(target_pts, stream=stream, backward=True, any_frame=False)
+    for frame in container.decode(stream):
+        if frame.pts is not None and frame.pts >= target_pts - half_frame:
+            return frame
+    return None
+
+def _decode_seek(container, stream, fps, interval_sec):
+    """
+    Seeks to each target timestamp and decodes forward from the preceding keyframe
+    until the first frame at or after the target.
+    """
+    time_base = stream.time_base
+    start_pts = stream.start_time or 0
+    start_time = float(start_pts * time_base)
+    if stream.duration:
+        duration = float(stream.duration * time_base)
+    else:
+        duration = container.duration / av.time_base
+    half_frame = int(0.5 / (fps * time_base))
+
+    target = 0.0
+    while target < duration:
+        target_pts = start_pts + int(target / time_base)
+        sampled = _seek_frame(container, stream, target_pts, half_frame)
+        if sampled is None:
+            break
+
+        yield sampled.to_ndarray(format="bgr24"), _frame_index(sampled, fps, start_time)
+        target += interval_sec
+
+def _decode_keyframes(container, stream, fps, interval_sec):
+    """
+    Decodes only keyframes (I-frames) and keeps the first one in each interval.
+    """
+    stream.codec_context.skip_frame = "NONKEY"
+    start_time = float((stream.start_time or 0) * stream.time_base)
+
+    next_time = 0.0
+    for frame in container.decode(stream):
+        if frame.pts is None:
+            continue
+        frame_time = frame.time - start_time
+        if frame_time + 1e-6 >= next_time:
+            yield frame.to_ndarray(format="bgr24"), _frame_index(frame, fps, start_time)
+            next_time = frame_time + interval_sec
+
+def _change_signal(frame, size=(64, 36), bins=32):
+    """
+    Cheap per-frame signal for scene detection: a tiny grayscale thumbnail and its normalized
+    luma histogram. swscale does the downscaling, so the full frame is never converted to BGR.
+    """
+    thumb = frame.reformat(width=size[0], height=size[1], format="gray").to_ndarray()
+    hist = np.bincount(thumb.ravel() // (256 // bins), minlength=bins) / thumb.size
+    return thumb.astype(np.int16), hist
+
+def _change_score(signal, reference, pixel_delta=32):
+    """
+    Scores how much a frame differs from a reference frame in [0, 1]: the larger of the luma
+    histogram's total variation distance and the fraction of thumbnail pixels that changed.
+    The second term catches slide changes that keep the same overall brightness.
+    """
+    thumb, hist = signal
+    ref_thumb, ref_hist = reference
+    hist_dist = 0.5 * float(np.abs(hist - ref_hist).sum())
+    changed = float(np.mean(np.abs(thumb - ref_thumb) > pixel_delta))
+    return max(hist_dist, changed)
+
+def _decode_scenes(container, stream, fps, interval_sec, min_gap_sec=1.0, change_threshold=0.08, probe_sec=0.5):
+    """
+    Emits frames only at detected scene/slide changes, with `interval_sec` as the maximum gap.
+
+    Every `probe_sec` a decoded frame is reduced to a cheap change signal and compared with the
+    last emitted frame. A frame is emitted when the change score exceeds `change_threshold`
+    and at least `min_gap_sec` have passed, or when `interval_sec` have passed without a change.
+    Non-reference frames are never needed for probing, so the decoder skips them.
+    """
+    stream.codec_context.skip_frame = "NONREF"
+    start_time = float((stream.start_time or 0) * stream.time_base)
+
+    reference = None
+    last_emit = None
+    next_probe = 0.0
+    for i, frame in enumerate(container.decode(stream)):
+        frame_time = frame.time - start_time if frame.pts is not None else i / fps
+        if frame_time + 1e-6 < next_probe:
+            continue
+        next_probe = frame_time + probe_sec
+
+        signal = _change_signal(frame)
+        if reference is None:
+            emit = True
+        else:
+            gap = frame_time - last_emit
+            emit = gap + 1e-6 >= interval_sec or (
+                gap + 1e-6 >= min_gap_sec and _change_score(signal, reference) > change_threshold
+            )
+
+        if emit:
+            reference = signal
+            last_emit = frame_time
+            yield frame.to_ndarray(format="bgr24"), int(round(frame_time * fps))
+
+_SAMPLERS = {
+    "decode": _decode_all,
+    "seek": _decode_seek,
+    "keyframes": _decode_keyframes,
+    "scene": _decode_scenes,
+}
+
+def video_info(video_path):
+    """
+    Reads the frame rate and frame size of a video's first video stream.
+
+    Args:
+        video_path (str): Path to the input video file.
+
+    Returns:
+        tuple:
+            - fps (float): Frames per second of the video.
+            - width (int): Frame width in pixels.
+            - height (int): Frame height in pixels.
+    """
+    with av.open(video_path) as container:
+        stream = container.streams.video[0]
+        return float(stream.average_rate), stream.codec_context.width, stream.codec_context.height
+
+def iter_frames(video_path, interval_sec=3, mode="decode", **sampler_options):
+    """
+    Lazily samples frames from a video, yielding each one as soon as it is decoded.
+
+    Only the frame being yielded is held in memory, which makes this the entry point of
+    the streaming keyframe pipeline. See `process_video` for the sampling modes.
+
+    Args:
+        video_path (str): Path to the input video file.
+        interval_sec (int, optional): Time interval in seconds between sampled frames. Defaults to 3.
+        mode (str, optional): Sampling strategy ("decode", "seek", "keyframes" or "scene"). Defaults to "decode".
+        **sampler_options: Extra tuning options of the chosen sampler, e.g. `min_gap_sec`,
+            `change_threshold` and `probe_sec` for "scene".
+
+    Yields:
+        tuple: (frame, frame_idx) for each sampled frame.
+
+    Raises:
+        ValueError: If `mode` is not a supported sampling strategy.
+    """
+    if mode not in _SAMPLERS:
+        raise ValueError(f"Unsupported sampling mode: {mode}")
+
+    container = av.open(video_path)
+    try:
+        stream = container.streams.video[0]
+        fps = float(stream.average_rate)
+        yield from _SAMPLERS[mode](container, stream, fps, interval_sec, **sampler_options)
+    finally:
+        container.close()
+
+def fetch_frames(video_path, frame_idxs):
+    """
+    Re-decodes full-resolution frames for the given frame indices by seeking to each one.
+
+    Used to write out the surviving keyframes once the filters have run on small per-frame
+    features only.
+
+    Args:
+        video_path (str): Path to the input video file.
+        frame_idxs (iterable): Frame indices to fetch.
+
+    Yields:
+        tuple: (frame, frame_idx) for each requested index, in ascending index order.
+    """
+    container = av.open(video_path)
+    try:
+        stream = container.streams.video[0]
+        fps = float(stream.average_rate)
+        time_base = stream.time_base
+        start_pts = stream.start_time or 0
+        half_frame = int(0.5 / (fps * time_base))
+
+        for frame_idx in sorted(frame_idxs):
+            target_pts = start_pts + int(frame_idx / fps / time_base)
+            frame = _seek_frame(container, stream, target_pts, half_frame)
+            if frame is not None:
+                yield frame.to_ndarray(format="bgr24"), frame_idx
+    finally:
+        container.close()
+
+def process_video(video_path, interval_sec=3, mode="decode", **sampler_options):
     """
     Samples frames from a video at fixed time intervals.
 
     Args:
         video_path (str): Path to the input video file.
         interval_sec (int, optional): Time interval in seconds between sampled frames. Defaults to 3.
+        mode (str, optional): Sampling strategy. Defaults to "decode".
+            - "decode": decode every frame and keep each `interval`-th one.
+            - "seek": seek to each target timestamp and decode only up to it, so the cost
+              grows with the number of samples rather than the video length.
+            - "keyframes": decode only I-frames and keep the first one in each interval;
+              fastest, but timestamps snap to the encoder's keyframe positions.
+            - "scene": keep frames only at detected scene/slide changes, at least `min_gap_sec`
+              apart and at most `interval_sec` apart, so static slides yield few candidates.
+        **sampler_options: Extra tuning options of the chosen sampler.
 
     Returns:
         tuple:
             - records (list): List of tuples (frame, frame_idx) for each sampled frame.
             - fps (float): Frames per second of the input video.
+
+    Raises:
+        ValueError: If `mode` is not a supported sampling strategy.
     """
-    container = av.open(video_path)
-    stream = container.streams.video[0]
-    fps = float(stream.average_rate)
-    interval = int(fps * interval_sec)
+    fps, _, _ = video_info(video_path)
+    records = list(iter_frames(video_path, interval_sec=interval_sec, mode=mode, **sampler_options))
+    return records, fps
 
-    records = []
-    for i, frame in enumerate(container.decode(video=0)):
-        if i % interval == 0:
-            img = frame.to_ndarray(format="bgr24")
-            records.append((img, i))
+def benchmark_sampling(video_path, interval_sec=10, modes=("decode", "seek", "keyframes", "scene")):
+    """
+    Times `process_video` for each sampling mode on the same video.
 
-    return records, fps
+    Args:
+        video_path (str): Path to the input video file.
+        interval_sec (int, optional): Sampling interval passed to every mode. Defaults to 10.
+        modes (tuple, optional): Sampling modes to compare.
+
+    Returns:
+        dict: Mapping of mode name to (elapsed seconds, number of sampled frames).
+    """
+    results = {}
+    for mode in modes:
+        start = time.perf_counter()
+        records, _ = process_video(video_path, interval_sec=interval_sec, mode=mode)
+        results[mode] = (time.perf_counter() - start, len(records))
+        print(f"{mode:>10}: {results[mode][0]:8.2f}s  {results[mode][1]} frames")
+    return results
 
-def save_records(records, fps):
+def save_records(records, fps, score_quality=True, quality_workers=None):
     """
     Saves filtered keyframes to disk and writes their metadata (path and timestamp) to a CSV file.
 
+    Frames are written as they are consumed, so `records` may be a generator such as
+    `fetch_frames` and only one full frame is held at a time. While a frame is still in memory
+    it is also reduced to a small grayscale image and scored by the rule-based quality filter
+    (see `Quality.is_quality_frame`), so the visual pipeline does not decode the JPEG again.
+    The score is therefore taken on the raw decoded frame, not on the quality-70 JPEG that is
+    written and later sent to the vision model; compression artifacts can shift borderline
+    blur/edge decisions slightly.
+
     Args:
-        records (list): List of tuples (frame, frame_idx) to be saved.
+        records (iterable): Tuples (frame, frame_idx) to be saved.
         fps (float): Frames per second of the original video, used to calculate timestamps.
+        score_quality (bool, optional): Add the `feature_flag` column. Defaults to True.
+        quality_workers (int, optional): Processes scoring frames in parallel with decoding and
+            writing; 1 scores inline. Defaults to the number of CPUs, at most 4.
 
     Returns:
-        pandas.DataFrame: DataFrame containing the saved keyframe paths and their corresponding timestamps.
+        pandas.DataFrame: DataFrame containing the saved keyframe paths and their corresponding timestamps,
+        plus their `feature_flag` when `score_quality` is set.
     """
     output_dir = "tmp/frames/keyframes/"
     output_csv = "tmp/frames/keyframes.csv"
 
     os.makedirs(output_dir, exist_ok=True)
 
+    if quality_workers is None:
+        quality_workers = min(4, os.cpu_count() or 1)
+    executor = None
+    if score_quality and quality_workers > 1:
+        executor = ProcessPoolExecutor(max_workers=quality_workers)
+
     rows = []
-    for i, (frame, frame_idx) in enumerate(records):
-        timestamp = _get_timestamp(frame_idx, fps)
-        sanitized_timestamp = timestamp.replace(':', '-').replace('.', '-')
-        frame_name = f"{sanitized_timestamp}.jpg"
-        out_path = os.path.join(output_dir, frame_name)
-        cv2.imwrite(out_path, frame, [int(cv2.IMWRITE_JPEG_QUALITY), 70])
-        rows.append([out_path, timestamp])
+    flags = []
+    try:
+        for i, (frame, frame_idx) in enumerate(records):
+            timestamp = _get_timestamp(frame_idx, fps)
+            sanitized_timestamp = timestamp.replace(':', '-').replace('.', '-')
+            frame_name = f"{sanitized_timestamp}.jpg"
+            out_path = os.path.join(output_dir, frame_name)
+            cv2.imwrite(out_path, frame, [int(cv2.IMWRITE_JPEG_QUALITY), 70])
+            rows.append([out_path, timestamp])
+
+            if score_quality:
+                analysis = analysis_image(frame)
+                flags.append(executor.submit(_score_gray, analysis) if executor else _score_gray(analysis))
+
+        if executor:
+            flags = [future.result() for future in flags]
+    finally:
+        if executor:
+            executor.shutdown(cancel_futures=True)
 
     df = pd.DataFrame(rows, columns=["keyframe", "timestamp"])
+    if score_quality:
+        df["feature_flag"] = flags
     df.to_csv(output_csv, index=False)
     return df
 
+if __name__ == "__main__":
+    benchmark_sampling(sys.argv[1], interval_sec=float(sys.argv[2]) if len(sys.argv) > 2 else 10)
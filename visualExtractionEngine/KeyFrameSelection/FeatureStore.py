@@ -0,0 +1,75 @@
+from .Similarties import _compute_hash, _resize_gray, _get_clip_embeddings
+from .FastSSIM import SSIMStats
+
+class FrameFeatureStore:
+    """
+    Per-video cache of the features the keyframe filters work on, keyed by frame index.
+
+    Each sampled frame is reduced once to its perceptual hash, its 128x128 grayscale thumbnail
+    and its L2-normalized CLIP embedding, after which the full frame can be released. The
+    threshold-tuning loop in `get_keyframes` then only re-runs the cheap comparisons. SSIM
+    statistics are computed from the thumbnail the first time a frame passes the hash check
+    and reused by every later tuning iteration.
+
+    Attributes:
+        frame_idxs (list): Frame indices in sampling order.
+        hashes (dict): frame_idx -> perceptual hash packed into a 64-bit int.
+        grays (dict): frame_idx -> np.ndarray 128x128 grayscale thumbnail.
+        embeddings (dict): frame_idx -> np.ndarray normalized CLIP image embedding.
+        ssim (dict): frame_idx -> `SSIMStats` of the thumbnail, filled by `ssim_stats`.
+    """
+
+    def __init__(self):
+        self.frame_idxs = []
+        self.hashes = {}
+        self.grays = {}
+        self.embeddings = {}
+        self.ssim = {}
+
+    def __len__(self):
+        return len(self.frame_idxs)
+
+    def ssim_stats(self, frame_idx):
+        """
+        Returns the cached `SSIMStats` of a frame, computing them on first use.
+        """
+        stats = self.ssim.get(frame_idx)
+        if stats is None:
+            stats = self.ssim[frame_idx] = SSIMStats(self.grays[frame_idx])
+        return stats
+
+    @classmethod
+    def build(cls, records, model, processor, batch_size=8):
+        """
+        Computes the features of every record, embedding frames with CLIP in batches.
+
+        Args:
+            records (iterable): Tuples (frame, frame_idx), e.g. from `iter_frames`.
+            model: CLIP model used for image embeddings.
+            processor: CLIP processor matching `model`.
+            batch_size (int, optional): Number of full frames buffered per CLIP batch. Defaults to 8.
+
+        Returns:
+            FrameFeatureStore: Store holding the features of all records.
+        """
+        store = cls()
+        batch = []
+
+        def flush():
+            frames, frame_idxs = zip(*batch)
+            for frame_idx, emb in zip(frame_idxs, _get_clip_embeddings(frames, model, processor)):
+                store.embeddings[frame_idx] = emb
+            batch.clear()
+
+        for frame, frame_idx in records:
+            store.frame_idxs.append(frame_idx)
+            store.hashes[frame_idx] = _compute_hash(frame)
+            store.grays[frame_idx] = _resize_gray(frame)
+            batch.append((frame, frame_idx))
+            if len(batch) >= batch_size:
+                flush()
+
+        if batch:
+            flush()
+
+        return store
@@ -0,0 +1,103 @@
+import numpy as np
+
+_BYTE_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+def hash_to_uint64(img_hash):
+    """
+    Packs a 64-bit `imagehash.ImageHash` into a single unsigned integer.
+
+    The Hamming distance between two packed hashes equals `abs(hash_a - hash_b)` on the
+    original ImageHash objects.
+
+    Args:
+        img_hash (imagehash.ImageHash): Perceptual hash with an 8x8 bit matrix.
+
+    Returns:
+        int: The hash bits packed big-endian into a Python int in [0, 2**64).
+    """
+    return int.from_bytes(np.packbits(img_hash.hash.flatten()).tobytes(), "big")
+
+def _popcount(values):
+    """
+    Counts the set bits of each element of a uint64 array.
+    """
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(values)
+    return _BYTE_POPCOUNT[values.view(np.uint8)].reshape(-1, 8).sum(axis=1)
+
+class _MultiIndexTable:
+    """
+    Multi-index hash table over packed 64-bit hashes for a fixed Hamming radius.
+
+    The 64 bits are split into `threshold + 1` disjoint substrings with one exact-match table
+    each. By the pigeonhole principle any hash within `threshold` bits of a query agrees with
+    it exactly on at least one substring, so only the hashes sharing a bucket are verified.
+    """
+
+    def __init__(self, threshold):
+        self.threshold = threshold
+        n_parts = min(threshold + 1, 64)
+        bounds = np.linspace(0, 64, n_parts + 1).astype(int)
+        self.parts = [(int(lo), (1 << int(hi - lo)) - 1) for lo, hi in zip(bounds[:-1], bounds[1:])]
+        self.tables = [{} for _ in self.parts]
+
+    def add(self, value):
+        for (shift, mask), table in zip(self.parts, self.tables):
+            table.setdefault((value >> shift) & mask, []).append(value)
+
+    def has_within(self, value):
+        for (shift, mask), table in zip(self.parts, self.tables):
+            for candidate in table.get((value >> shift) & mask, ()):
+                if (candidate ^ value).bit_count() <= self.threshold:
+                    return True
+        return False
+
+class HashIndex:
+    """
+    Set of packed 64-bit perceptual hashes answering "is any stored hash within `threshold` bits".
+
+    Args:
+        threshold (int): Maximum Hamming distance that counts as a near duplicate.
+        method (str, optional): Lookup structure. Defaults to "linear".
+            - "linear": hashes kept in a growing uint64 array and compared with one vectorized
+              XOR + popcount per query.
+            - "multi": multi-index hash table, sublinear lookups for large frame counts.
+
+    Raises:
+        ValueError: If `method` is not a supported lookup structure.
+    """
+
+    def __init__(self, threshold, method="linear"):
+        if method not in ("linear", "multi"):
+            raise ValueError(f"Unsupported hash index: {method}")
+        self.threshold = threshold
+        self.method = method
+        self.size = 0
+        self._values = np.empty(64, dtype=np.uint64)
+        self._table = _MultiIndexTable(threshold) if method == "multi" else None
+
+    def __len__(self):
+        return self.size
+
+    def add(self, value):
+        """
+        Inserts a packed hash (see `hash_to_uint64`).
+        """
+        if self._table is not None:
+            self._table.add(value)
+        else:
+            if self.size == len(self._values):
+                self._values = np.concatenate([self._values, np.empty_like(self._values)])
+            self._values[self.size] = value
+        self.size += 1
+
+    def has_within(self, value):
+        """
+        Returns True if any stored hash is at Hamming distance <= `threshold` from `value`.
+        """
+        if self._table is not None:
+            return self._table.has_within(value)
+        if not self.size:
+            return False
+        dists = _popcount(self._values[:self.size] ^ np.uint64(value))
+        return bool(np.any(dists <= self.threshold))
@@ -0,0 +1,125 @@
+import cv2
+import numpy as np
+from PIL import Image
+
+# Longest side of the grayscale image the quality rules run on. The blur and edge thresholds
+# were tuned on 720p lectures, so frames up to that size are scored at full resolution.
+ANALYSIS_SIDE = 1280
+
+
+def analysis_image(frame, max_side=ANALYSIS_SIDE):
+    """
+    Reduces a BGR frame to the small grayscale image used for quality scoring.
+
+    The frame is downscaled before the color conversion, so the full-resolution pixels are
+    only read once.
+
+    Args:
+        frame (np.ndarray): BGR frame of shape (H, W, 3).
+        max_side (int, optional): Longest side of the result. Defaults to ANALYSIS_SIDE.
+
+    Returns:
+        tuple:
+            - gray (np.ndarray): uint8 grayscale image.
+            - pixel_scale (float): Full-resolution pixels per analysis pixel.
+    """
+    height, width = frame.shape[:2]
+    scale = min(1.0, max_side / max(height, width))
+    if scale < 1.0:
+        frame = cv2.resize(frame, (max(1, round(width * scale)), max(1, round(height * scale))), interpolation=cv2.INTER_AREA)
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+    return gray, (height * width) / gray.size
+
+def read_analysis_image(img_path, max_side=ANALYSIS_SIDE):
+    """
+    Loads an image file as the small grayscale image used for quality scoring.
+
+    JPEG decoding is done at a reduced size when the file is much larger than `max_side`,
+    which skips most of the decoding work.
+
+    Args:
+        img_path (str): Path to the image file.
+        max_side (int, optional): Longest side of the result. Defaults to ANALYSIS_SIDE.
+
+    Returns:
+        tuple: (gray, pixel_scale) as in `analysis_image`, or (None, None) if the file
+        cannot be decoded.
+    """
+    try:
+        # Only the header is parsed here
+        with Image.open(img_path) as img:
+            width, height = img.size
+    except Exception:
+        return None, None
+
+    reduced = max(width, height) >= 2 * max_side
+    gray = cv2.imread(img_path, cv2.IMREAD_REDUCED_GRAYSCALE_2 if reduced else cv2.IMREAD_GRAYSCALE)
+    if gray is None:
+        return None, None
+    gray, pixel_scale = analysis_image(gray, max_side)
+    return gray, pixel_scale * (4 if reduced else 1)
+
+def is_quality_frame(gray, pixel_scale=1.0):
+    """
+    Rule-based filter deciding if a frame is worth sending to the LLM.
+
+    Cheap statistics run first: brightness, contrast, dark/bright ratios, the number of
+    distinct gray levels and the histogram variance all come from a single 256-bin histogram,
+    so blank, black and washed-out frames exit without any filtering. The Laplacian (blur)
+    and Canny (edge density) passes only run for frames that survive them.
+
+    Args:
+        gray (np.ndarray): uint8 grayscale image, usually from `analysis_image`.
+        pixel_scale (float, optional): Full-resolution pixels per pixel of `gray`. Histogram
+            counts are rescaled by it, so the thresholds keep their full-resolution meaning.
+
+    Returns:
+        bool: True if the frame passes every rule.
+    """
+    pixels = gray.size
+    hist = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    levels = np.arange(256)
+
+    brightness = float(hist @ levels / pixels)
+    if brightness < 20: return False
+
+    contrast = float(np.sqrt(hist @ (levels - brightness) ** 2 / pixels))
+    if contrast < 10: return False
+
+    dark_ratio = float(hist[:30].sum() / pixels)
+    bright_ratio = float(hist[221:].sum() / pixels)
+    if dark_ratio > 0.8 or bright_ratio > 0.9: return False
+
+    unique_colors = int(np.count_nonzero(hist))
+    if unique_colors / 256.0 < 0.1 or unique_colors < 20: return False
+
+    hist_var = float(np.var(hist * pixel_scale))
+    if hist_var < 100: return False
+
+    laplacian_var = float(cv2.Laplacian(gray, cv2.CV_64F).var())
+    if laplacian_var < 100: return False
+
+    edge_density = float(np.count_nonzero(cv2.Canny(gray, 50, 150)) / pixels)
+    if edge_density < 0.01: return False
+
+    return True
+
+def score_frame(frame):
+    """
+    Quality flag of an in-memory BGR frame: "important" or "not_important".
+    """
+    return "important" if is_quality_frame(*analysis_image(frame)) else "not_important"
+
+def score_file(img_path):
+    """
+    Quality flag of an image file: "important" or "not_important" (also for unreadable files).
+    """
+    gray, pixel_scale = read_analysis_image(img_path)
+    if gray is None:
+        return "not_important"
+    return "important" if is_quality_frame(gray, pixel_scale) else "not_important"
+
+def _score_gray(args):
+    # Process-pool entry point: the small grayscale image is all that crosses the process boundary
+    gray, pixel_scale = args
+    return "important" if is_quality_frame(gray, pixel_scale) else "not_important"
@@ -1,18 +1,98 @@
 import cv2
 from PIL import Image
 import imagehash
-from skimage.metrics import structural_similarity as ssim
-from sklearn.metrics.pairwise import cosine_similarity
 import torch
 import numpy as np
+from collections import deque
+from functools import partial
 from concurrent.futures import ThreadPoolExecutor
+from .HashIndex import HashIndex, hash_to_uint64
+from .FastSSIM import SSIMStats, ssim_batch
 """
 """
 
 def _resize_gray(frame):
     return cv2.resize(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), (128, 128))
 
-def hash_filter(records, hash_threshold=5, ssim_threshold=0.90, ssim_compare_window=3):
+def _compute_hash(frame):
+    return hash_to_uint64(imagehash.phash(Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))))
+
+class _HashSSIMGate:
+    """
+    Accept/reject state shared by the batch and streaming hash filters: an index of every packed
+    hash seen so far, plus the SSIM statistics of the last `ssim_compare_window` accepted frames.
+    Statistics are only requested for frames that pass the hash check, and a candidate is
+    compared with the whole window in one `ssim_batch` call.
+    """
+
+    def __init__(self, hash_threshold, ssim_threshold, ssim_compare_window, hash_index="linear"):
+        self.hash_threshold = hash_threshold
+        self.ssim_threshold = ssim_threshold
+        self.seen_hashes = HashIndex(hash_threshold, hash_index)
+        self.recent_stats = deque(maxlen=ssim_compare_window if ssim_compare_window > 0 else None)
+
+    def accept(self, img_hash, get_stats):
+        """
+        Args:
+            img_hash (int): Packed perceptual hash of the candidate.
+            get_stats (callable): Returns the candidate's `SSIMStats`; only called when the
+                hash check passes.
+        """
+        if self.seen_hashes.has_within(img_hash):
+            return False
+        self.seen_hashes.add(img_hash)
+
+        stats = get_stats()
+        if self.recent_stats and np.any(ssim_batch(stats, self.recent_stats) > self.ssim_threshold):
+            return False
+        self.recent_stats.append(stats)
+        return True
+
+def _normalize_rows(x):
+    """
+    L2-normalizes the rows of a 2D array the same way `sklearn.preprocessing.normalize` does,
+    so that dot products reproduce `cosine_similarity` up to float summation order.
+    """
+    norms = np.sqrt(np.einsum("ij,ij->i", x, x))
+    norms[norms == 0.0] = 1.0
+    return x / norms[:, np.newaxis]
+
+class _EmbeddingGate:
+    """
+    Accept/reject state shared by the batch and streaming CLIP filters.
+
+    The last `compare_window` accepted embeddings live in a preallocated ring buffer matrix,
+    so each candidate costs a single matrix-vector product instead of one
+    `cosine_similarity` call per pair.
+    """
+
+    def __init__(self, similarity_threshold, compare_window):
+        self.similarity_threshold = similarity_threshold
+        self.window = compare_window if compare_window > 0 else None
+        self.ring = None
+        self.count = 0
+        self.pos = 0
+
+    def accept(self, emb):
+        emb = _normalize_rows(np.asarray(emb)[np.newaxis, :])[0]
+
+        if self.ring is None:
+            self.ring = np.empty((self.window or 64, emb.shape[0]), dtype=emb.dtype)
+
+        if self.count and np.any(self.ring[:self.count] @ emb > self.similarity_threshold):
+            return False
+
+        # Unbounded mode: grow before writing, so the oldest row is never overwritten and
+        # `count` only ever covers rows that hold embeddings
+        if self.window is None and self.count == len(self.ring):
+            self.ring = np.concatenate([self.ring, np.empty_like(self.ring)])
+            self.pos = self.count
+        self.ring[self.pos] = emb
+        self.count = min(self.count + 1, len(self.ring))
+        self.pos = (self.pos + 1) % len(self.ring)
+        return True
+
+def hash_filter(records, hash_threshold=5, ssim_threshold=0.90, ssim_compare_window=3, hash_index="linear"):
     """
     Filters out visually similar frames using perceptual hashing and SSIM.
 
@@ -21,40 +101,64 @@ def hash_filter(records, hash_threshold=5, ssim_threshold=0.90, ssim_compare_win
         hash_threshold (int, optional): Maximum Hamming distance between perceptual hashes to consider frames as duplicates. Defaults to 5.
         ssim_threshold (float, optional): Maximum SSIM score to consider frames as distinct. Defaults to 0.90.
         ssim_compare_window (int, optional): Number of most recent accepted frames to compare against using SSIM. Defaults to 3.
+        hash_index (str, optional): Near-duplicate lookup structure, "linear" (vectorized popcount) or "multi" (multi-index hash table, sublinear for dense sampling). Defaults to "linear".
 
     Returns:
         list: List of tuples (frame, frame_idx) representing filtered, distinct keyframes.
     """
     resized_cache = {idx: _resize_gray(frame) for frame, idx in records}
 
-    def compute_hash(frame):
-        return imagehash.phash(Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)))
-
     with ThreadPoolExecutor() as executor:
-        hashes = list(executor.map(lambda x: compute_hash(x[0]), records))
+        hashes = list(executor.map(lambda x: _compute_hash(x[0]), records))
 
-    seen_hashes = []
+    gate = _HashSSIMGate(hash_threshold, ssim_threshold, ssim_compare_window, hash_index)
     distinct = []
 
     for i, (frame, frame_idx) in enumerate(records):
-        img_hash = hashes[i]
+        if gate.accept(hashes[i], partial(SSIMStats, resized_cache[frame_idx])):
+            distinct.append((frame, frame_idx))
 
-        if any(abs(img_hash - h) <= hash_threshold for h in seen_hashes):
-            continue
-        seen_hashes.append(img_hash)
+    return distinct
 
-        is_distinct = True
-        resized_gray = resized_cache[frame_idx]
-        for _, prev_idx in distinct[-ssim_compare_window:]:
-            prev_gray = resized_cache[prev_idx]
-            if ssim(resized_gray, prev_gray) > ssim_threshold:
-                is_distinct = False
-                break
+def iter_hash_filter(records, hash_threshold=5, ssim_threshold=0.90, ssim_compare_window=3, hash_index="linear"):
+    """
+    Streaming variant of `hash_filter` that consumes and yields frames one at a time.
 
-        if is_distinct:
-            distinct.append((frame, frame_idx))
+    Only the hashes seen so far and the last `ssim_compare_window` accepted thumbnails are
+    kept, so rejected frames can be released as soon as they are checked.
 
-    return distinct
+    Args:
+        records (iterable): Tuples (frame, frame_idx), e.g. from `iter_frames`.
+        hash_threshold (int, optional): Maximum Hamming distance between perceptual hashes to consider frames as duplicates. Defaults to 5.
+        ssim_threshold (float, optional): Maximum SSIM score to consider frames as distinct. Defaults to 0.90.
+        ssim_compare_window (int, optional): Number of most recent accepted frames to compare against using SSIM. Defaults to 3.
+        hash_index (str, optional): Near-duplicate lookup structure, "linear" (vectorized popcount) or "multi" (multi-index hash table, sublinear for dense sampling). Defaults to "linear".
+
+    Yields:
+        tuple: (frame, frame_idx) for each distinct keyframe, in input order.
+    """
+    gate = _HashSSIMGate(hash_threshold, ssim_threshold, ssim_compare_window, hash_index)
+    for frame, frame_idx in records:
+        if gate.accept(_compute_hash(frame), partial(SSIMStats, _resize_gray(frame))):
+            yield frame, frame_idx
+
+def hash_filter_features(store, frame_idxs, hash_threshold=5, ssim_threshold=0.90, ssim_compare_window=3, hash_index="linear"):
+    """
+    Applies the `hash_filter` logic to precomputed features instead of frames.
+
+    Args:
+        store (FrameFeatureStore): Cached hashes and SSIM statistics keyed by frame index.
+        frame_idxs (list): Frame indices to filter, in sampling order.
+        hash_threshold (int, optional): Maximum Hamming distance between perceptual hashes to consider frames as duplicates. Defaults to 5.
+        ssim_threshold (float, optional): Maximum SSIM score to consider frames as distinct. Defaults to 0.90.
+        ssim_compare_window (int, optional): Number of most recent accepted frames to compare against using SSIM. Defaults to 3.
+        hash_index (str, optional): Near-duplicate lookup structure, "linear" (vectorized popcount) or "multi" (multi-index hash table, sublinear for dense sampling). Defaults to "linear".
+
+    Returns:
+        list: Frame indices of the distinct keyframes.
+    """
+    gate = _HashSSIMGate(hash_threshold, ssim_threshold, ssim_compare_window, hash_index)
+    return [idx for idx in frame_idxs if gate.accept(store.hashes[idx], partial(store.ssim_stats, idx))]
 
 def _get_clip_embeddings(frames, model, processor):
     """
@@ -94,19 +198,87 @@ def clip_filter(records,model, processor, similarity_threshold=0.85, compare_win
         batch_embs = _get_clip_embeddings(batch_frames,model, processor)
         embeddings.extend(batch_embs)
 
+    gate = _EmbeddingGate(similarity_threshold, compare_window)
     distinct = []
-    past_embeddings = []
 
     for i, emb in enumerate(embeddings):
-        is_distinct = True
-        for prev_emb in past_embeddings[-compare_window:]:
-            sim = cosine_similarity([emb], [prev_emb])[0][0]
-            if sim > similarity_threshold:
-                is_distinct = False
-                break
-
-        if is_distinct:
+        if gate.accept(emb):
             distinct.append((frames[i], frame_idxs[i]))
-            past_embeddings.append(emb)
 
     return distinct
+
+def clip_filter_features(store, frame_idxs, similarity_threshold=0.85, compare_window=5):
+    """
+    Applies the `clip_filter` logic to precomputed CLIP embeddings instead of frames.
+
+    Args:
+        store (FrameFeatureStore): Cached embeddings keyed by frame index.
+        frame_idxs (list): Frame indices to filter, in sampling order.
+        similarity_threshold (float): Max cosine similarity to keep frame distinct.
+        compare_window (int): How many past frames to compare against.
+
+    Returns:
+        list: Frame indices of the frames with distinct content.
+    """
+    gate = _EmbeddingGate(similarity_threshold, compare_window)
+    return [idx for idx in frame_idxs if gate.accept(store.embeddings[idx])]
+
+def banded_similarity(embeddings, window=5):
+    """
+    Computes the cosine similarity of every embedding with its `window` predecessors in one call.
+
+    Intended for offline analysis of a whole video, e.g. to pick `similarity_threshold`: unlike
+    `clip_filter`, it compares against the preceding sampled frames rather than the preceding
+    accepted ones.
+
+    Args:
+        embeddings (np.ndarray): Array of shape (n_frames, dim) with one embedding per frame.
+        window (int, optional): Number of preceding frames to compare against. Defaults to 5.
+
+    Returns:
+        np.ndarray: Array of shape (n_frames, window) where entry [i, k] is the similarity
+        between frame i and frame i - k - 1, or NaN when that frame does not exist.
+    """
+    normed = _normalize_rows(np.asarray(embeddings))
+    n_frames, dim = normed.shape
+
+    padded = np.full((n_frames + window, dim), np.nan, dtype=normed.dtype)
+    padded[window:] = normed
+    # previous[i, k] is the row of frame i - k - 1 (NaN padding before the first frame)
+    previous = np.lib.stride_tricks.sliding_window_view(padded[:-1], window, axis=0)[:, :, ::-1]
+    return np.einsum("nd,ndk->nk", normed, previous)
+
+def iter_clip_filter(records, model, processor, similarity_threshold=0.85, compare_window=5, batch_size=8):
+    """
+    Streaming variant of `clip_filter` that embeds frames in batches as they arrive.
+
+    At most `batch_size` full frames are buffered at once; each batch is embedded, filtered
+    and yielded before the next one is read.
+
+    Args:
+        records (iterable): Tuples (frame, frame_idx), e.g. from `iter_hash_filter`.
+        similarity_threshold (float): Max cosine similarity to keep frame distinct.
+        compare_window (int): How many past frames to compare against.
+        batch_size (int): Maximum number of frames buffered and embedded per batch.
+
+    Yields:
+        tuple: (frame, frame_idx) for each frame with distinct content, in input order.
+    """
+    gate = _EmbeddingGate(similarity_threshold, compare_window)
+    batch = []
+
+    def flush():
+        frames, frame_idxs = zip(*batch)
+        embeddings = _get_clip_embeddings(frames, model, processor)
+        batch.clear()
+        for frame, frame_idx, emb in zip(frames, frame_idxs, embeddings):
+            if gate.accept(emb):
+                yield frame, frame_idx
+
+    for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield from flush()
+
+    if batch:
+        yield from flush()
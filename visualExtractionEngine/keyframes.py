@@ -5,11 +5,104 @@ import shutil
 import json
 
 import time
-from .KeyFrameSelection.FeatureExtraction import process_video, save_records
-from .KeyFrameSelection.Similarties import hash_filter, clip_filter
+from .KeyFrameSelection.FeatureExtraction import save_records, iter_frames, fetch_frames, video_info
+from .KeyFrameSelection.Similarties import iter_hash_filter, iter_clip_filter, hash_filter_features, clip_filter_features
+from .KeyFrameSelection.FeatureStore import FrameFeatureStore
 
-def get_keyframes(video_path, model, processor):
-    records, fps = process_video(video_path, interval_sec=10)
+def stream_keyframes(
+    video_path,
+    model,
+    processor,
+    interval_sec=10,
+    sampling_mode="seek",
+    hash_threshold=5,
+    ssim_threshold=0.95,
+    clip_threshold=0.90,
+    memory_limit_mb=256,
+    batch_size=8,
+    sampler_options=None,
+):
+    """
+    Single-pass, bounded-memory keyframe selection for long videos.
+
+    Frames flow through decode -> phash/SSIM -> CLIP as a chain of generators. Rejected frames
+    are dropped right away, and survivors are reduced to their frame index once embedded.
+    Full-resolution frames are re-fetched from the video only for the keyframes being written.
+
+    Args:
+        video_path (str): Path to the input video file.
+        model: CLIP model used for image embeddings.
+        processor: CLIP processor matching `model`.
+        interval_sec (int, optional): Time interval in seconds between sampled frames. Defaults to 10.
+        sampling_mode (str, optional): Sampling strategy passed to `iter_frames`. Defaults to "seek".
+        hash_threshold (int, optional): Maximum phash Hamming distance for duplicates. Defaults to 5.
+        ssim_threshold (float, optional): Maximum SSIM score to keep a frame distinct. Defaults to 0.95.
+        clip_threshold (float, optional): Maximum CLIP cosine similarity to keep a frame distinct. Defaults to 0.90.
+        memory_limit_mb (int, optional): Ceiling for full-resolution frames buffered at once. Defaults to 256.
+        batch_size (int, optional): Upper bound on the CLIP batch size. Defaults to 8.
+        sampler_options (dict, optional): Extra options for the sampler, e.g. for "scene" mode.
+
+    Returns:
+        pandas.DataFrame: The saved keyframe paths and timestamps (see `save_records`).
+    """
+    fps, width, height = video_info(video_path)
+
+    # One frame is always in flight at decode, the rest of the budget goes to the CLIP batch
+    frame_bytes = width * height * 3
+    budget = int(memory_limit_mb * 1024 * 1024) // frame_bytes - 1
+    batch_size = max(1, min(batch_size, budget))
+
+    frames = iter_frames(video_path, interval_sec=interval_sec, mode=sampling_mode, **(sampler_options or {}))
+    distinct = iter_hash_filter(
+        frames,
+        hash_threshold=hash_threshold,
+        ssim_threshold=ssim_threshold,
+        ssim_compare_window=5
+    )
+    distinct = iter_clip_filter(
+        distinct,
+        model,
+        processor,
+        similarity_threshold=clip_threshold,
+        compare_window=5,
+        batch_size=batch_size
+    )
+    keyframe_idxs = [frame_idx for _, frame_idx in distinct]
+
+    return save_records(fetch_frames(video_path, keyframe_idxs), fps)
+
+def get_keyframes(
+    video_path,
+    model,
+    processor,
+    sampling_mode="seek",
+    interval_sec=10,
+    streaming=False,
+    memory_limit_mb=256,
+    sampler_options=None,
+):
+    # "scene" sampling treats interval_sec as the longest gap between candidates
+    sampler_options = sampler_options or {}
+    if streaming:
+        stream_keyframes(
+            video_path,
+            model,
+            processor,
+            interval_sec=interval_sec,
+            sampling_mode=sampling_mode,
+            memory_limit_mb=memory_limit_mb,
+            sampler_options=sampler_options
+        )
+        return True
+
+    fps, _, _ = video_info(video_path)
+
+    # Features are computed once per sampled frame; the tuning loop only re-thresholds them
+    store = FrameFeatureStore.build(
+        iter_frames(video_path, interval_sec=interval_sec, mode=sampling_mode, **sampler_options),
+        model,
+        processor
+    )
 
     min_frames = 10
     max_iterations = 20
@@ -19,20 +112,20 @@ def get_keyframes(video_path, model, processor):
     ssim_threshold = 0.95
     clip_threshold = 0.90
 
-    filtered = records
+    filtered = store.frame_idxs
 
     while len(filtered) >= min_frames and iteration < max_iterations:
-        filtered = hash_filter(
+        filtered = hash_filter_features(
+            store,
             filtered,
             hash_threshold=hash_threshold,
             ssim_threshold=ssim_threshold,
             ssim_compare_window=5
         )
 
-        filtered = clip_filter(
+        filtered = clip_filter_features(
+            store,
             filtered,
-            model,
-            processor,
             similarity_threshold=clip_threshold,
             compare_window=5
         )
@@ -46,7 +139,7 @@ def get_keyframes(video_path, model, processor):
         #print(f"Iter {iteration}: {len(filtered)} frames")
 
     # Step 3: Save filtered keyframes
-    save_records(filtered, fps)
+    save_records(fetch_frames(video_path, filtered), fps)
     #print("Keyframe selection process completed successfully.")
     return True
 